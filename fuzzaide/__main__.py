@@ -0,0 +1,12 @@
+# file    :  __main__.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+import sys
+
+from fuzzaide.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# file    :  cli.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+fuzzaide: single entry point for all tools, e.g. `fuzzaide dupmanage ls dup in`.
+Only module of the selected tool is imported. Console scripts of the tools are
+thin shims over this dispatcher
+"""
+
+import os
+import sys
+from time import perf_counter
+from importlib import import_module
+
+DISPATCH_START = perf_counter()
+
+# tool name -> [module with main(), short description]
+TOOLS = {
+    "appverif-minimize": [
+        "fuzzaide.tools.appverif_minimize",
+        "minimize WinAFL crashes with Application Verifier logs",
+    ],
+    "argv-fuzz-cook": [
+        "fuzzaide.tools.argv_fuzz_cook",
+        "prepare arguments for AFL argv-fuzz-inl.h",
+    ],
+    "dupmanage": [
+        "fuzzaide.tools.dupmanage",
+        "list, copy, move or delete groups of duplicate files",
+    ],
+    "fake-afl-fuzz": [
+        "fuzzaide.tools.fuzzman.fake_afl",
+        "fake afl-fuzz for testing and benchmarking fuzzman",
+    ],
+    "fuzz-webview": [
+        "fuzzaide.tools.fuzz_webview.fuzz_webview",
+        "web dashboard for AFL-like fuzzers (needs flask)",
+    ],
+    "fuzzman": [
+        "fuzzaide.tools.fuzzman.fuzzman",
+        "run and manage multiple instances of AFL-like fuzzers",
+    ],
+    "pcap2raw": [
+        "fuzzaide.tools.pcap2raw",
+        "extract raw packets from pcap files (needs scapy)",
+    ],
+    "split-dir-contents": [
+        "fuzzaide.tools.split_dir_contents",
+        "split files of directory into several directories",
+    ],
+    "split-file-contents": [
+        "fuzzaide.tools.split_file_contents",
+        "split file into several files",
+    ],
+}
+
+# report startup time of tools to stderr when set (also works for console scripts)
+STARTUP_TIME_ENV = "FUZZAIDE_STARTUP_TIME"
+
+
+def get_tool_name(name):
+    """
+    Returns canonical tool name for names like 'split_dir_contents' or 'dupmanage.py'
+    """
+
+    if name.endswith(".py"):
+        name = name[:-3]
+    return name.replace("_", "-")
+
+
+def get_process_age():
+    """
+    Returns seconds since start of this process (including interpreter startup)
+    or None where /proc is not available
+    """
+
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            stat = f.read()
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    start_ticks = int(stat[stat.rfind(b")") + 2 :].split()[19])
+    return max(0.0, uptime - start_ticks / float(os.sysconf("SC_CLK_TCK")))
+
+
+def report_startup(name, import_time):
+    text = "fuzzaide: %s started in %.1f ms (dispatch %.1f ms, import %.1f ms)" % (
+        name,
+        1000.0 * (perf_counter() - DISPATCH_START),
+        1000.0 * (perf_counter() - DISPATCH_START - import_time),
+        1000.0 * import_time,
+    )
+    age = get_process_age()
+    if age is not None:
+        text += ", %.0f ms since process start" % (1000.0 * age,)
+    print(text, file=sys.stderr)
+
+
+def run_tool(name, argv, startup_time=False):
+    """
+    Import module of tool and run its main() with `argv` as command line arguments
+    """
+
+    start = perf_counter()
+    module = import_module(TOOLS[name][0])
+    import_time = perf_counter() - start
+
+    sys.argv = [name] + list(argv)  # tools parse sys.argv and show it in help
+    if startup_time or os.environ.get(STARTUP_TIME_ENV):
+        report_startup(name, import_time)
+    return module.main()
+
+
+def print_help(file=sys.stdout):
+    print(
+        "usage: fuzzaide [-h] [-l] [--startup-time] TOOL [ARGS ...]\n\n"
+        "fuzzaide - run one of fuzzaide tools, only the selected one is loaded\n\n"
+        "options:\n"
+        "  -h, --help      show this help message and exit\n"
+        "  -l, --list      list tool names only\n"
+        "  --startup-time  print time spent loading the tool to stderr "
+        "(or set %s=1)\n\n"
+        "tools:" % (STARTUP_TIME_ENV,),
+        file=file,
+    )
+    for name, (_, description) in sorted(TOOLS.items()):
+        print("  %-20s %s" % (name, description), file=file)
+    print("\nrun 'fuzzaide TOOL --help' to see help of a tool", file=file)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    startup_time = False
+    while len(argv) > 0 and argv[0].startswith("-"):
+        option = argv[0]
+        argv = argv[1:]
+        if option in ("-h", "--help"):
+            print_help()
+            return 0
+        if option in ("-l", "--list"):
+            print("\n".join(sorted(TOOLS)))
+            return 0
+        if option == "--startup-time":
+            startup_time = True
+            continue
+        print_help(file=sys.stderr)
+        sys.exit("Error: unknown option '%s'" % (option,))
+
+    if len(argv) < 1:
+        print_help()
+        return 0
+
+    name = get_tool_name(argv[0])
+    if name not in TOOLS:
+        sys.exit(
+            "Error: unknown tool '%s'. Available tools: %s"
+            % (argv[0], ", ".join(sorted(TOOLS)))
+        )
+
+    return run_tool(name, argv[1:], startup_time)
+
+
+def make_shim(name):
+    """
+    Returns entry point of console script for tool `name`
+    """
+
+    def shim():
+        return run_tool(name, sys.argv[1:])
+
+    shim.__name__ = name.replace("-", "_")
+    return shim
+
+
+appverif_minimize = make_shim("appverif-minimize")
+argv_fuzz_cook = make_shim("argv-fuzz-cook")
+dupmanage = make_shim("dupmanage")
+fake_afl_fuzz = make_shim("fake-afl-fuzz")
+fuzz_webview = make_shim("fuzz-webview")
+fuzzman = make_shim("fuzzman")
+pcap2raw = make_shim("pcap2raw")
+split_dir_contents = make_shim("split-dir-contents")
+split_file_contents = make_shim("split-file-contents")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -40,6 +40,7 @@ def get_afl_stat_name(wanted_stat_name, is_old_afl_stats):
             "last_path": "last_path",
             "last_crash": "last_crash",
             "last_hang": "last_hang",
+            "last_update": "last_update",
             "paths_found": "paths_found",
             "paths_total": "paths_total",
             "unique_crashes": "unique_crashes",
@@ -49,6 +50,7 @@ def get_afl_stat_name(wanted_stat_name, is_old_afl_stats):
             "last_path": "last_find",
             "last_crash": "last_crash",
             "last_hang": "last_hang",
+            "last_update": "last_update",
             "paths_found": "corpus_found",
             "paths_total": "corpus_count",
             "unique_crashes": "saved_crashes",
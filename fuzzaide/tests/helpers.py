@@ -0,0 +1,13 @@
+import os
+
+
+def write_file(path: str, data: bytes, mtime: float = 0) -> None:
+    """
+    Write file creating its dirs. Default mtime makes file old enough to be picked
+    by monitors that skip files which may still be written (sync, seeds, coverage)
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    os.utime(path, (mtime, mtime))
@@ -0,0 +1,54 @@
+import sys
+import subprocess
+
+import pytest
+from pytest import CaptureFixture
+
+from fuzzaide.cli import TOOLS, get_tool_name, main
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("dupmanage", "dupmanage"),
+        ("split_dir_contents", "split-dir-contents"),
+        ("argv-fuzz-cook.py", "argv-fuzz-cook"),
+    ],
+)
+def test_get_tool_name(name: str, expected: str) -> None:
+    assert get_tool_name(name) == expected
+
+
+def test_dispatch_to_tool(capsys: CaptureFixture) -> None:
+    assert main(["--startup-time", "argv_fuzz_cook", "-c", "1", "2"]) == 0
+    captured = capsys.readouterr()
+    assert captured.out == "'1\\x002\\x00\\x00'\n"
+    assert "fuzzaide: argv-fuzz-cook started in" in captured.err
+
+
+def test_unknown_tool() -> None:
+    with pytest.raises(SystemExit) as e:
+        main(["no-such-tool"])
+    assert "unknown tool" in str(e.value)
+
+
+def test_list_tools(capsys: CaptureFixture) -> None:
+    assert main(["--list"]) == 0
+    assert capsys.readouterr().out.split() == sorted(TOOLS)
+
+
+def test_only_selected_tool_is_imported() -> None:
+    code = (
+        "import sys\n"
+        "from fuzzaide.cli import main\n"
+        "try:\n"
+        "    main(['fuzz-webview', '--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = ['flask', 'scapy', 'hashlib', 'fuzzaide.tools.dupmanage']\n"
+        "print(' '.join(m for m in heavy if m in sys.modules))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, check=True
+    )
+    assert proc.stdout.decode().splitlines()[-1] == ""
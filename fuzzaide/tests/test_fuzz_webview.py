@@ -0,0 +1,414 @@
+import json
+import time
+from threading import Lock
+
+import pytest
+
+from fuzzaide.tools.fuzz_webview.federation import Federation
+from fuzzaide.tools.fuzz_webview.fuzz_webview import StatsLoader
+from fuzzaide.tools.fuzz_webview.plot_history import PlotFile, PlotHistory, Series, lttb
+
+
+def write_stats(path, **stats) -> None:
+    path.mkdir(exist_ok=True)
+    text = "".join("%-18s: %s\n" % (k, v) for k, v in stats.items())
+    (path / "fuzzer_stats").write_text(text)
+
+
+def make_loader(sync_dir) -> StatsLoader:
+    loader = StatsLoader(str(sync_dir), Lock())
+    loader.stop()
+    loader.join()  # first load is done by the thread, next ones by tests
+    return loader
+
+
+@pytest.fixture
+def sync_dir(tmp_path):
+    write_stats(
+        tmp_path / "s1",
+        last_update=1000,
+        execs_done=100,
+        corpus_count=10,
+        saved_crashes=1,
+        last_find=990,
+        last_crash=900,
+    )
+    write_stats(
+        tmp_path / "s2",
+        last_update=1000,
+        execs_done=50,
+        paths_total=5,
+        unique_hangs=2,
+        last_path=995,
+        last_hang=950,
+    )
+    return tmp_path
+
+
+def test_stats_loader_totals(sync_dir) -> None:
+    version, _, common, fuzzers = make_loader(sync_dir).get_snapshot()
+    assert version == 1
+    assert [f["name"] for f in fuzzers] == ["s1", "s2"]
+    assert common["fuzzers"] == 2
+    assert common["execs"] == 150
+    assert common["paths"] == 15
+    assert common["crashes"] == 1 and common["hangs"] == 2
+    assert common["last_new_path"] == 995
+    assert common["last_new_crash"] == 900 and common["last_new_hang"] == 950
+
+
+def test_stats_loader_version(sync_dir) -> None:
+    loader = make_loader(sync_dir)
+    loader.load_stats()
+    assert loader.get_snapshot()[0] == 1  # nothing changed
+
+    write_stats(sync_dir / "s2", last_update=1060, execs_done=80, paths_total=5)
+    loader.load_stats()
+    version, _, common, fuzzers = loader.get_snapshot()
+    assert version == 2
+    assert [f["version"] for f in fuzzers] == [1, 2]
+    assert common["execs"] == 180
+
+    (sync_dir / "s1" / "fuzzer_stats").unlink()
+    loader.load_stats()
+    version, _, common, fuzzers = loader.get_snapshot()
+    assert version == 3
+    assert [f["name"] for f in fuzzers] == ["s2"]
+
+
+def test_stats_loader_deltas(sync_dir) -> None:
+    loader = make_loader(sync_dir)
+    write_stats(
+        sync_dir / "s2",
+        last_update=1060,
+        execs_done=80,
+        paths_total=5,
+        unique_hangs=2,
+        last_path=995,
+        last_hang=950,
+    )
+    loader.load_stats()
+
+    deltas = loader.get_deltas_since(1)
+    assert [v for v, _ in deltas] == [2]
+    delta = json.loads(deltas[0][1])
+    assert delta["stats"] == {"execs": 180}
+    assert delta["fuzzers"] == {"s2": {"last_update": "1060", "execs_done": "80"}}
+    assert "names" not in delta
+
+    assert [v for v, _ in loader.get_deltas_since(0)] == [1, 2]
+    assert loader.get_deltas_since(2) == []
+    assert loader.get_deltas_since(5) is None
+
+
+def test_stats_loader_rereads_only_changed_files(sync_dir) -> None:
+    loader = make_loader(sync_dir)
+    assert loader.load_info["files_read"] == 2
+
+    loader.load_stats()
+    assert loader.load_info["scanned"] is False
+    assert loader.load_info["files_checked"] == 2
+    assert loader.load_info["files_read"] == 0
+
+    write_stats(sync_dir / "s1", last_update=1060, execs_done=500)
+    loader.load_stats()
+    assert loader.load_info["scanned"] is False
+    assert loader.load_info["files_read"] == 1
+    assert loader.get_snapshot()[2]["execs"] == 550
+
+    (sync_dir / "s3").mkdir()  # fuzzer dir without fuzzer_stats yet
+    loader.load_stats()
+    assert loader.load_info["scanned"] is True
+    assert loader.load_info["files_read"] == 0
+
+    write_stats(sync_dir / "s3", last_update=1000, execs_done=7)
+    loader.load_stats()
+    assert loader.load_info["files_read"] == 1
+    assert [f["name"] for f in loader.get_snapshot()[3]] == ["s1", "s2", "s3"]
+
+
+def test_stats_loader_single_fuzzer(tmp_path) -> None:
+    write_stats(tmp_path / "default", last_update=1000, execs_done=10)
+    (tmp_path / "default" / ".synced").mkdir()
+    loader = make_loader(tmp_path / "default")
+    assert [f["name"] for f in loader.get_snapshot()[3]] == ["default"]
+
+
+def make_app(sync_dir):
+    pytest.importorskip("flask")
+    from fuzzaide.tools.fuzz_webview.webapp import WebApp
+
+    app = WebApp("fuzzaide.tools.fuzz_webview.webapp", str(sync_dir))
+    app.stop_stats_loader()
+    app.stats_loader.join()
+    return app
+
+
+def test_api_conditional_get(sync_dir) -> None:
+    app = make_app(sync_dir)
+    client = app.test_client()
+
+    response = client.get("/api/stats")
+    assert response.status_code == 200
+    assert response.get_json()["stats"]["execs"] == 150
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    response = client.get("/api/stats", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    write_stats(sync_dir / "s1", last_update=1060, execs_done=500, corpus_count=10)
+    app.stats_loader.load_stats()
+    response = client.get("/api/stats", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    data = client.get("/api/fuzzers?since=1").get_json()
+    assert data["names"] == ["s1", "s2"]
+    assert [f["name"] for f in data["fuzzers"]] == ["s1"]
+
+    fuzzer = client.get("/api/fuzzers/s2")
+    assert fuzzer.get_json()["stats"]["execs_done"] == "50"
+    response = client.get(
+        "/api/fuzzers/s2", headers={"If-None-Match": fuzzer.headers["ETag"]}
+    )
+    assert response.status_code == 304
+    assert client.get("/api/fuzzers/nope").status_code == 404
+
+
+def test_api_events(sync_dir) -> None:
+    app = make_app(sync_dir)
+    client = app.test_client()
+
+    # stream ends after the first batch of events because stats loader is stopped
+    body = client.get("/api/events").get_data(as_text=True)
+    assert "event: heartbeat" in body
+    assert "id: %s-1\nevent: snapshot\n" % (app.etag_prefix,) in body
+
+    (sync_dir / "s1" / "fuzzer_stats").unlink()
+    app.stats_loader.load_stats()
+    last_id = "%s-1" % (app.etag_prefix,)
+    body = client.get("/api/events", headers={"Last-Event-ID": last_id})
+    body = body.get_data(as_text=True)
+    assert "event: snapshot" not in body
+    data = body.split("event: delta\ndata: ")[1].split("\n")[0]
+    assert json.loads(data)["names"] == ["s2"]
+
+    body = client.get("/api/events", headers={"Last-Event-ID": "123-1"})
+    assert "event: snapshot" in body.get_data(as_text=True)  # id of other run
+
+
+PLOT_HEADER = (
+    "# relative_time, cycles_done, cur_item, corpus_count, pending_total, "
+    "pending_favs, map_size, saved_crashes, saved_hangs, max_depth, "
+    "execs_per_sec, total_execs, edges_found\n"
+)
+
+
+def plot_row(t, corpus=10, crashes=0, eps=100.0) -> str:
+    return "%d, 0, 0, %d, 0, 0, 1.50%%, %d, 0, 1, %.2f, %d, 50\n" % (
+        t,
+        corpus,
+        crashes,
+        eps,
+        t * 100,
+    )
+
+
+def test_lttb_keeps_ends_and_peaks() -> None:
+    times = list(range(1000))
+    values = [0.0] * 1000
+    values[500] = 100.0
+    out_t, out_v = lttb(times, values, 20)
+    assert len(out_t) == 20
+    assert out_t[0] == 0 and out_t[-1] == 999
+    assert 100.0 in out_v
+    assert lttb(times[:10], values[:10], 20) == (times[:10], values[:10])
+
+
+def test_series_levels_keep_extremes() -> None:
+    series = Series()
+    values = [1000.0 if i == 7777 else float(i % 10) for i in range(10000)]
+    series.extend([float(i) for i in range(5000)], values[:5000])
+    series.extend([float(i) for i in range(5000, 10000)], values[5000:])
+    assert len(series.levels) > 2
+
+    times, values = series.get_points(0.0, 9999.0, 100)
+    assert len(times) < 10000 // 4
+    assert times == sorted(times) and times[-1] == 9999.0
+    assert 1000.0 in values
+
+    times, values = series.query(7000.0, 8000.0, 50)
+    assert len(times) == 50
+    assert 7000.0 <= times[0] and times[-1] <= 8000.0
+    assert 1000.0 in values
+
+
+def test_plot_file_follows_tail(tmp_path) -> None:
+    path = tmp_path / "plot_data"
+    path.write_text(PLOT_HEADER + plot_row(0) + plot_row(5) + "10, 0")
+    plot = PlotFile(str(path))
+    assert plot.update(time_base=1000) == 2
+    assert list(plot.series["execs_per_sec"].levels[0][0]) == [1000.0, 1005.0]
+
+    with open(str(path), "a") as f:
+        f.write(", 0, 12, 0, 0, 2.00%, 1, 0, 1, 50.00, 1000, 60\n")
+    offset = plot.offset
+    assert plot.update(time_base=1000) == 1
+    assert plot.offset > offset
+    assert list(plot.series["corpus_count"].levels[0][1]) == [10, 10, 12]
+    assert plot.series["coverage"].levels[0][1][-1] == 2.0
+    assert plot.update(time_base=1000) == 0
+
+    path.write_text(PLOT_HEADER + plot_row(0, corpus=3))  # fuzzer was restarted
+    assert plot.update(time_base=2000) == 1
+    assert list(plot.series["corpus_count"].levels[0][1]) == [3]
+
+
+def test_plot_file_old_format(tmp_path) -> None:
+    path = tmp_path / "plot_data"
+    path.write_text(
+        "# unix_time, cycles_done, cur_path, paths_total, pending_total, "
+        "pending_favs, map_size, unique_crashes, unique_hangs, max_depth, "
+        "execs_per_sec\n1000, 0, 0, 7, 0, 0, 0.50%, 2, 0, 1, 10.00\n"
+    )
+    plot = PlotFile(str(path))
+    assert plot.update(time_base=5) == 1
+    assert plot.series["corpus_count"].levels[0][0][0] == 1000.0
+    assert plot.series["crashes"].levels[0][1][0] == 2
+
+
+def test_plot_history_aggregate(tmp_path) -> None:
+    for name in ("s1", "s2"):
+        (tmp_path / name).mkdir()
+        rows = "".join(plot_row(t, corpus=t // 10) for t in range(0, 101, 5))
+        (tmp_path / name / "plot_data").write_text(PLOT_HEADER + rows)
+
+    history = PlotHistory()
+    fuzzers = [["s1", str(tmp_path / "s1"), 1000], ["s2", str(tmp_path / "s2"), 1010]]
+    assert history.update(fuzzers) == 42
+    assert history.version == 1
+    assert history.update(fuzzers) == 0 and history.version == 1
+    assert history.get_range() == (1000.0, 1110.0)
+
+    points = history.query("corpus_count", 1000.0, 1100.0, 10)
+    assert len(points) == 10
+    assert points[-1] == [1100.0, 10 + 9]  # s2 started 10 seconds later
+    assert history.query("corpus_count", 1000.0, 1100.0, 10, "s1")[-1][1] == 10
+    assert history.query("corpus_count", 1000.0, 1100.0, 10, "nope") == []
+
+
+def test_api_history(sync_dir) -> None:
+    rows = "".join(plot_row(t, eps=t) for t in range(0, 1000, 5))
+    (sync_dir / "s1" / "plot_data").write_text(PLOT_HEADER + rows)
+    app = make_app(sync_dir)
+    client = app.test_client()
+
+    response = client.get("/api/history?metric=execs_per_sec&points=20")
+    data = response.get_json()
+    assert len(data["points"]) == 20
+    response = client.get(
+        "/api/history?metric=execs_per_sec&points=20",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == 304
+
+    data = client.get("/api/history?metric=execs_per_sec&fuzzer=s1&last=100").get_json()
+    assert data["points"][0][0] >= data["range"][1] - 100
+    assert data["points"][-1][1] == 995
+    assert client.get("/api/history?metric=nope").status_code == 404
+
+
+def wait_for(condition, timeout=10.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def campaigns_dir(tmp_path):
+    for campaign, execs in (("alpha", 100), ("beta", 200)):
+        (tmp_path / "campaigns" / campaign).mkdir(parents=True)
+        for fuzzer in ("s1", "s2"):
+            write_stats(
+                tmp_path / "campaigns" / campaign / fuzzer,
+                last_update=1000,
+                execs_done=execs,
+            )
+    return tmp_path / "campaigns"
+
+
+def test_federation_loads_campaigns(campaigns_dir, tmp_path) -> None:
+    other = tmp_path / "other" / "alpha"  # clashes with name of campaign
+    other.mkdir(parents=True)
+    write_stats(other / "main", last_update=1000, execs_done=5)
+
+    federation = Federation([str(other)], [str(campaigns_dir)], workers=2)
+    try:
+        assert sorted(federation.campaigns) == ["alpha", "alpha-2", "beta"]
+        assert wait_for(
+            lambda: all(c["status"] == "ok" for c in federation.get_summary()[2])
+        )
+        version, _, summary = federation.get_summary()
+        totals = dict((c["name"], c["stats"]["execs"]) for c in summary)
+        assert totals == {"alpha": 5, "alpha-2": 200, "beta": 400}
+        assert federation.get_campaign("beta").loader.get_snapshot()[2]["fuzzers"] == 2
+
+        (campaigns_dir / "gamma").mkdir()
+        federation.update_campaigns()
+        assert "gamma" in federation.campaigns
+        assert wait_for(lambda: federation.get_summary()[0] > version)
+    finally:
+        federation.stop()
+        federation.join()
+
+
+def test_federation_slow_campaign_waits_longer(campaigns_dir, monkeypatch) -> None:
+    federation = Federation([], [str(campaigns_dir)], workers=1)
+    federation.stop()
+    federation.join()
+
+    campaign = federation.get_campaign("alpha")
+    campaign.loader.load_info = {"duration": 3.0}
+    monkeypatch.setattr(campaign.loader, "load_stats", lambda: None)
+    federation.load(campaign)
+    assert campaign.get_status(time.monotonic()) == "slow"
+    assert campaign.next_load - time.monotonic() > 20
+
+    campaign.load_started = time.monotonic() - 60
+    assert campaign.get_status(time.monotonic()) == "stalled"
+
+
+def test_api_campaigns(campaigns_dir) -> None:
+    pytest.importorskip("flask")
+    from fuzzaide.tools.fuzz_webview.webapp import WebApp
+
+    app = WebApp("fuzzaide.tools.fuzz_webview.webapp", [], [str(campaigns_dir)])
+    try:
+        client = app.test_client()
+        assert wait_for(
+            lambda: all(
+                c["status"] == "ok"
+                for c in client.get("/api/campaigns").get_json()["campaigns"]
+            )
+        )
+        response = client.get("/api/campaigns")
+        assert [c["name"] for c in response.get_json()["campaigns"]] == [
+            "alpha",
+            "beta",
+        ]
+        etag = response.headers["ETag"]
+        response = client.get("/api/campaigns", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        assert client.get("/c/beta/api/stats").get_json()["stats"]["execs"] == 400
+        data = client.get("/c/alpha/api/fuzzers").get_json()
+        assert data["names"] == ["s1", "s2"]
+        assert client.get("/c/alpha/").status_code == 200
+        assert client.get("/c/nope/api/stats").status_code == 404
+        assert client.get("/api/stats").status_code == 404  # which campaign?
+    finally:
+        app.stop_stats_loader()
@@ -1,3 +1,5 @@
+from types import SimpleNamespace
+
 import pytest
 
 from fuzzaide.tools.fuzzman.fuzzman import FuzzManager
@@ -6,3 +8,69 @@ from fuzzaide.tools.fuzzman.fuzzman import FuzzManager
 def test_fuzzman_init():
     f = FuzzManager(args=[])
     assert f
+
+
+def test_extract_build_cmplog_options():
+    assert FuzzManager.extract_build_cmplog_options("") is None
+    assert FuzzManager.extract_build_cmplog_options("cmplog=./app_cmplog") == [
+        "./app_cmplog",
+        0.3,
+    ]
+    assert FuzzManager.extract_build_cmplog_options(
+        "cmplog=./app_cmplog,cmplog-ratio=0.5"
+    ) == ["./app_cmplog", 0.5]
+
+    for options in ("cmplog-ratio=0.5", "cmplog=x,cmplog-ratio=2", "unknown=1"):
+        with pytest.raises(SystemExit):
+            FuzzManager.extract_build_cmplog_options(options)
+
+
+def test_assign_cmplog_workers():
+    f = FuzzManager(args=[])
+    f.build_cmplog[("plain", "./app")] = ["./app_cmplog", 0.5]
+    f.build_cmplog[("single", "./app2")] = ["./app2_cmplog", 0.3]
+    used_builds = [["plain", "./app"]] * 4 + [["asan", "./app_asan"]] * 2
+    used_builds += [["single", "./app2"]]
+    f.assign_cmplog_workers(used_builds)
+    assert f.cmplog_workers == {
+        1: "./app_cmplog",
+        3: "./app_cmplog",
+        6: "./app2_cmplog",
+    }
+
+    # main workers of sync groups are skipped while there are secondary ones
+    f = FuzzManager(args=[])
+    f.sync_dirs = ["out/group1", "out/group2"]
+    f.build_cmplog[("plain", "./app")] = ["./app_cmplog", 1.0]
+    f.assign_cmplog_workers([["plain", "./app"]] * 4)
+    assert sorted(f.cmplog_workers) == [2, 3]
+
+    # job of one worker still gets its cmplog companion
+    f = FuzzManager(args=[])
+    f.build_cmplog[("plain", "./app")] = ["./app_cmplog", 0.3]
+    f.assign_cmplog_workers([["plain", "./app"]])
+    assert f.cmplog_workers == {0: "./app_cmplog"}
+
+
+def test_get_cmplog_find_rates():
+    f = FuzzManager(args=[])
+
+    def worker(name, cmd, build, found, run_time):
+        instance = SimpleNamespace(name=name, cmd=cmd)
+        f.worker_builds[name] = build
+        return [instance, {}, {"paths_found": found, "run_time": run_time}]
+
+    plain = "afl-fuzz -S %s -- ./app @@"
+    cmplog = "afl-fuzz -S %s -c ./app_cmplog -- ./app @@"
+    job_stats = {
+        "workers": [
+            worker("s1", plain % "s1", ["plain", "./app"], 10, 3600),
+            worker("s2", cmplog % "s2", ["plain", "./app"], 30, 3600),
+            worker("s3", plain % "s3", ["plain", "./app"], 20, 3600),
+            worker("s4", plain % "s4", ["asan", "./app_asan"], 100, 3600),
+        ]
+    }
+    assert f.get_cmplog_find_rates(job_stats) == [[1, 30, 1.0], [2, 30, 2.0]]
+
+    job_stats["workers"] = job_stats["workers"][:1]
+    assert f.get_cmplog_find_rates(job_stats) is None
@@ -0,0 +1,49 @@
+from typing import List, Optional
+
+import pytest
+
+from fuzzaide.tools.fuzzman.bench import (
+    get_instance_counts,
+    get_execs_per_sec,
+    recommend_instance_count,
+)
+
+counts_testdata = [
+    (1, 1, [1]),
+    (2, 1, [1, 2]),
+    (8, 1, [1, 2, 4, 8]),
+    (12, 1, [1, 2, 4, 8, 12]),
+    (16, 3, [3, 4, 8, 16]),
+    (2, 3, [3]),
+]
+
+
+@pytest.mark.parametrize("max_instances, min_instances, expected", counts_testdata)
+def test_get_instance_counts(
+    max_instances: int, min_instances: int, expected: List[int]
+) -> None:
+    assert get_instance_counts(max_instances, min_instances) == expected
+
+
+def test_get_execs_per_sec() -> None:
+    assert get_execs_per_sec({"execs_per_sec": "100.5"}) == 100.5
+    assert get_execs_per_sec({"execs_ps_last_min": "80", "execs_per_sec": "50"}) == 80
+    assert get_execs_per_sec({"execs_ps_last_min": "0", "execs_per_sec": "50"}) == 50
+    assert get_execs_per_sec({"execs_per_sec": "oops"}) is None
+    assert get_execs_per_sec({}) is None
+
+
+recommend_testdata = [
+    ([], None),
+    ([[1, 1000.0]], 1),
+    ([[1, 1000.0], [2, 2000.0], [4, 4000.0]], 4),
+    ([[1, 1000.0], [2, 1900.0], [4, 3000.0], [8, 3500.0]], 4),
+    ([[1, 1000.0], [2, 1200.0], [4, 4000.0]], 1),
+]
+
+
+@pytest.mark.parametrize("results, expected", recommend_testdata)
+def test_recommend_instance_count(
+    results: List[List[float]], expected: Optional[int]
+) -> None:
+    assert recommend_instance_count(results, 0.5) == expected
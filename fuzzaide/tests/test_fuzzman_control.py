@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from fuzzaide.common.exception import FuzzaideException
+from fuzzaide.tools.fuzzman.control import (
+    ControlServer,
+    handle_request,
+    send_request,
+)
+
+
+class StubFuzzManager:
+    def __init__(self):
+        self.headless = False
+        self.added = []
+
+    def add_workers(self, build, count):
+        if build == "missing":
+            raise FuzzaideException("no build '%s' in this job" % (build,))
+        self.added.append([build, count])
+        return ["s%d" % (i + 10) for i in range(count)]
+
+    def get_job_totals(self):
+        return {"execs": 1000}
+
+
+def test_handle_request_errors() -> None:
+    fuzzman = StubFuzzManager()
+    assert handle_request(fuzzman, b"not json")["ok"] is False
+    assert handle_request(fuzzman, b"[1, 2]")["ok"] is False
+    assert handle_request(fuzzman, b'{"cmd": "nope"}')["ok"] is False
+    assert handle_request(fuzzman, b'{"cmd": "add", "count": 0}')["ok"] is False
+    assert handle_request(fuzzman, b'{"cmd": "add", "count": "x"}')["ok"] is False
+    assert handle_request(fuzzman, b'{"cmd": "add", "count": 100000}')["ok"] is False
+    assert handle_request(fuzzman, b'{"cmd": "add", "build": 5}')["ok"] is False
+    assert handle_request(fuzzman, b'{"cmd": "swap", "path": 5}')["ok"] is False
+    assert handle_request(fuzzman, b'{"cmd": "restart"}')["ok"] is False
+    assert handle_request(fuzzman, b'{"cmd": "headless", "enabled": 1}')["ok"] is False
+
+    # unexpected errors of fuzzman are reported instead of killing control thread
+    response = handle_request(fuzzman, b'{"cmd": "list"}')
+    assert response["ok"] is False and "get_workers_info" in response["error"]
+
+    response = handle_request(fuzzman, b'{"cmd": "add", "build": "missing"}')
+    assert response == {"ok": False, "error": "no build 'missing' in this job"}
+    assert fuzzman.added == []
+
+
+def test_handle_request_commands() -> None:
+    fuzzman = StubFuzzManager()
+    response = handle_request(fuzzman, b'{"cmd": "add", "count": 2, "build": "asan"}')
+    assert response == {"ok": True, "added": ["s10", "s11"]}
+    assert fuzzman.added == [["asan", 2]]
+
+    assert handle_request(fuzzman, b'{"cmd": "headless"}')["headless"] is True
+    assert handle_request(fuzzman, b'{"cmd": "headless"}')["headless"] is False
+    response = handle_request(fuzzman, b'{"cmd": "headless", "enabled": true}')
+    assert response["headless"] is True
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires UNIX sockets")
+def test_control_server_roundtrip(tmp_path) -> None:
+    path = str(tmp_path / "fuzzman.sock")
+    server = ControlServer(path, StubFuzzManager())
+    try:
+        assert send_request(path, {"cmd": "stats"}) == {
+            "ok": True,
+            "stats": {"execs": 1000},
+        }
+        assert send_request(path, {"cmd": "swap", "path": 5})["ok"] is False
+        assert send_request(path, {"cmd": "stats"})["ok"] is True  # still served
+        with pytest.raises(FuzzaideException):
+            ControlServer(path, StubFuzzManager())  # socket is busy
+    finally:
+        server.stop()
+        server.join()
+
+    assert not os.path.exists(path)
+    with pytest.raises(FuzzaideException):
+        send_request(path, {"cmd": "stats"})
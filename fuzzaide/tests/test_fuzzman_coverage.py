@@ -0,0 +1,114 @@
+import os
+import sys
+from types import SimpleNamespace
+
+from fuzzaide.tests.helpers import write_file
+from fuzzaide.tools.fuzzman.coverage import (
+    CoverageMonitor,
+    ShowmapRunner,
+    bitmap_to_edges,
+    edges_to_bitmap,
+)
+
+# pretends each byte of input is an edge
+FAKE_SHOWMAP = """#!%s
+import os, sys
+args = sys.argv[1:]
+in_dir, out_dir = args[args.index("-i") + 1], args[args.index("-o") + 1]
+os.makedirs(out_dir)
+for name in os.listdir(in_dir):
+    with open(os.path.join(in_dir, name), "rb") as f:
+        data = f.read()
+    with open(os.path.join(out_dir, name), "w") as f:
+        f.write("".join("%%06d:1\\n" %% b for b in set(data)))
+"""
+
+
+def test_bitmap_roundtrip() -> None:
+    edges = {0, 7, 8, 65535, 100000}
+    assert bitmap_to_edges(edges_to_bitmap(edges)) == edges
+    assert edges_to_bitmap(set()) == b""
+
+
+def test_coverage_monitor_incremental(tmp_path) -> None:
+    showmap = str(tmp_path / "afl-showmap")
+    with open(showmap, "w") as f:
+        f.write(FAKE_SHOWMAP % (sys.executable,))
+    os.chmod(showmap, 0o755)
+
+    output_dir = str(tmp_path / "out")
+    procs = [SimpleNamespace(name=n, sync_dir=None) for n in ("m1", "s2")]
+    fuzzman = SimpleNamespace(procs=procs, args=SimpleNamespace(output_dir=output_dir))
+    coverage_dir = os.path.join(output_dir, "fuzzman_coverage")
+
+    def create_monitor():
+        runner = ShowmapRunner(showmap, ["./app", "@@"])
+        monitor = CoverageMonitor(fuzzman, runner, coverage_dir, 3600, 2)
+        monitor.stop()
+        monitor.join()
+        monitor.measure_once()
+        return monitor
+
+    write_file(os.path.join(output_dir, "m1", "queue", "id:000000"), b"\x01\x02")
+    write_file(os.path.join(output_dir, "s2", "queue", "id:000000"), b"\x01\x02")
+    monitor = create_monitor()
+    assert monitor.summary == {"edges": 2}
+    assert monitor.num_measured == 2
+
+    write_file(os.path.join(output_dir, "s2", "queue", "id:000001"), b"\x03")
+    monitor.measure_once()
+    assert monitor.summary == {"edges": 3}
+    assert monitor.format_summary() == (
+        "3 edges (+1 since previous pass), 3 queue entries measured"
+    )
+
+    # nothing is measured again after restart, merged coverage is loaded from disk
+    monitor = create_monitor()
+    assert monitor.summary == {"edges": 3}
+    assert monitor.num_measured == 3
+
+    with open(os.path.join(coverage_dir, "history")) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "# unix_time, measured_entries, edges"
+    assert [line.split(", ")[1:] for line in lines[1:]] == [
+        ["2", "2"],
+        ["3", "3"],
+        ["3", "3"],
+    ]
+
+
+def test_coverage_monitor_failed_merge(tmp_path) -> None:
+    output_dir = str(tmp_path / "out")
+    procs = [SimpleNamespace(name="m1", sync_dir=None)]
+    fuzzman = SimpleNamespace(procs=procs, args=SimpleNamespace(output_dir=output_dir))
+    coverage_dir = os.path.join(output_dir, "fuzzman_coverage")
+    queue_dir = os.path.join(output_dir, "m1", "queue")
+
+    class FlakyRunner(ShowmapRunner):
+        fail = True
+
+        def run_chunk(self, paths):
+            return set(range(len(paths)))
+
+        def merge(self, results, coverage_dir):
+            return not self.fail and super().merge(results, coverage_dir)
+
+    def create_monitor():
+        monitor = CoverageMonitor(fuzzman, FlakyRunner("", []), coverage_dir, 3600, 1)
+        monitor.stop()
+        monitor.join()
+        return monitor
+
+    write_file(os.path.join(queue_dir, "id:000000"), b"a")
+    monitor = create_monitor()
+    monitor.measure_once()
+    assert monitor.num_measured == 0  # will be measured again
+
+    monitor.runner.fail = False
+    monitor.measure_once()
+    assert monitor.num_measured == 1
+
+    # same contents as measured entry: skipped after restart too
+    write_file(os.path.join(queue_dir, "id:000001"), b"a")
+    monitor = create_monitor()
+    assert monitor.filter_duplicates([os.path.join(queue_dir, "id:000001")]) == []
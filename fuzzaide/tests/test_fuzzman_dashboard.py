@@ -0,0 +1,141 @@
+import io
+from types import SimpleNamespace
+
+from fuzzaide.tools.fuzzman.dashboard import (
+    DASHBOARD_STATS_SEC,
+    Dashboard,
+    DiffRenderer,
+    format_ago,
+    format_count,
+    parse_keys,
+)
+
+
+class FakeProc:
+    def __init__(self, name):
+        self.name = name
+        self.proc = SimpleNamespace(poll=lambda: None)
+        self.paused = False
+
+
+def make_dashboard(num_workers):
+    procs = [FakeProc("s%d" % i) for i in range(1, num_workers + 1)]
+    job_stats = {
+        "execs": 12345,
+        "execs_per_sec": 1500.0,
+        "paths": 321,
+        "crashes": 2,
+        "hangs": 0,
+        "newest_path_stamp": 990,
+        "workers": [
+            [
+                proc,
+                {"execs_per_sec": "150.00", "stability": "99.50%"},
+                {
+                    "paths_total": 30,
+                    "paths_found": 7,
+                    "crashes": 0,
+                    "hangs": 0,
+                    "last_path": 900,
+                },
+            ]
+            for proc in procs
+        ],
+    }
+    fuzzman = SimpleNamespace(
+        procs=procs,
+        args=SimpleNamespace(output_dir="out"),
+        start_time=0,
+        is_process_still_running=lambda proc: proc.poll() is None,
+        collect_job_stats=lambda quiet: job_stats,
+    )
+    dashboard = Dashboard(fuzzman, outfile=io.BytesIO(), infile=io.BytesIO())
+    dashboard.update_stats(1000.0)
+    return dashboard
+
+
+def test_formatting() -> None:
+    assert format_count(999) == "999"
+    assert format_count(12345) == "12.3K"
+    assert format_count(2500000) == "2.50M"
+    assert format_ago(None) == "never"
+    assert format_ago(59) == "59s"
+    assert format_ago(192) == "3m 12s"
+    assert format_ago(90000) == "1d 1h"
+
+
+def test_parse_keys() -> None:
+    assert parse_keys(b"jk\x1b[B\x1b[6~\r\x1bz") == [
+        "down",
+        "up",
+        "down",
+        "pgdn",
+        "open",
+        "back",
+    ]
+
+
+def test_diff_renderer_sends_changed_cells_only() -> None:
+    out = io.BytesIO()
+    renderer = DiffRenderer(out)
+    first = renderer.render(["exec/s: 100.0", "corpus: 30"], 40)
+    assert first > 80
+
+    out.seek(0)
+    out.truncate()
+    assert renderer.render(["exec/s: 100.0", "corpus: 30"], 40) == 0
+    assert renderer.render(["exec/s: 120.0", "corpus: 30"], 40) > 0
+    assert out.getvalue() == b"\x1b[1;10H2"
+
+    out.seek(0)
+    out.truncate()
+    renderer.render(["exec/s: 120.0"], 40)
+    assert out.getvalue() == b"\x1b[2;1H\x1b[K"
+
+
+def test_dashboard_frame_fits_screen() -> None:
+    dashboard = make_dashboard(500)
+    frame = dashboard.build_frame(100, 30, 1000.0)
+    assert len(frame) == 29
+    assert "exec/s: 1500.0" in frame[1]
+    assert "last find: 10s" in frame[1]
+    assert frame[4].startswith(">   1 s1")
+    assert "99.50%" in frame[4] and "1m 40s" in frame[4]
+
+    # scrolling keeps selected worker on screen
+    rows_per_page = dashboard.rows_per_page
+    for _ in range(3):
+        dashboard.handle_key("pgdn", rows_per_page)
+    frame = dashboard.build_frame(100, 30, 1000.0)
+    selected = [line for line in frame if line.startswith(">")]
+    assert len(selected) == 1
+    assert selected[0].startswith(">%4d " % (3 * rows_per_page + 1,))
+
+    dashboard.handle_key("open", rows_per_page)
+    assert dashboard.opened is dashboard.fuzzman.procs[3 * rows_per_page]
+    dashboard.handle_key("next", rows_per_page)
+    assert dashboard.opened is dashboard.fuzzman.procs[3 * rows_per_page + 1]
+    dashboard.handle_key("back", rows_per_page)
+    assert dashboard.opened is None
+
+
+def test_dashboard_frame_polls_visible_rows_only() -> None:
+    dashboard = make_dashboard(500)
+    fuzzman = dashboard.fuzzman
+    fuzzman.procs[0].proc.poll = lambda: 1  # dead
+    polled = []
+
+    def is_process_still_running(proc):
+        polled.append(proc)
+        return proc.poll() is None
+
+    fuzzman.is_process_still_running = is_process_still_running
+
+    dashboard.update_stats(1000.0 + DASHBOARD_STATS_SEC)
+    assert len(polled) == 500
+    del polled[:]
+
+    frame = dashboard.build_frame(100, 30, 1000.0)
+    assert "499/500 alive" in frame[0]
+    assert " dead " in frame[4]
+    assert len(polled) == dashboard.rows_per_page
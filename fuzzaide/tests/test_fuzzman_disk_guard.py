@@ -0,0 +1,100 @@
+import os
+import tarfile
+from types import SimpleNamespace
+
+from fuzzaide.tests.helpers import write_file
+from fuzzaide.tools.fuzzman import disk_guard
+from fuzzaide.tools.fuzzman.disk_guard import (
+    ARCHIVE_DIR_NAME,
+    DiskGuard,
+    get_cold_hangs,
+)
+
+
+class FakeProc:
+    def __init__(self, name, cmd):
+        self.name = name
+        self.cmd = cmd
+        self.sync_dir = None
+        self.paused = False
+
+    def pause(self, reason="manual"):
+        assert reason == "disk"
+        self.paused = True
+
+    def resume(self, reason=None):
+        self.paused = False
+
+
+def make_guard(out: str, procs: list) -> DiskGuard:
+    fuzzman = SimpleNamespace(procs=procs, args=SimpleNamespace(output_dir=out))
+    guard = DiskGuard(fuzzman, 0, 0, cold_age=3600, interval=3600)
+    guard.stop()
+    guard.join()
+    return guard
+
+
+def test_get_cold_hangs(tmp_path) -> None:
+    worker_dir = str(tmp_path / "s1")
+    write_file(os.path.join(worker_dir, "hangs", "id:000000,src:000001"), b"a", 100)
+    write_file(os.path.join(worker_dir, "hangs", "id:000001,src:000002"), b"b", 5000)
+    write_file(os.path.join(worker_dir, "hangs", "README.txt"), b"c", 100)
+    hangs = get_cold_hangs(worker_dir, 1000)
+    assert hangs == [os.path.join(worker_dir, "hangs", "id:000000,src:000001")]
+    assert get_cold_hangs(str(tmp_path / "missing"), 1000) == []
+
+
+def test_disk_guard_compact(tmp_path) -> None:
+    out = str(tmp_path / "out")
+    data = b"A" * 65536
+    write_file(os.path.join(out, "m1", "queue", "id:000000,orig:1"), data, 0)
+    write_file(os.path.join(out, "m1", "hangs", "id:000000,src:000000"), data, 0)
+    write_file(os.path.join(out, "s2", "queue", "id:000000,orig:1"), data, 0)
+    write_file(os.path.join(out, "s2", ".state", "auto_extras", "x"), b"x", 0)
+
+    guard = make_guard(out, [FakeProc("m1", "afl-fuzz -M m1 -- ./app")])
+    assert guard.compact(now=10000) > 0
+
+    # hangs of running worker and queue of stopped worker went to archives
+    assert os.listdir(os.path.join(out, "m1", "hangs")) == []
+    assert os.path.isdir(os.path.join(out, "m1", "queue"))
+    assert not os.path.exists(os.path.join(out, "s2", "queue"))
+    assert not os.path.exists(os.path.join(out, "s2", ".state"))
+    assert guard.num_compacted == 2
+
+    archives = os.listdir(os.path.join(out, "s2", ARCHIVE_DIR_NAME))
+    assert len(archives) == 1 and archives[0].startswith("queue-")
+    with tarfile.open(os.path.join(out, "s2", ARCHIVE_DIR_NAME, archives[0])) as tar:
+        names = tar.getnames()
+    assert "queue/id:000000,orig:1" in names
+    assert ".state/auto_extras/x" in names
+
+    assert guard.compact(now=10000) == 0  # nothing cold is left
+    assert "compacted 2 files" in guard.format_summary()
+
+
+def test_disk_guard_pause(tmp_path, monkeypatch) -> None:
+    procs = [
+        FakeProc("m1", "afl-fuzz -M m1 -- ./app"),
+        FakeProc("s2", "afl-fuzz -S s2 -- ./app"),
+        FakeProc("s3", "afl-fuzz -S s3 -- ./app"),
+    ]
+    guard = make_guard(str(tmp_path), procs)
+    guard.min_free = 1000
+
+    free = [500]
+    monkeypatch.setattr(disk_guard, "get_free_space", lambda path: free[0])
+
+    guard.check(100.0)
+    assert guard.space_low
+    assert [p.paused for p in procs] == [False, True, True]
+
+    free[0] = 1200  # not enough above threshold yet
+    procs[1].resume()
+    guard.check(110.0)
+    assert [p.paused for p in procs] == [False, True, True]
+
+    free[0] = 2000
+    guard.check(130.0)
+    assert not guard.space_low
+    assert [p.paused for p in procs] == [False, False, False]
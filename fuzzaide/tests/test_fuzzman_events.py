@@ -0,0 +1,61 @@
+import json
+
+from fuzzaide.tools.fuzzman.events import EventLog, get_stats_snapshot, read_events
+
+
+def make_log(path, **kwargs) -> EventLog:
+    return EventLog(str(path), flush_interval=3600, **kwargs)
+
+
+def close_log(event_log: EventLog) -> None:
+    event_log.stop()
+    event_log.join()
+
+
+def test_event_log_is_buffered(tmp_path) -> None:
+    path = tmp_path / "events.ndjson"
+    event_log = make_log(path)
+    event_log.log("worker_exit", worker="s2", exit_code=-11)
+    event_log.log("stop_check", stop=False)
+    assert not path.exists()  # nothing written before flush
+
+    close_log(event_log)
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [e["event"] for e in events] == ["worker_exit", "stop_check"]
+    assert events[0]["worker"] == "s2" and events[0]["exit_code"] == -11
+    assert 0 <= events[0]["mono"] <= events[1]["mono"]
+    assert list(events[0])[:3] == ["event", "time", "mono"]
+
+
+def test_event_log_rotation(tmp_path) -> None:
+    path = tmp_path / "events.ndjson"
+    event_log = make_log(path, max_size=1000, backups=2)
+    for i in range(100):
+        event_log.log("new_crashes", worker="s1", total=i)
+        if i % 10 == 9:
+            event_log.flush()
+    close_log(event_log)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "events.ndjson",
+        "events.ndjson.1",
+        "events.ndjson.2",
+    ]
+    assert all(p.stat().st_size <= 1000 for p in tmp_path.iterdir())
+
+    events = read_events(str(path))
+    totals = [e["total"] for e in events]
+    assert totals == sorted(totals) and totals[-1] == 99  # oldest events dropped
+    assert totals[0] > 0
+
+
+def test_read_events_skips_broken_lines(tmp_path) -> None:
+    path = tmp_path / "events.ndjson"
+    path.write_text('{"event": "job_start"}\n{"event": "wor')
+    assert read_events(str(path)) == [{"event": "job_start"}]
+
+
+def test_get_stats_snapshot() -> None:
+    stats = {"execs_done": "100", "stability": "99.00%", "command_line": "afl-fuzz"}
+    assert get_stats_snapshot(stats) == {"execs_done": "100", "stability": "99.00%"}
+    assert get_stats_snapshot(None) is None
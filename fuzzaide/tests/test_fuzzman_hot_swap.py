@@ -0,0 +1,110 @@
+import os
+from time import sleep, time
+from types import SimpleNamespace
+
+import pytest
+
+from fuzzaide.tools.fuzzman.hot_swap import RollingSwap
+from fuzzaide.tools.fuzzman.running_process import replace_cmd_target
+
+
+def test_replace_cmd_target() -> None:
+    cmd = "afl-fuzz -i in -o out -S s1 -- ./app -f @@"
+    assert (
+        replace_cmd_target(cmd, "/tmp/app v2")
+        == "afl-fuzz -i in -o out -S s1 -- '/tmp/app v2' -f @@"
+    )
+
+    with pytest.raises(ValueError):
+        replace_cmd_target("afl-fuzz -i in -o out ./app", "./app2")
+
+
+class StubWorker:
+    def __init__(self, name, output_dir, log, calibrate=True):
+        self.name = name
+        self.sync_dir = None
+        self.cmd = "afl-fuzz -o %s -S %s -- ./app" % (output_dir, name)
+        self.proc = SimpleNamespace(pid=100, poll=lambda: None)
+        self.output_dir = output_dir
+        self.log = log
+        self.calibrate_on_restart = calibrate
+
+    def write_stats(self, pid):
+        os.makedirs(os.path.join(self.output_dir, self.name), exist_ok=True)
+        with open(os.path.join(self.output_dir, self.name, "fuzzer_stats"), "w") as f:
+            f.write("fuzzer_pid        : %d\nexecs_done        : 0\n" % (pid,))
+
+    def restart(self, cmd=None):
+        self.log.append([self.name, cmd])
+        self.write_stats(self.proc.pid)  # old fuzzer saves its stats on exit
+        self.proc = SimpleNamespace(pid=self.proc.pid + 1, poll=lambda: None)
+        if self.calibrate_on_restart:
+            self.write_stats(self.proc.pid)
+
+    def calibrate(self):
+        self.write_stats(self.proc.pid)
+
+
+def make_stub_fuzzman(output_dir, workers):
+    return SimpleNamespace(
+        args=SimpleNamespace(output_dir=output_dir),
+        restart_proc=lambda proc, cmd=None, reason=None: proc.restart(cmd),
+        procs=workers,
+    )
+
+
+def test_rolling_swap_batches(tmp_path) -> None:
+    log = []
+    output_dir = str(tmp_path)
+    workers = [StubWorker("s%d" % i, output_dir, log) for i in range(1, 4)]
+    fuzzman = make_stub_fuzzman(output_dir, workers[:2])  # s3 was removed
+
+    swap = RollingSwap(fuzzman, workers, "./app2", batch_size=1)
+    swap.join(timeout=30)
+
+    assert not swap.is_alive()
+    assert swap.num_swapped == 2
+    assert log == [
+        ["s1", "afl-fuzz -o %s -S s1 -- ./app2" % (output_dir,)],
+        ["s2", "afl-fuzz -o %s -S s2 -- ./app2" % (output_dir,)],
+    ]
+
+
+def test_rolling_swap_waits_for_new_fuzzer(tmp_path) -> None:
+    log = []
+    output_dir = str(tmp_path)
+    workers = [StubWorker("s%d" % i, output_dir, log, False) for i in (1, 2)]
+    swap = RollingSwap(make_stub_fuzzman(output_dir, workers), workers, None, 1)
+
+    # fuzzer_stats written by stopped fuzzer doesn't mean new one has calibrated
+    sleep(2.5)
+    assert [name for name, _ in log] == ["s1"]
+    assert not swap.is_calibrated(workers[0], None)
+
+    workers[0].calibrate()
+    deadline = time() + 10
+    while len(log) < 2 and time() < deadline:
+        sleep(0.1)
+    assert [name for name, _ in log] == ["s1", "s2"]
+
+    workers[1].calibrate()
+    swap.join(timeout=10)
+    assert not swap.is_alive()
+    assert swap.num_swapped == 2
+
+
+def test_is_calibrated_by_mtime(tmp_path) -> None:
+    worker = StubWorker("s1", str(tmp_path), [])
+    swap = RollingSwap.__new__(RollingSwap)  # don't start the thread
+    swap.fuzzman = make_stub_fuzzman(str(tmp_path), [worker])
+
+    path = os.path.join(str(tmp_path), "s1", "fuzzer_stats")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+        f.write("execs_done : 0\n")  # stats without fuzzer_pid
+    mtime_ns = swap.get_stats_state(worker)[0]
+    assert swap.get_stats_state(worker) == [mtime_ns, None]
+    assert not swap.is_calibrated(worker, mtime_ns)
+
+    os.utime(path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    assert swap.is_calibrated(worker, mtime_ns)
@@ -0,0 +1,139 @@
+import os
+
+import pytest
+
+from fuzzaide.tools.fuzzman.multi import (
+    FairShareScheduler,
+    allocate_slots,
+    load_targets,
+)
+from fuzzaide.tools.fuzzman.running_process import get_process_tree
+
+
+@pytest.mark.parametrize(
+    "scores,capacities,cores,served,expected",
+    [
+        ([1.0, 1.0], [8, 8], 8, None, [4, 4]),
+        ([3.0, 1.0], [8, 8], 8, None, [6, 2]),
+        ([3.0, 1.0], [2, 8], 8, None, [2, 6]),  # capped target gives its share away
+        ([1.0, 1.0, 1.0], [4, 4, 4], 2, None, [1, 1, 0]),  # fewer cores than targets
+        ([1.0, 1.0, 1.0], [4, 4, 4], 2, [20, 20, 0], [1, 0, 1]),  # targets take turns
+        ([1.0, 5.0, 1.0], [4, 4, 4], 1, [0, 10, 0], [1, 0, 0]),
+        ([1.0, 10.0], [4, 4], 3, None, [1, 2]),  # everyone gets at least one slot
+        ([1.0, 1.0], [1, 0], 4, None, [1, 0]),  # all instances are running
+    ],
+)
+def test_allocate_slots(scores, capacities, cores, served, expected) -> None:
+    assert allocate_slots(scores, capacities, cores, served) == expected
+
+
+def test_load_targets(tmp_path) -> None:
+    path = str(tmp_path / "jobs.txt")
+    with open(path, "w") as f:
+        f.write("# comment\n\n")
+        f.write("png : --weight 2 -n 4 -o out_png -- ./png @@\n")
+        f.write("jpg: -o out_jpg ./jpg -f @@\n")
+
+    png, jpg = load_targets(path, 16)
+    assert [png.name, png.weight, png.args.instances] == ["png", 2.0, 4]
+    assert [jpg.name, jpg.weight, jpg.args.instances] == ["jpg", 1.0, 16]
+    assert jpg.args.program == ["./jpg", "-f", "@@"]
+    assert png.args.headless
+
+    with open(path, "w") as f:
+        f.write("a : -o out -- ./a\nb : -o out/ -- ./b\n")
+    with pytest.raises(SystemExit):
+        load_targets(path, 16)  # shared output dir
+
+
+class StubProc:
+    def __init__(self, name):
+        self.name = name
+        self.pause_reasons = set()
+
+    @property
+    def paused(self):
+        return len(self.pause_reasons) > 0
+
+    def pause(self, reason="manual"):
+        self.pause_reasons.add(reason)
+
+    def resume(self, reason=None):
+        self.pause_reasons.discard(reason)
+
+
+class StubFuzzManager:
+    def __init__(self, args):
+        self.args = args
+        self.builds = [[None, args.program[0]]]
+        self.worker_builds = dict()
+        self.procs = []
+
+    def start(self):
+        self.add_workers(None, self.args.instances)
+
+    def add_workers(self, build, count):
+        for _ in range(count):
+            name = "w%d" % (len(self.procs),)
+            self.procs.append(StubProc(name))
+            self.worker_builds[name] = self.builds[0]
+
+
+def test_scheduler_starts_shares_only(tmp_path) -> None:
+    path = str(tmp_path / "jobs.txt")
+    with open(path, "w") as f:
+        f.write("a : --weight 3 -n 8 -o out_a -- ./a\n")
+        f.write("b : -n 8 -o out_b -- ./b\n")
+        f.write("c : -n 8 -o out_c -- ./c\n")
+
+    a, b, c = load_targets(path, 8)
+    scheduler = FairShareScheduler([a, b, c], 2, StubFuzzManager)
+    scheduler.reschedule()
+    # targets are started with their shares, not with their full -n
+    assert [len(a.fuzzman.procs), len(b.fuzzman.procs), c.fuzzman] == [1, 1, None]
+    assert a.fuzzman.args.instances == 1
+
+    scheduler.cores = 8
+    scheduler.reschedule()
+    assert [a.slots, b.slots, c.slots] == [4, 2, 2]
+    assert [len(t.fuzzman.procs) for t in (a, b, c)] == [4, 2, 2]
+
+    scheduler.cores = 2
+    scheduler.reschedule()
+    assert [len(t.fuzzman.procs) for t in (a, b, c)] == [4, 2, 2]  # paused only
+    running = [sum(1 for p in t.fuzzman.procs if not p.paused) for t in (a, b, c)]
+    assert sum(running) == 2
+
+
+def test_scheduler_rotates_targets(tmp_path) -> None:
+    path = str(tmp_path / "jobs.txt")
+    with open(path, "w") as f:
+        for name in "abcde":
+            f.write("%s : -n 2 -o out_%s -- ./%s\n" % (name, name, name))
+
+    targets = load_targets(path, 2)
+    scheduler = FairShareScheduler(targets, 2, StubFuzzManager)
+    ran = set()
+    for _ in range(3):  # 5 targets on 2 cores, each should run within 3 slices
+        scheduler.reschedule()
+        scheduler.account_run_time(60)
+        ran.update(t.name for t in targets if t.slots > 0)
+    assert ran == set("abcde")
+
+    # scheduler pauses for its own reason and leaves other reasons to their owners
+    paused = [t for t in targets if t.fuzzman is not None and t.slots == 0]
+    assert len(paused) > 0
+    for t in paused:
+        assert all(p.pause_reasons == {"slicing"} for p in t.fuzzman.procs)
+    running = [t for t in targets if t.slots > 0]
+    held = running[0].fuzzman.procs[0]
+    held.pause("throttle")
+    scheduler.reschedule()
+    assert "throttle" in held.pause_reasons
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="requires /proc")
+def test_get_process_tree() -> None:
+    tree = get_process_tree(os.getppid())
+    assert tree[0] == os.getppid()
+    assert os.getpid() in tree
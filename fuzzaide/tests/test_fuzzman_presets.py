@@ -0,0 +1,78 @@
+import pytest
+
+from fuzzaide.tools.fuzzman.presets import (
+    BUILTIN_PRESETS,
+    PresetPlan,
+    get_preset,
+    get_worker_role,
+    load_preset_file,
+    parse_ram_size,
+)
+
+
+def test_parse_ram_size() -> None:
+    assert parse_ram_size("512") == 512
+    assert parse_ram_size("512M") == 512
+    assert parse_ram_size("1.5g") == 1536
+    assert parse_ram_size("2GB") == 2048
+    with pytest.raises(ValueError):
+        parse_ram_size("lots")
+
+
+def test_get_worker_role() -> None:
+    cmd = "afl-fuzz -i in -o out -M m1 -- ./app @@"
+    assert get_worker_role(cmd) == "main"
+    cmd = "afl-fuzz -i in -o out -S s2 -c ./app_cmplog -- ./app @@"
+    assert get_worker_role(cmd) == "cmplog"
+    cmd = "afl-fuzz -i in -o out -S s3 -- ./app_asan -c @@"
+    assert get_worker_role(cmd, None, "./app_asan") == "sanitizer"
+    assert get_worker_role(cmd, "UBSan", "./app") == "sanitizer"
+    assert get_worker_role(cmd, "plain", "./app") == "secondary"
+
+
+def test_load_preset_file(tmp_path) -> None:
+    path = tmp_path / "presets.ini"
+    path.write_text(
+        "[mine]\n"
+        "inherit = balanced\n"
+        "pin = yes\n"
+        "AFL_FAST_CAL = 1\n"
+        "[mine:secondary]\n"
+        "AFL_TESTCACHE_SIZE = 300\n"
+    )
+    presets = load_preset_file(str(path))
+    mine = presets["mine"]
+    assert mine["pin"] is True
+    assert mine["all"] == {"AFL_CMPLOG_ONLY_NEW": "1", "AFL_FAST_CAL": "1"}
+    assert mine["secondary"] == {"AFL_TESTCACHE_SIZE": "300"}
+    assert mine["main"] == BUILTIN_PRESETS["balanced"]["main"]
+
+    assert get_preset("mine", str(path)) is not None
+    with pytest.raises(ValueError):
+        get_preset("other", str(path))
+
+    path.write_text("[bad:tester]\nX = 1\n")
+    with pytest.raises(ValueError):
+        load_preset_file(str(path))
+
+    path.write_text("[a]\ninherit = b\n[b]\ninherit = a\n")
+    with pytest.raises(ValueError):
+        load_preset_file(str(path))
+
+
+def test_preset_plan_ram_budget() -> None:
+    preset = BUILTIN_PRESETS["fast"]
+    counts = {"main": 1, "secondary": 3, "sanitizer": 1}
+
+    plan = PresetPlan("fast", preset, counts)
+    assert plan.cache_total == 500 + 3 * 200 + 50
+    assert plan.get_env("main")["AFL_IMPORT_FIRST"] == "1"
+    assert "AFL_IMPORT_FIRST" not in plan.get_env("secondary")
+
+    plan = PresetPlan("fast", preset, counts, ram_budget=575)
+    assert plan.cache_total <= 575
+    assert plan.get_env("main")["AFL_TESTCACHE_SIZE"] == "250"
+    assert plan.get_env("secondary")["AFL_TESTCACHE_SIZE"] == "100"
+
+    with pytest.raises(ValueError):
+        PresetPlan("fast", preset, counts, ram_budget=5)
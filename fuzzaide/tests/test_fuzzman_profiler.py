@@ -0,0 +1,63 @@
+import os
+import time
+import pstats
+
+from fuzzaide.tools.fuzzman.profiler import Profiler, get_rss, profiled
+
+
+class Monitor:
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    @profiled("check")
+    def check(self, value):
+        return value * 2
+
+
+def test_profiled_records_spans() -> None:
+    assert Monitor(None).check(2) == 4
+
+    profiler = Profiler()
+    monitor = Monitor(profiler)
+    for i in range(3):
+        assert monitor.check(i) == i * 2
+    profiler.add("output_drain", 0.5, 0.25)
+
+    calls, wall, cpu, max_wall = profiler.spans["check"]
+    assert calls == 3
+    assert 0 <= max_wall <= wall
+    assert cpu >= 0
+
+    report = profiler.format_report()
+    assert report[1].split()[:2] == ["phase", "calls"]
+    assert report[2].split()[:4] == ["output_drain", "1", "0.500", "0.250"]
+
+
+def test_profiler_without_thread_cpu_time(monkeypatch) -> None:
+    monkeypatch.delattr(time, "thread_time")  # python 3.6
+    profiler = Profiler()
+    Monitor(profiler).check(1)
+    profiler.add("output_drain", 0.5, None)
+
+    assert profiler.spans["check"][2] is None
+    report = profiler.format_report()
+    assert report[2].split()[:4] == ["output_drain", "1", "0.500", "n/a"]
+
+
+def test_get_rss(tmp_path) -> None:
+    statm = tmp_path / "statm"
+    statm.write_text("1000 250 100 1 0 200 0\n")
+    assert get_rss(str(statm)) == 250 * os.sysconf("SC_PAGE_SIZE")
+    assert get_rss(str(tmp_path / "missing")) > 0  # peak RSS from getrusage
+
+
+def test_profiler_usage_and_cprofile_dump(tmp_path) -> None:
+    path = str(tmp_path / "fuzzman.prof")
+    profiler = Profiler(path)
+    sum(range(10000))
+    cpu_share, rss = profiler.get_usage()
+    assert cpu_share >= 0 and rss > 0
+    assert profiler.last_usage == [cpu_share, rss]
+
+    profiler.stop()
+    assert pstats.Stats(path).total_calls > 0
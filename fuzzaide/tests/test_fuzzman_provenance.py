@@ -0,0 +1,69 @@
+import os
+import hashlib
+
+from fuzzaide.tests.helpers import write_file
+from fuzzaide.tools.fuzzman.provenance import (
+    ProvenanceIndex,
+    find_worker_dirs,
+    index_new_entries,
+)
+
+
+def test_provenance_index(tmp_path) -> None:
+    out = str(tmp_path / "out")
+    m = os.path.join(out, "m")
+    s1 = os.path.join(out, "s1")
+    m_queue = os.path.join(m, "queue")
+    s1_queue = os.path.join(s1, "queue")
+    write_file(os.path.join(m_queue, "id:000000,time:0,orig:seed"), b"seed")
+    write_file(
+        os.path.join(m_queue, "id:000001,src:000000,time:10,op:havoc,rep:2,+cov"), b"a"
+    )
+    write_file(
+        os.path.join(m_queue, "id:000002,src:000001,time:20,op:flip1,pos:0"), b"ab"
+    )
+    write_file(os.path.join(s1_queue, "id:000000,time:0,orig:seed"), b"seed")
+    write_file(os.path.join(s1_queue, "id:000001,sync:m,src:000002"), b"ab")
+    crash = "id:000000,sig:11,src:000001+000000,time:30,op:splice,rep:4"
+    write_file(os.path.join(s1, "crashes", crash), b"x")
+    os.makedirs(os.path.join(out, "fuzzman_relay", "queue"))
+
+    assert find_worker_dirs(out) == [["m", m], ["s1", s1]]
+
+    index = ProvenanceIndex(os.path.join(out, "provenance.sqlite3"))
+    watchers = dict()
+    assert index_new_entries(index, watchers, find_worker_dirs(out)) == 6
+    assert index_new_entries(index, watchers, find_worker_dirs(out)) == 0
+
+    write_file(
+        os.path.join(m_queue, "id:000003,src:000002,time:40,op:havoc,rep:8"), b"abc"
+    )
+    assert index_new_entries(index, watchers, find_worker_dirs(out)) == 1
+
+    # new watchers skip what is already indexed
+    assert index_new_entries(index, dict(), find_worker_dirs(out)) == 0
+
+    ops = {row["op"]: row for row in index.get_operator_yield()}
+    assert ops["havoc"]["paths"] == 2
+    assert ops["havoc"]["new_cov"] == 1
+    assert ops["splice"]["crashes"] == 1
+    assert ops["(seed)"]["paths"] == 2
+
+    workers = {row["worker"]: row for row in index.get_worker_yield()}
+    assert workers["m"]["paths"] == 3
+    assert workers["s1"]["paths"] == 0
+    assert workers["s1"]["imported"] == 1
+    assert workers["s1"]["crashes"] == 1
+
+    lineage = index.get_lineage("s1", "crashes", 0)
+    assert [(e["worker"], e["kind"], e["id"]) for e in lineage] == [
+        ("s1", "crashes", 0),
+        ("s1", "queue", 1),
+        ("m", "queue", 2),
+        ("m", "queue", 1),
+        ("m", "queue", 0),
+    ]
+    assert lineage[-1]["sha1"] == hashlib.sha1(b"seed").hexdigest()
+    assert lineage[-1]["size"] == 4
+    assert index.get_lineage("s1", "hangs", 0) == []
+    index.close()
@@ -0,0 +1,63 @@
+import pytest
+
+from fuzzaide.tools.fuzzman.job_queue import JobQueue, QueuedJob, remove_option
+from fuzzaide.tools.fuzzman.args import get_queue_args
+
+
+def test_remove_option() -> None:
+    argv = ["--priority", "5", "-n", "4", "--", "./app", "--priority", "1"]
+    assert remove_option(argv, "--priority") == [
+        "-n",
+        "4",
+        "--",
+        "./app",
+        "--priority",
+        "1",
+    ]
+    assert remove_option(argv[2:], "--priority") == argv[2:]
+
+
+def test_queued_job() -> None:
+    job = QueuedJob("png", ["--priority", "3", "-n", "64", "-o", "out", "./png"], 16)
+    # can't use more cores than the queue has, child starts as many as counted
+    assert [job.priority, job.cores] == [3, 16]
+    assert job.argv == ["-n", "16", "-o", "out", "./png"]
+
+    job = QueuedJob("jpg", ["-o", "out", "--", "./jpg", "-n", "@@"], 16)
+    assert [job.priority, job.cores] == [0, 16]
+    assert job.argv == ["-n", "16", "-o", "out", "--", "./jpg", "-n", "@@"]
+
+    job = QueuedJob("bmp", ["--instances=4", "-o", "out", "./bmp"], 16)
+    assert job.cores == 4
+    assert job.argv == ["-n", "4", "-o", "out", "./bmp"]
+
+    # without "--" options of tested program are left to it
+    argv = ["--priority", "1", "-o", "out", "./app", "-n", "5", "-nofork", "@@"]
+    job = QueuedJob("app", argv, 4)
+    assert [job.priority, job.cores] == [1, 4]
+    assert job.argv == ["-n", "4", "-o", "out", "./app", "-n", "5", "-nofork", "@@"]
+
+    argv = ["-o", "out", "./app", "--priority", "2", "--instances=8"]
+    job = QueuedJob("app2", argv, 4)
+    assert job.priority == 0
+    assert job.argv == ["-n", "4"] + argv
+
+    with pytest.raises(SystemExit):
+        QueuedJob("gif", ["./gif"], 16)  # no output dir
+
+
+def test_start_ready_jobs(tmp_path) -> None:
+    args = get_queue_args(["-n", "8", str(tmp_path)])
+    queue = JobQueue(args)
+    queue.start_job = lambda job: queue.running.append(job)
+
+    queue.add(QueuedJob("big", ["-n", "6", "-o", "out_big", "./a"], 8))
+    queue.add(QueuedJob("urgent", ["--priority", "9", "-n", "4", "-o", "o1", "./a"], 8))
+    queue.add(QueuedJob("small", ["-n", "2", "-o", "out_small", "./a"], 8))
+    queue.add(QueuedJob("same_dir", ["-n", "1", "-o", "o1", "./a"], 8))
+    queue.start_ready_jobs()
+
+    # big doesn't fit next to urgent, small goes ahead; same_dir waits for urgent's dir
+    assert [job.name for job in queue.running] == ["urgent", "small"]
+    assert [job.name for job in queue.pending] == ["big", "same_dir"]
+    assert queue.get_free_cores() == 2
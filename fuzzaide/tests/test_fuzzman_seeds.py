@@ -0,0 +1,65 @@
+import os
+from types import SimpleNamespace
+
+from fuzzaide.tests.helpers import write_file
+from fuzzaide.tools.fuzzman.seeds import SeedInjector
+from fuzzaide.tools.fuzzman.sync import SEEDS_NAME, parse_queue_entry_name
+
+
+def test_parse_queue_entry_name() -> None:
+    assert parse_queue_entry_name("id:000012,sync:s2,src:000003") == {
+        "id": "000012",
+        "sync": "s2",
+        "src": "000003",
+    }
+    assert parse_queue_entry_name("id:000001,src:000000+000004,op:splice,rep:2") == {
+        "id": "000001",
+        "src": "000000+000004",
+        "op": "splice",
+        "rep": "2",
+    }
+    assert parse_queue_entry_name("README.txt") == {}
+
+
+def test_seed_injection(tmp_path) -> None:
+    drop_dir = str(tmp_path / "drop")
+    input_dir = str(tmp_path / "in")
+    sync_dirs = [str(tmp_path / "group1"), str(tmp_path / "group2")]
+    write_file(os.path.join(input_dir, "1"), b"known")
+    write_file(os.path.join(drop_dir, "grammar", "a"), b"new1")
+    write_file(os.path.join(drop_dir, "grammar", "b"), b"new1")
+    write_file(os.path.join(drop_dir, "manual", "c"), b"known")
+    write_file(os.path.join(drop_dir, "d"), b"new2")
+
+    fuzzman = SimpleNamespace(procs=[], args=SimpleNamespace(output_dir=None))
+    injector = SeedInjector(fuzzman, drop_dir, sync_dirs, 3600, input_dir)
+    injector.stop()
+    injector.join()
+
+    injector.scan_drop_dir()
+    injector.scan_drop_dir()  # nothing changed
+    for sync_dir in sync_dirs:
+        queue_dir = os.path.join(sync_dir, SEEDS_NAME, "queue")
+        assert sorted(os.listdir(queue_dir)) == ["id:000000", "id:000001"]
+
+    stats = injector.source_stats
+    assert [stats["drop"]["injected"], stats["drop"]["duplicates"]] == [1, 0]
+    assert [stats["grammar"]["injected"], stats["grammar"]["duplicates"]] == [1, 1]
+    assert [stats["manual"]["injected"], stats["manual"]["duplicates"]] == [0, 1]
+
+    seed_id = "000001" if injector.seed_sources["000001"] == "grammar" else "000000"
+    injector.track_queue_entry("s1", "id:000010,sync:%s,src:%s" % (SEEDS_NAME, seed_id))
+    injector.track_queue_entry("s1", "id:000011,src:000010,op:havoc")
+    injector.track_queue_entry("s1", "id:000012,src:000003+000011,op:splice")
+    injector.track_queue_entry("s2", "id:000005,sync:s1,src:000012")
+    injector.track_queue_entry("s2", "id:000006,src:000005,op:havoc")
+    injector.track_queue_entry("s2", "id:000007,src:000001,op:havoc")
+    assert [stats["grammar"]["productive"], stats["grammar"]["descendants"]] == [1, 3]
+    assert stats["drop"]["productive"] == 0
+
+    # ids and sources survive restart
+    injector = SeedInjector(fuzzman, drop_dir, sync_dirs, 3600, input_dir)
+    injector.stop()
+    injector.join()
+    assert injector.source_stats["grammar"]["injected"] == 1
+    assert injector.outputs[1].next_id == 2
@@ -0,0 +1,125 @@
+import io
+import os
+import json
+import signal
+import subprocess
+
+import pytest
+
+from fuzzaide.tools.fuzzman.fake_afl import FakeFuzzer, parse_fuzzer_args
+from fuzzaide.tools.fuzzman.selfbench import (
+    find_regressions,
+    get_newest_find,
+    get_stop_time,
+    read_process_usage,
+    write_fake_fuzzer,
+)
+from fuzzaide.tools.fuzzman.events import EVENT_LOG_NAME
+
+
+def read_stats(path) -> dict:
+    stats = dict()
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            stats[key.strip()] = value.strip()
+    return stats
+
+
+def test_parse_fuzzer_args() -> None:
+    options, target = parse_fuzzer_args(
+        "-i in -o out -S s2 -m none -t1000+ -d -- ./prog @@".split()
+    )
+    assert options == {
+        "i": "in",
+        "o": "out",
+        "S": "s2",
+        "m": "none",
+        "t": "1000+",
+        "d": True,
+    }
+    assert target == ["./prog", "@@"]
+
+
+def test_fake_fuzzer_files(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("FAKE_AFL_FINDS_PER_MIN", "60")
+    monkeypatch.setenv("FAKE_AFL_FIND_UNTIL", "10")
+    monkeypatch.setenv("FAKE_AFL_CRASHES_PER_MIN", "6")
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "seed").write_bytes(b"12345")
+
+    options = {"i": str(tmp_path / "in"), "o": str(tmp_path / "out"), "S": "s1"}
+    fuzzer = FakeFuzzer(options, ["./prog", "@@"], now=1000.0)
+    outbuf = io.BytesIO()
+    fuzzer.tick(1030.0, outbuf)
+
+    out_dir = tmp_path / "out" / "s1"
+    assert len(os.listdir(out_dir / "queue")) == 1 + 10  # finds stop after 10 sec
+    assert len(os.listdir(out_dir / "crashes")) == 1  # crashes too
+    assert outbuf.getvalue().startswith(b"\x1b[H")
+
+    stats = read_stats(out_dir / "fuzzer_stats")
+    assert stats["corpus_count"] == "11"
+    assert stats["saved_crashes"] == "1"
+    assert stats["last_update"] == "1030"
+    assert (out_dir / "plot_data").read_text().count("\n") == 2
+
+
+def test_fake_fuzzer_crashes_on_request(tmp_path) -> None:
+    fake = write_fake_fuzzer(str(tmp_path))
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "seed").write_bytes(b"12345")
+    env = dict(os.environ, FAKE_AFL_CRASH_AFTER="0.5", FAKE_AFL_FPS="20")
+
+    proc = subprocess.run(
+        [fake, "-i", str(tmp_path / "in"), "-o", str(tmp_path / "out"), "--", "./prog"],
+        stdout=subprocess.PIPE,
+        env=env,
+        timeout=30,
+    )
+    assert proc.returncode == -signal.SIGSEGV
+    assert b"american fuzzy lop" in proc.stdout
+    assert (tmp_path / "out" / "default" / "fuzzer_stats").exists()
+
+
+def test_read_process_usage() -> None:
+    if not os.path.isdir("/proc"):
+        pytest.skip("no /proc")
+    cpu, rss, threads = read_process_usage(os.getpid())
+    assert cpu >= 0 and rss > 0 and threads >= 1
+
+
+def test_stop_latency_sources(tmp_path) -> None:
+    for name, last_find in (("s1", 100), ("s2", 130)):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "fuzzer_stats").write_text(
+            "last_find         : %d\n" % last_find
+        )
+    events = [
+        {"event": "stop_check", "time": 140.0, "stop": False},
+        {"event": "stop_check", "time": 152.5, "stop": True},
+    ]
+    (tmp_path / EVENT_LOG_NAME).write_text(
+        "".join(json.dumps(e) + "\n" for e in events)
+    )
+
+    assert get_newest_find(str(tmp_path)) == 130
+    assert get_stop_time(str(tmp_path)) == 152.5
+
+
+def test_find_regressions() -> None:
+    baseline = {
+        "16": {"cpu": 0.10, "rss": 30e6, "threads": 20, "stop_latency": 2.0},
+        "64": {"cpu": 0.30, "rss": 40e6, "threads": 70, "stop_latency": 2.0},
+    }
+    results = {
+        "16": {"cpu": 0.12, "rss": 31e6, "threads": 20, "stop_latency": 6.0},
+        "64": {"cpu": 0.60, "rss": 40e6, "threads": 140, "stop_latency": None},
+        "256": {"cpu": 1.0, "rss": 90e6, "threads": 260, "stop_latency": 3.0},
+    }
+    regressions = find_regressions(results, baseline, 0.25)
+    assert regressions == [
+        "64 workers: CPU usage is 60.0%, baseline 30.0%",
+        "64 workers: thread count is 140, baseline 70",
+        "64 workers: job didn't stop",
+    ]
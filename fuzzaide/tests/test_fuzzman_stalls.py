@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from fuzzaide.tools.fuzzman.stalls import (
+    attribute_stalls,
+    get_stall_hint,
+    is_on_tmpfs,
+    read_cpu_ticks,
+    StallMonitor,
+)
+from fuzzaide.tools.fuzzman.throttle import read_psi_total
+
+
+def test_read_psi_total(tmp_path) -> None:
+    (tmp_path / "io").write_text(
+        "some avg10=1.50 avg60=0.70 avg300=0.20 total=123456\n"
+        "full avg10=0.00 avg60=0.00 avg300=0.00 total=1000\n"
+    )
+    assert read_psi_total("io", str(tmp_path)) == 123456
+    assert read_psi_total("cpu", str(tmp_path)) is None
+
+
+def test_attribute_stalls() -> None:
+    assert attribute_stalls([], {})["lost"] == 0.0
+
+    # one worker starved of CPU, one blocked on I/O
+    summary = attribute_stalls([[0.5, 0.5], [0.6, 0.0]], {"io": 0.3, "memory": 0.1})
+    assert summary["lost"] == pytest.approx(0.45)
+    assert summary["cpu"] == pytest.approx(0.25)
+    assert summary["io"] == pytest.approx(0.15)
+    assert summary["memory"] == pytest.approx(0.05)
+    assert summary["other"] == pytest.approx(0.0)
+
+    # without pressure blocked time is not attributed to resources
+    summary = attribute_stalls([[0.8, 0.0]], {"io": 0.0, "memory": 0.0})
+    assert summary["other"] == pytest.approx(0.2)
+
+
+def test_get_stall_hint() -> None:
+    summary = {"lost": 0.5, "cpu": 0.45, "io": 0.0, "memory": 0.0, "other": 0.05}
+    assert get_stall_hint(summary, 16, False) == "reduce -n by 8"
+
+    summary = {"lost": 0.4, "cpu": 0.0, "io": 0.35, "memory": 0.0, "other": 0.05}
+    assert get_stall_hint(summary, 16, False).startswith("move output dir to tmpfs")
+    assert get_stall_hint(summary, 16, True) is None
+
+    summary = {"lost": 0.4, "cpu": 0.2, "io": 0.2, "memory": 0.0, "other": 0.0}
+    assert get_stall_hint(summary, 16, False) is None  # not clear-cut
+
+    summary = {"lost": 0.05, "cpu": 0.05, "io": 0.0, "memory": 0.0, "other": 0.0}
+    assert get_stall_hint(summary, 16, False) is None
+
+
+def test_is_on_tmpfs(tmp_path) -> None:
+    mounts = tmp_path / "mounts"
+    mounts.write_text(
+        "/dev/sda1 / ext4 rw 0 0\n"
+        "tmpfs /dev/shm tmpfs rw 0 0\n"
+        "/dev/sdb1 /dev/shm/disk ext4 rw 0 0\n"
+    )
+    assert is_on_tmpfs("/dev/shm/out", str(mounts)) is True
+    assert is_on_tmpfs("/dev/shm/disk/out", str(mounts)) is False
+    assert is_on_tmpfs("/dev/shmem", str(mounts)) is False
+    assert is_on_tmpfs("/home", str(tmp_path / "missing")) is None
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+def test_read_cpu_ticks() -> None:
+    assert read_cpu_ticks(os.getpid()) >= 0
+    assert read_cpu_ticks(2**22 + 1) is None
+
+
+def test_stall_monitor_deltas() -> None:
+    prev = {
+        "time": 100.0,
+        "psi": {"cpu": 0, "memory": 0, "io": None},
+        "workers": {
+            "m": {"pid": 1, "cpu": 0, "wait": 0, "io": {"wchar": 0}},
+            "s1": {"pid": 2, "cpu": 0, "wait": 0, "io": {}},
+        },
+    }
+    cur = {
+        "time": 110.0,
+        "psi": {"cpu": 4000000, "memory": 0, "io": 5},
+        "workers": {
+            "m": {"pid": 1, "cpu": 500, "wait": 4 * 10**9, "io": {"wchar": 10240}},
+            "s1": {"pid": 3, "cpu": 10, "wait": 0, "io": {}},
+        },
+    }
+    duration, psi, workers = StallMonitor.get_deltas(prev, cur)
+    assert duration == 10.0
+    assert psi == {"cpu": 4.0, "memory": 0.0}
+    assert list(workers) == ["m"]  # s1 was restarted
+    assert workers["m"]["wait"] == 4.0
+    assert workers["m"]["write_bytes"] == 10240
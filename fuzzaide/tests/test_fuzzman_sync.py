@@ -0,0 +1,57 @@
+import os
+
+from fuzzaide.tests.helpers import write_file
+from fuzzaide.tools.fuzzman.sync import (
+    QueueWatcher,
+    SyntheticSyncDir,
+    SyncRelay,
+    RELAY_NAME,
+)
+
+
+def test_synthetic_sync_dir_ids(tmp_path) -> None:
+    sync = SyntheticSyncDir(str(tmp_path), "relay")
+    assert sync.add(b"1") == "id:000000"
+    assert sync.add(b"2", "src:test") == "id:000001,src:test"
+
+    # ids continue after restart
+    sync = SyntheticSyncDir(str(tmp_path), "relay")
+    assert sync.add(b"3") == "id:000002"
+    assert sorted(os.listdir(sync.queue_dir)) == [
+        "id:000000",
+        "id:000001,src:test",
+        "id:000002",
+    ]
+
+
+def test_queue_watcher(tmp_path) -> None:
+    queue_dir = str(tmp_path / "queue")
+    watcher = QueueWatcher(queue_dir)
+    assert watcher.get_new_entries() == []
+
+    write_file(os.path.join(queue_dir, "id:000000,time:0"), b"a")
+    write_file(os.path.join(queue_dir, ".state"), b"")
+    assert watcher.get_new_entries() == ["id:000000,time:0"]
+    assert watcher.get_new_entries() == []
+
+    write_file(os.path.join(queue_dir, "id:000001,src:000000"), b"b")
+    assert watcher.get_new_entries() == ["id:000001,src:000000"]
+
+
+def test_sync_relay_dedup(tmp_path) -> None:
+    groups = [str(tmp_path / "group1"), str(tmp_path / "group2")]
+    relay = SyncRelay(groups, interval=3600)
+    try:
+        write_file(os.path.join(groups[0], "m1", "queue", "id:000000"), b"a")
+        write_file(os.path.join(groups[0], "s3", "queue", "id:000000"), b"a")
+        write_file(os.path.join(groups[1], "m2", "queue", "id:000000"), b"b")
+
+        relay.relay_once()
+    finally:
+        relay.stop()
+        relay.join()
+
+    assert relay.num_relayed == 2
+    assert relay.num_duplicates == 1
+    assert os.listdir(os.path.join(groups[0], RELAY_NAME, "queue")) == ["id:000000"]
+    assert os.listdir(os.path.join(groups[1], RELAY_NAME, "queue")) == ["id:000000"]
@@ -0,0 +1,100 @@
+import shutil
+from time import time
+from types import SimpleNamespace
+
+import pytest
+
+from fuzzaide.tools.fuzzman.fuzzman import FuzzManager
+from fuzzaide.tools.fuzzman.running_process import RunningAFLProcess
+
+from fuzzaide.tools.fuzzman.throttle import (
+    LoadThrottle,
+    THROTTLE_MIN_HOLD_SEC,
+    get_secondaries,
+    read_psi,
+)
+
+
+class StubWorker:
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self.paused = False
+
+    def pause(self, reason="manual"):
+        assert reason == "throttle"
+        self.paused = True
+
+    def resume(self, reason=None):
+        assert reason == "throttle"
+        self.paused = False
+
+
+def test_read_psi(tmp_path) -> None:
+    with open(str(tmp_path / "cpu"), "w") as f:
+        f.write("some avg10=12.50 avg60=3.00 avg300=1.00 total=100\n")
+        f.write("full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n")
+
+    assert read_psi("cpu", str(tmp_path)) == 12.5
+    assert read_psi("memory", str(tmp_path)) is None
+
+
+def test_load_throttle_hysteresis() -> None:
+    procs = [StubWorker("afl-fuzz -M m1 -- ./app")]
+    procs += [StubWorker("afl-fuzz -S s%d -- ./app" % i) for i in range(2, 6)]
+    assert get_secondaries(procs) == procs[1:]
+
+    throttle = LoadThrottle(SimpleNamespace(procs=procs), 0.5, 20.0, 10.0, 0.5)
+    throttle.stop()
+    throttle.join()
+
+    pressure = {"cpu": 30.0, "memory": 0.0}
+    throttle.sample = lambda: pressure
+    now = 1000.0
+
+    throttle.check(now)
+    assert [proc.paused for proc in procs] == [False, False, False, True, True]
+
+    pressure["cpu"] = 5.0
+    throttle.check(now + 1)  # too early after pausing
+    assert len(throttle.paused) == 2
+
+    pressure["cpu"] = 15.0  # below threshold, but not below low watermark
+    throttle.check(now + THROTTLE_MIN_HOLD_SEC)
+    assert len(throttle.paused) == 2
+
+    pressure["cpu"] = 5.0
+    throttle.check(now + THROTTLE_MIN_HOLD_SEC * 2)
+    assert not any(proc.paused for proc in procs)
+
+
+@pytest.mark.skipif(shutil.which("sleep") is None, reason="requires sleep")
+def test_pause_reasons() -> None:
+    procs = [
+        RunningAFLProcess(name=name, cmd="sleep 60", env=dict())
+        for name in ("s1", "s2")
+    ]
+    fuzzman = FuzzManager(args=[])
+    fuzzman.procs = procs
+    try:
+        start = time()
+        procs[0].pause("throttle")
+        procs[0].pause("disk")
+        procs[0].resume("throttle")  # host load is back, but disk is still full
+        assert procs[0].paused and procs[0].pause_reasons == {"disk"}
+        procs[0].pause_intervals[0][0] -= 100  # pretend it's been paused for a while
+
+        procs[0].resume("disk")
+        assert not procs[0].paused
+        assert 100 <= procs[0].get_paused_time() < 100 + time() - start + 1
+        assert procs[0].get_paused_time(since=time() + 1) == 0
+
+        # paused time of overlapping reasons is counted once, per share of workers
+        assert fuzzman.get_paused_time() == 50
+
+        procs[1].pause("throttle")
+        procs[1].resume()  # e.g. worker is restarted
+        assert not procs[1].paused and len(procs[1].pause_reasons) == 0
+    finally:
+        for proc in procs:
+            proc.proc.kill()  # its output is closed, so reader thread ends right away
+            proc.stop()
@@ -0,0 +1,61 @@
+from typing import List, Optional
+
+import pytest
+
+from fuzzaide.tools.fuzzman.running_process import replace_cmd_option
+from fuzzaide.tools.fuzzman.timeout_calibration import (
+    percentile,
+    compute_timeout,
+    retune_timeout,
+    MIN_TIMEOUT_MS,
+    MAX_TIMEOUT_MS,
+)
+
+percentile_testdata = [
+    ([], 50, None),
+    ([1.0], 99, 1.0),
+    ([1.0, 2.0, 3.0, 4.0], 50, 2.0),
+    ([float(x) for x in range(1, 101)], 99, 99.0),
+    ([float(x) for x in range(1, 101)], 100, 100.0),
+]
+
+
+@pytest.mark.parametrize("values, p, expected", percentile_testdata)
+def test_percentile(values: List[float], p: float, expected: Optional[float]) -> None:
+    assert percentile(values, p) == expected
+
+
+def test_compute_timeout() -> None:
+    assert compute_timeout([], 99) is None
+    assert compute_timeout([0.5, 1.0, 2.0], 99) == MIN_TIMEOUT_MS
+    assert compute_timeout([10.0, 20.0, 31.0], 99) == 65
+    assert compute_timeout([10.0, 100000.0], 99) == MAX_TIMEOUT_MS
+
+
+def test_retune_timeout() -> None:
+    assert retune_timeout(100, 100, 0, 0) == 100
+    assert retune_timeout(100, 100, 1000, 100) == 150
+    assert retune_timeout(150, 100, 1000000, 0) == 100
+    assert retune_timeout(100, 100, 1000000, 0) == 100
+    assert retune_timeout(120, 100, 1000000, 500) == 120
+
+
+cmd_testdata = [
+    (
+        "afl-fuzz -i in -o out -t 50 -- ./app -t 1",
+        "afl-fuzz -i in -o out -t 70 -- ./app -t 1",
+    ),
+    (
+        "afl-fuzz -i in -o out -- ./app -t 1",
+        "afl-fuzz -i in -o out -- ./app -t 1",
+    ),
+    (
+        "afl-fuzz -i in -o out -t 70 -- ./app @@",
+        "afl-fuzz -i in -o out -t 70 -- ./app @@",
+    ),
+]
+
+
+@pytest.mark.parametrize("cmd, expected", cmd_testdata)
+def test_replace_cmd_option(cmd: str, expected: str) -> None:
+    assert replace_cmd_option(cmd, "-t", "70") == expected
@@ -0,0 +1,225 @@
+# file    :  fuzz_webview/federation.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Stats of many fuzzing campaigns (sync dirs) loaded by a shared pool of workers
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Event, Lock
+
+from fuzzaide.tools.fuzz_webview.fuzz_webview import StatsLoader
+
+LOAD_INTERVAL = 1.0  # seconds between loads of one campaign
+SLOW_LOAD_FACTOR = 10  # campaign which took T seconds to load waits T * factor
+MAX_LOAD_INTERVAL = 60.0
+SLOW_LOAD_SEC = 1.0  # campaigns loading longer than this are shown as slow
+STALL_SEC = 10.0  # load running longer than this is shown as stalled
+SCHEDULE_SEC = 0.2  # how often scheduler looks for campaigns due to load
+CAMPAIGNS_RESCAN_SEC = 10.0  # how often parent dirs are checked for new campaigns
+
+
+class Campaign:
+    """
+    Sync dir with its own StatsLoader. Loads are run by Federation's workers,
+    at most one at a time, so a slow mount occupies one worker only
+    """
+
+    def __init__(self, name, dir):
+        self.name = name
+        self.dir = dir
+        self.loader = StatsLoader(dir, Lock(), autostart=False)
+        self.next_load = 0.0  # monotonic time
+        self.load_started = None  # monotonic time of running load
+        self.duration = None  # of last finished load
+        self.stats_duration = None  # part of it spent on fuzzer_stats files
+        self.error = None  # of last load
+
+    def get_status(self, now):
+        if self.load_started is not None and now - self.load_started > STALL_SEC:
+            return "stalled"
+        if self.duration is None:
+            return "loading"
+        if self.error is not None:
+            return "error"
+        if self.stats_duration > SLOW_LOAD_SEC:
+            return "slow"
+        return "ok"
+
+
+class Federation(Thread):
+    """
+    Campaigns given as sync dirs and subdirs of campaigns dirs. Scheduler submits
+    loads of campaigns to a pool of `workers` threads: every campaign is loaded
+    once per LOAD_INTERVAL, campaigns that load slowly are loaded less often.
+    Summary of campaigns gets new version when stats or status of some campaign change
+    """
+
+    def __init__(self, sync_dirs, campaigns_dirs, workers):
+        super().__init__()
+        self.sync_dirs = list(sync_dirs)
+        self.campaigns_dirs = list(campaigns_dirs)
+        self.campaigns = dict()  # name -> Campaign
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="stats-loader"
+        )
+        self.lock = Lock()  # lock for campaigns and summary version
+        self.version = 0  # incremented on every change of summary
+        self.modified = time.time()
+        self.signature = None  # versions and statuses of campaigns in last summary
+        self.scan_time = None  # monotonic time of last scan of campaigns dirs
+
+        self._stop_evt = Event()
+
+        self.update_campaigns()
+        self.start()
+
+    def find_campaign_dirs(self):
+        """
+        Returns list of [name, dir]. Names are unique: basenames of dirs,
+        suffixed with a number on clashes
+        """
+
+        dirs = [os.path.abspath(d) for d in self.sync_dirs]
+        for parent in self.campaigns_dirs:
+            try:
+                with os.scandir(parent) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in sorted(entries, key=lambda e: e.name):
+                try:
+                    if not entry.name.startswith(".") and entry.is_dir():
+                        dirs.append(os.path.abspath(entry.path))
+                except OSError:
+                    continue
+
+        found = list()
+        names = set()
+        seen = set()
+        for dir in dirs:
+            if dir in seen:
+                continue
+            seen.add(dir)
+            name = base = os.path.basename(dir) or dir
+            suffix = 1
+            while name in names:
+                suffix += 1
+                name = "%s-%d" % (base, suffix)
+            names.add(name)
+            found.append([name, dir])
+        return found
+
+    def update_campaigns(self):
+        """
+        Add campaigns appeared in campaigns dirs and forget removed ones
+        """
+
+        self.scan_time = time.monotonic()
+        found = self.find_campaign_dirs()
+        with self.lock:
+            by_dir = dict((c.dir, c) for c in self.campaigns.values())
+            campaigns = dict()
+            for name, dir in found:
+                campaign = by_dir.pop(dir, None)
+                if campaign is None or campaign.name != name:
+                    campaign = Campaign(name, dir)
+                campaigns[name] = campaign
+            for campaign in by_dir.values():
+                campaign.loader.stop()  # releases its event streams
+            self.campaigns = campaigns
+
+    def load(self, campaign):
+        start = time.monotonic()
+        try:
+            campaign.loader.load_stats()
+            campaign.error = None
+        except Exception as e:  # keep worker alive whatever happens to one campaign
+            campaign.error = str(e)
+        end = time.monotonic()
+        # first read of long plot_data files is slow once, so only stats count
+        duration = campaign.loader.load_info.get("duration", end - start)
+        campaign.stats_duration = duration
+        campaign.duration = end - start
+        interval = min(
+            max(LOAD_INTERVAL, duration * SLOW_LOAD_FACTOR), MAX_LOAD_INTERVAL
+        )
+        campaign.next_load = end + interval
+        campaign.load_started = None
+
+    def schedule(self):
+        """
+        Submit loads of campaigns that are due and not being loaded already
+        """
+
+        now = time.monotonic()
+        with self.lock:
+            campaigns = list(self.campaigns.values())
+        for campaign in campaigns:
+            if campaign.load_started is None and now >= campaign.next_load:
+                campaign.load_started = now
+                self.pool.submit(self.load, campaign)
+
+    def update_version(self):
+        now = time.monotonic()
+        with self.lock:
+            signature = [
+                (c.name, c.loader.version, c.get_status(now))
+                for c in self.campaigns.values()
+            ]
+            if signature != self.signature:
+                self.signature = signature
+                self.version += 1
+                self.modified = time.time()
+
+    def get_campaign(self, name):
+        with self.lock:
+            return self.campaigns.get(name)
+
+    def get_summary(self):
+        """
+        Returns version, time of last change and list of dicts with name, dir,
+        status and common stats of each campaign
+        """
+
+        now = time.monotonic()
+        with self.lock:
+            version, modified = self.version, self.modified
+            campaigns = list(self.campaigns.values())
+
+        summary = list()
+        for c in campaigns:
+            _, _, common_stats, _ = c.loader.get_snapshot()
+            summary.append(
+                {
+                    "name": c.name,
+                    "dir": c.dir,
+                    "status": c.get_status(now),
+                    "error": c.error,
+                    "stats": common_stats,
+                }
+            )
+        return version, modified, summary
+
+    def run(self):
+        while not self._stop_evt.is_set():
+            if time.monotonic() - self.scan_time >= CAMPAIGNS_RESCAN_SEC:
+                self.update_campaigns()
+            self.schedule()
+            self.update_version()
+            self._stop_evt.wait(SCHEDULE_SEC)
+
+    def stopped(self):
+        return self._stop_evt.is_set()
+
+    def stop(self):
+        self._stop_evt.set()
+        self.pool.shutdown(wait=False)
+        with self.lock:
+            for campaign in self.campaigns.values():
+                campaign.loader.stop()
@@ -7,33 +7,63 @@
 # check repository for more information
 
 """
-fuzz webview: simple Flask App to aggregate and display data from fuzzer_stats files
+fuzz webview: simple Flask App to aggregate and display data from fuzzer_stats
+and plot_data files
 Code here may partially overlap with fuzzman.py
 """
 
 import os
 import sys
-import glob
+import json
 import time
 import argparse
-from datetime import datetime
-from threading import Thread, Lock, Event
-
-from flask import Flask, render_template, send_from_directory
+from collections import deque
+from threading import Thread, Event, Condition, Lock
 
 from fuzzaide.common.fuzz_stats import get_afl_stat_name, is_afl_fuzzer_stats_old
+from fuzzaide.tools.fuzz_webview.plot_history import PlotHistory
+
+DELTA_HISTORY = 100  # deltas kept for clients reconnecting with Last-Event-ID
+INDEX_RESCAN_SEC = 60.0  # rescan sync dir this often even if its mtime didn't change
 
 
 class StatsLoader(Thread):
-    def __init__(self, dir, lock):
+    """
+    Reloads fuzzer_stats files of sync dir every second. Snapshot of stats only
+    changes (and gets new version) when contents of some fuzzer_stats file change,
+    so clients can cheaply check if there's anything new.
+    Sync dir is only listed when its mtime changes, fuzzer_stats files are stat'ed
+    and only reread when their mtime, size or inode change.
+    New rows of plot_data files are read after each reload into `history`.
+    With autostart=False the thread isn't started and load_stats() is called by owner
+    """
+
+    def __init__(self, dir, lock, autostart=True):
         super().__init__()
         self.dir = dir  # fuzzers sync dir
-        self.stats = list()  # list of dicts
+        self.fuzzers = list()  # list of dicts: name, version, modified, stats
         self.common_stats = dict()
-        self.lock = lock  # lock for self.stats
+        self.version = 0  # incremented on every change of stats
+        self.modified = time.time()  # time of last change
+        self.lock = lock  # lock for snapshot: fuzzers, common_stats, version, modified
+        self.changed = Condition(lock)  # notified when new snapshot is published
+        self.deltas = deque(maxlen=DELTA_HISTORY)  # [version, JSON of changes]
+
+        self.index = None  # list of [path of fuzzer_stats, fuzzer name]
+        self.index_mtime = None  # mtime of sync dir when index was built
+        self.index_time = 0.0  # monotonic time of last scan
+        self.files = dict()  # path -> [(mtime, size, inode), parsed stats or None]
+        self.load_info = dict()  # cost of last reload, see load_stats()
+        self.num_reloads = 0
+        self.num_scans = 0
+        self.history = PlotHistory()
+        # history is appended by this thread, queried by others
+        self.history_lock = Lock()
+
         self._stop_evt = Event()
 
-        self.start()
+        if autostart:
+            self.start()
 
     def get_fuzzer_stats(self, fname):
         """
@@ -82,153 +112,296 @@ class StatsLoader(Thread):
 
         return saved_newest_stamp
 
+    def get_fuzzer_name(self, fname):
+        fuzzer_dir = os.path.dirname(fname)
+        if os.path.abspath(fuzzer_dir) == os.path.abspath(self.dir):
+            return os.path.basename(os.path.abspath(self.dir))  # not a sync dir
+        return os.path.basename(fuzzer_dir)
+
+    def get_common_stats(self, all_stats):
+        """
+        Returns totals of all fuzzers. Only raw numbers and timestamps are used
+        so totals don't change while fuzzers don't update their stats
+        """
+
+        common_stats = {
+            "fuzzers": len(all_stats),
+            "execs": 0,
+            "execs_per_sec": 0.0,
+            "paths": 0,
+            "hangs": 0,
+            "crashes": 0,
+            "last_new_path": 0,
+            "last_new_hang": 0,
+            "last_new_crash": 0,
+        }
+
+        for stats in all_stats:
+            use_old_style = bool(is_afl_fuzzer_stats_old(stats))
+
+            def get_int(name):
+                try:
+                    return int(stats.get(get_afl_stat_name(name, use_old_style), 0))
+                except ValueError:
+                    return 0
+
+            common_stats["crashes"] += get_int("unique_crashes")
+            common_stats["hangs"] += get_int("unique_hangs")
+            common_stats["paths"] += get_int("paths_total")
+            try:
+                common_stats["execs"] += int(stats.get("execs_done", 0))
+                common_stats["execs_per_sec"] += float(stats.get("execs_per_sec", 0))
+            except ValueError:
+                pass
+
+            for stat_name, common_name in (
+                ("last_path", "last_new_path"),
+                ("last_hang", "last_new_hang"),
+                ("last_crash", "last_new_crash"),
+            ):
+                common_stats[common_name] = self.update_stat_timestamp(
+                    stats,
+                    get_afl_stat_name(stat_name, use_old_style),
+                    common_stats[common_name],
+                )
+
+        common_stats["execs_per_sec"] = round(common_stats["execs_per_sec"], 2)
+        return common_stats
+
     @staticmethod
-    def format_seconds(seconds):
-        s = seconds % 60
-        m = (seconds // 60) % 60
-        h = (seconds // 3600) % 24
-        d = seconds // 86400
+    def get_time_base(stats):
+        """
+        Returns unix time when fuzzer's run_time was 0: relative_time of plot_data
+        of AFL++ 4.00+ counts from it
+        """
 
-        if d > 0:
-            return "%d days, %d hrs, %d min, %d sec" % (d, h, m, s)
-        elif h > 0:
-            return "%d hrs, %d min, %d sec" % (h, m, s)
-        elif m > 0:
-            return "%d min, %d sec" % (m, s)
+        try:
+            return int(stats["last_update"]) - int(stats["run_time"])
+        except (KeyError, ValueError):
+            pass
+        try:
+            return int(stats.get("start_time", 0))
+        except ValueError:
+            return 0
 
-        return "%d sec" % (s,)
+    def update_index(self):
+        """
+        List fuzzer dirs of sync dir if it changed since last scan.
+        Returns True if sync dir was scanned
+        """
 
-    def load_stats(self):
-        fuzzer_stats = "fuzzer_stats"
-        filenames = glob.glob(os.path.join(self.dir, "*", fuzzer_stats))
-        single_fuzzer_stats = os.path.join(self.dir, fuzzer_stats)
-        if os.path.isfile(single_fuzzer_stats):
-            filenames.append(single_fuzzer_stats)
-        filenames = sorted(filenames)
+        try:
+            dir_mtime = os.stat(self.dir).st_mtime_ns
+        except OSError:
+            dir_mtime = None
 
-        newest_path_stamp = 0
-        newest_hang_stamp = 0
-        newest_crash_stamp = 0
+        if (
+            self.index is not None
+            and dir_mtime == self.index_mtime
+            and time.monotonic() - self.index_time < INDEX_RESCAN_SEC
+        ):
+            return False
 
-        sum_execs = 0
-        sum_paths = 0
-        sum_hangs = 0
-        sum_crashes = 0
+        index = []
+        try:
+            with os.scandir(self.dir) as it:
+                entries = list(it)
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue  # e.g. .synced of single fuzzer
+            try:
+                if entry.name == "fuzzer_stats" and entry.is_file():
+                    index.append([entry.path, self.get_fuzzer_name(entry.path)])
+                elif entry.is_dir():
+                    path = os.path.join(entry.path, "fuzzer_stats")
+                    index.append([path, entry.name])
+            except OSError:
+                continue  # removed meanwhile
+
+        self.index = sorted(index)
+        self.index_mtime = dir_mtime
+        self.index_time = time.monotonic()
+        self.num_scans += 1
+        return True
 
-        common_stats = {}
-        all_stats = []
+    def load_stats(self):
+        """
+        Reload changed fuzzer_stats files and publish new snapshot if anything changed.
+        Cost of reload is saved to `load_info`: duration, whether sync dir was scanned,
+        number of files checked and reread
+        """
 
-        now = int(datetime.now().timestamp())
+        start = time.perf_counter()
+        scanned = self.update_index()
+
+        old_fuzzers = dict((f["name"], f) for f in self.fuzzers)
+        version = self.version + 1
+        now = time.time()
+        changed = False
+        fuzzers = []
+        files = dict()
+        num_read = 0
+        plots = []  # [name, fuzzer dir, time base] of fuzzers with stats
+
+        for fname, name in self.index:
+            try:
+                st = os.stat(fname)
+            except OSError:
+                continue  # fuzzer dir without fuzzer_stats (yet)
+
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+            cached = self.files.get(fname)
+            if cached is not None and cached[0] == key:
+                stats = cached[1]
+            else:
+                stats = self.get_fuzzer_stats(fname)
+                num_read += 1
+            files[fname] = [key, stats]
 
-        for fname in filenames:
-            stats = self.get_fuzzer_stats(fname)
             if not stats:
                 continue
+            plots.append([name, os.path.dirname(fname), self.get_time_base(stats)])
 
-            use_old_style = is_afl_fuzzer_stats_old(stats)
+            old = old_fuzzers.get(name)
+            if old is not None and (old["stats"] is stats or old["stats"] == stats):
+                fuzzers.append(old)
+                continue
 
-            last_upd = int(
-                stats.get(get_afl_stat_name("last_update", use_old_style), 0)
-            )
-            if last_upd > 0:
-                delta = now - last_upd
-                mess = self.format_seconds(delta) + " ago"
-                if delta > 90:
-                    mess += " (NOT RUNNING?)"
-                stats["last_update"] = mess
-            all_stats.append(stats)
-
-            crashes = int(
-                stats.get(get_afl_stat_name("unique_crashes", use_old_style), 0)
-            )
-            hangs = int(stats.get(get_afl_stat_name("unique_hangs", use_old_style), 0))
-            paths_total = int(
-                stats.get(get_afl_stat_name("paths_total", use_old_style), 0)
+            fuzzers.append(
+                {"name": name, "version": version, "modified": now, "stats": stats}
             )
+            changed = True
+
+        self.files = files
+        self.num_reloads += 1
+        self.load_info = {
+            "reloads": self.num_reloads,
+            "duration": round(time.perf_counter() - start, 6),
+            "scanned": scanned,
+            "scans": self.num_scans,
+            "files_checked": len(self.index),
+            "files_read": num_read,
+            "fuzzers": len(fuzzers),
+        }
+
+        if changed or len(fuzzers) != len(old_fuzzers):
+            self.publish(version, now, old_fuzzers, fuzzers)
+
+        # stats are published first: plot_data may take long to read on first load
+        start = time.perf_counter()
+        with self.history_lock:
+            rows = self.history.update(plots)
+        self.load_info["history_duration"] = round(time.perf_counter() - start, 6)
+        self.load_info["history_rows_read"] = rows
+        self.load_info["history_rows"] = self.history.num_rows
+
+    def publish(self, version, now, old_fuzzers, fuzzers):
+        """
+        Make `fuzzers` the new snapshot and wake up clients waiting for changes
+        """
 
-            sum_crashes += crashes
-            sum_hangs += hangs
-            sum_paths += paths_total
-            sum_execs += int(stats.get("execs_done", 0))
+        common_stats = self.get_common_stats([f["stats"] for f in fuzzers])
+        delta = self.get_delta(version, old_fuzzers, fuzzers, common_stats)
 
-            newest_path_stamp = self.update_stat_timestamp(
-                stats, get_afl_stat_name("last_path", use_old_style), newest_path_stamp
-            )
-            newest_hang_stamp = self.update_stat_timestamp(
-                stats, get_afl_stat_name("last_hang", use_old_style), newest_hang_stamp
-            )
-            newest_crash_stamp = self.update_stat_timestamp(
-                stats,
-                get_afl_stat_name("last_crash", use_old_style),
-                newest_crash_stamp,
-            )
+        with self.changed:
+            self.fuzzers = fuzzers
+            self.common_stats = common_stats
+            self.version = version
+            self.modified = now
+            self.deltas.append([version, delta])
+            self.changed.notify_all()
 
-        if newest_path_stamp == 0:
-            return
-
-        e = float(sum_execs)
-        c = ""
-        if e >= 1000000000:
-            e /= 1000000000
-            c = "B"
-        elif e >= 1000000:
-            e /= 1000000
-            c = "M"
-        elif e >= 1000:
-            e /= 1000
-            c = "K"
-
-        execs = "Unknown"
-        if len(c) > 0:
-            if c == "B":
-                execs = "%.4f%c" % (e, c)
-            else:
-                execs = "%.2f%c" % (e, c)
-        else:
-            execs = "%.0f" % (e,)
+    @staticmethod
+    def get_changes(old, new):
+        """
+        Returns dict of fields of `new` that differ from `old` (removed fields are None)
+        """
 
-        common_stats["execs"] = execs
+        changes = dict((k, v) for k, v in new.items() if old.get(k) != v)
+        changes.update((k, None) for k in old if k not in new)
+        return changes
 
-        newest_path_delta = now - newest_path_stamp
-        newest_path_fmt = self.format_seconds(newest_path_delta)
+    def get_delta(self, version, old_fuzzers, fuzzers, common_stats):
+        """
+        Returns JSON with fields of common and per-fuzzer stats changed in this version.
+        Names of all fuzzers are only included when some fuzzer appeared or disappeared
+        """
 
-        common_stats["paths"] = sum_paths
-        common_stats["last_new_path"] = newest_path_delta
-        common_stats["paths_info_fmt"] = "Paths: %d.\tLast new path: %s ago" % (
-            sum_paths,
-            newest_path_fmt,
-        )
+        delta = {
+            "version": version,
+            "stats": self.get_changes(self.common_stats, common_stats),
+            "fuzzers": dict(),
+        }
+        for f in fuzzers:
+            if f["version"] == version:
+                old = old_fuzzers.get(f["name"])
+                old_stats = old["stats"] if old is not None else dict()
+                delta["fuzzers"][f["name"]] = self.get_changes(old_stats, f["stats"])
+
+        names = [f["name"] for f in fuzzers]
+        if names != [f["name"] for f in self.fuzzers]:
+            delta["names"] = names
+
+        return json.dumps(delta, separators=(",", ":"))
+
+    def get_deltas_since(self, version):
+        """
+        Returns list of [version, delta JSON] published after `version`
+        or None if some of them are not kept anymore
+        """
+
+        with self.changed:
+            if version == self.version:
+                return []
+            if version > self.version:
+                return None  # version of some other run of webview
+            deltas = [d for d in self.deltas if d[0] > version]
+        if len(deltas) < 1 or deltas[0][0] != version + 1:
+            return None
+        return deltas
 
-        common_stats["hangs"] = sum_hangs
+    def wait_for_change(self, version, timeout):
+        """
+        Wait up to `timeout` seconds for snapshot newer than `version`.
+        Returns True if there is one
+        """
 
-        if sum_hangs > 0:
-            delta = now - newest_hang_stamp
-            seconds_fmt = self.format_seconds(delta)
-            common_stats["last_new_hang"] = delta
-            common_stats["hangs_info_fmt"] = "Hangs: %d.\tLast new hang: %s ago" % (
-                sum_hangs,
-                seconds_fmt,
+        with self.changed:
+            self.changed.wait_for(
+                lambda: self.version > version or self._stop_evt.is_set(), timeout
             )
-        else:
-            common_stats["last_new_hang"] = -1
-            common_stats["hangs_info_fmt"] = "Hangs: 0"
-
-        common_stats["crashes"] = sum_crashes
-        if sum_crashes > 0:
-            delta = now - newest_crash_stamp
-            seconds_fmt = self.format_seconds(delta)
-            common_stats["last_new_crash"] = delta
-            common_stats[
-                "crashes_info_fmt"
-            ] = "Crashes: %d.\tLast new crash: %s ago" % (sum_crashes, seconds_fmt)
-        else:
-            common_stats["last_new_crash"] = -1
-            common_stats["crashes_info_fmt"] = "Crashes: 0"
+            return self.version > version
+
+    def get_history(self, metric, start, end, points, fuzzer=None, recent=None):
+        """
+        Returns version of history, its [first, last] time and at most `points` points
+        of `metric` in [start, end] (None means first or last time)
+        or in last `recent` seconds of history
+        """
+
+        with self.history_lock:
+            first, last = self.history.get_range(fuzzer)
+            if first is None:
+                return self.history.version, [first, last], []
+            start = first if start is None else start
+            end = last if end is None else end
+            if recent is not None:
+                start, end = max(first, last - recent), last
+            points = self.history.query(metric, start, end, points, fuzzer)
+            return self.history.version, [first, last], points
+
+    def get_snapshot(self):
+        """
+        Returns version, time of last change, common stats and list of fuzzers
+        """
 
         self.lock.acquire()
-        self.stats = all_stats
-        self.common_stats = common_stats
+        snapshot = self.version, self.modified, self.common_stats, self.fuzzers
         self.lock.release()
+        return snapshot
 
     def run(self):
         while True:
@@ -237,46 +410,13 @@ class StatsLoader(Thread):
             if self._stop_evt.is_set():
                 break
 
+    def stopped(self):
+        return self._stop_evt.is_set()
+
     def stop(self):
         self._stop_evt.set()
-
-
-class WebApp(Flask):
-    def __init__(self, appname, syncdir):
-        super().__init__(appname)
-        self.stats_lock = Lock()
-        self.stats_loader = StatsLoader(syncdir, self.stats_lock)
-
-        @self.route("/", methods=["GET"])
-        def _index():
-            return self.render_index()
-
-        @self.route("/favicon.ico")
-        def _favicon():
-            return send_from_directory(
-                os.path.join(self.root_path, "static"),
-                "favicon.ico",
-                mimetype="image/x-icon",
-            )
-
-    def stop_stats_loader(self):
-        self.stats_loader.stop()
-
-    def load_stats(self):
-        self.stats_lock.acquire()
-        fuzz_stats = self.stats_loader.stats
-        common_stats = self.stats_loader.common_stats
-        self.stats_lock.release()
-        return common_stats, fuzz_stats
-
-    def render_index(self):
-        now = datetime.now()
-        curtime_fmt = now.strftime(r"%H:%M:%S %d.%m.%Y")
-        comm_stats, fuzz_stats = self.load_stats()
-        comm_stats["curtime_fmt"] = curtime_fmt
-        return render_template(
-            "index.html", fuzzer_stats=fuzz_stats, common_stats=comm_stats
-        )
+        with self.changed:
+            self.changed.notify_all()  # release clients waiting for changes
 
 
 def main():
@@ -287,7 +427,27 @@ def main():
     )
 
     parser.add_argument(
-        "-o", "--sync-dir", help="fuzzer sync directory", type=str, required=True
+        "-o",
+        "--sync-dir",
+        help="fuzzer sync directory (may be used many times)",
+        action="append",
+        default=[],
+        type=str,
+    )
+    parser.add_argument(
+        "-c",
+        "--campaigns-dir",
+        help="directory with sync directories of many campaigns (may be used many times)",
+        action="append",
+        default=[],
+        type=str,
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        help="number of threads loading stats of campaigns (default: %(default)s)",
+        type=int,
+        default=4,
     )
     parser.add_argument(
         "-p", "--port", help="port to bind to", type=int, default="8080"
@@ -305,10 +465,26 @@ def main():
 
     args = parser.parse_args()
 
-    print("Using sync dir:", args.sync_dir)
+    if len(args.sync_dir) < 1 and len(args.campaigns_dir) < 1:
+        sys.exit("Error: please specify sync dir (-o) or campaigns dir (-c)")
+    if args.workers < 1:
+        sys.exit("Error: number of workers must be positive")
+
+    for sync_dir in args.sync_dir:
+        print("Using sync dir:", sync_dir)
+    for campaigns_dir in args.campaigns_dir:
+        print("Using campaigns dir:", campaigns_dir)
     print("Trying to start web server on http://%s:%s.." % (args.addr, args.port))
 
-    app = WebApp(__name__, args.sync_dir)
+    try:  # flask takes long to import, so it's only loaded to serve pages
+        from fuzzaide.tools.fuzz_webview.webapp import WebApp
+    except ImportError as e:
+        sys.exit(
+            "Can't load flask (%s). Please install it: "
+            "python3 -m pip install -U flask --user" % (e,)
+        )
+
+    app = WebApp(__name__, args.sync_dir, args.campaigns_dir, args.workers)
     app.run(host=args.addr, port=args.port, debug=args.verbose > 0)
     print("\nLeaving..")
     app.stop_stats_loader()
@@ -0,0 +1,371 @@
+# file    :  fuzz_webview/plot_history.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+History of fuzzers from their plot_data files: files are followed from saved offsets,
+rows are kept in array-backed series with coarser levels for long ranges,
+range queries are downsampled with LTTB (largest triangle three buckets)
+"""
+
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+# chart name -> column names of plot_data (AFL++ 4.00+ first, then older AFL/AFL++)
+PLOT_METRICS = {
+    "execs_per_sec": ("execs_per_sec",),
+    "corpus_count": ("corpus_count", "paths_total"),
+    "coverage": ("map_size",),
+    "crashes": ("saved_crashes", "unique_crashes"),
+}
+# how values of fuzzers are combined in aggregate charts
+PLOT_AGGREGATE = {
+    "execs_per_sec": sum,
+    "corpus_count": sum,
+    "coverage": max,
+    "crashes": sum,
+}
+# columns of original AFL, used when plot_data has no header
+PLOT_DEFAULT_COLUMNS = (
+    "unix_time, cycles_done, cur_path, paths_total, pending_total, pending_favs, "
+    "map_size, unique_crashes, unique_hangs, max_depth, execs_per_sec"
+).split(", ")
+
+# points of level folded into one min and one max point of next level
+SERIES_BUCKET = 16
+# use coarsest level that still has this many points per output point
+LTTB_OVERSAMPLE = 4
+PLOT_READ_SIZE = 1048576
+PLOT_STALE_SEC = 60.0  # afl-fuzz appends to plot_data every 5 seconds
+
+
+def lttb(times, values, threshold):
+    """
+    Downsample points to `threshold` points keeping visual shape (Steinarsson's
+    largest triangle three buckets). Returns lists of times and values
+    """
+
+    n = len(times)
+    if threshold >= n or threshold < 3:
+        return list(times), list(values)
+
+    out_t = [times[0]]
+    out_v = [values[0]]
+    every = (n - 2) / float(threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # average of next bucket is the third point of triangles
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        count = next_end - next_start
+        avg_t = sum(times[next_start:next_end]) / count
+        avg_v = sum(values[next_start:next_end]) / count
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        at, av = times[a], values[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((at - avg_t) * (values[j] - av) - (at - times[j]) * (avg_v - av))
+            if area > best_area:
+                best, best_area = j, area
+        out_t.append(times[best])
+        out_v.append(values[best])
+        a = best
+
+    out_t.append(times[-1])
+    out_v.append(values[-1])
+    return out_t, out_v
+
+
+class Series:
+    """
+    Time series in arrays (8 bytes per time, 4 bytes per value). Level 0 has all
+    points, every next level keeps min and max of each SERIES_BUCKET points of
+    previous level, so queries of long ranges don't touch millions of points
+    """
+
+    def __init__(self):
+        self.levels = [[array("d"), array("f")]]
+        self.folded = [0]  # number of points of each level folded into next level
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    def extend(self, times, values):
+        """
+        Append points, `times` must not be less than time of last point
+        """
+
+        self.levels[0][0].extend(times)
+        self.levels[0][1].extend(values)
+
+        level = 0
+        while len(self.levels[level][0]) - self.folded[level] >= SERIES_BUCKET:
+            self.fold(level)
+            level += 1
+
+    def fold(self, level):
+        """
+        Fold all complete buckets of `level` into next level
+        """
+
+        if level + 1 >= len(self.levels):
+            self.levels.append([array("d"), array("f")])
+            self.folded.append(0)
+
+        times, values = self.levels[level]
+        next_times, next_values = self.levels[level + 1]
+        start = self.folded[level]
+        while len(times) - start >= SERIES_BUCKET:
+            bucket = values[start : start + SERIES_BUCKET]
+            lo = bucket.index(min(bucket))
+            hi = bucket.index(max(bucket))
+            for i in sorted({lo, hi}):
+                next_times.append(times[start + i])
+                next_values.append(bucket[i])
+            start += SERIES_BUCKET
+        self.folded[level] = start
+
+    def get_points(self, start, end, limit):
+        """
+        Returns times and values in [start, end] from the coarsest level with
+        at least `limit` points in this range. Points not yet folded into that level
+        are taken from finer levels
+        """
+
+        level = 0
+        while level + 1 < len(self.levels):
+            times = self.levels[level + 1][0]
+            if bisect_right(times, end) - bisect_left(times, start) < limit:
+                break
+            level += 1
+        return self.get_level_points(level, start, end)
+
+    def get_level_points(self, level, start, end):
+        times, values = self.levels[level]
+        i = bisect_left(times, start)
+        j = bisect_right(times, end)
+        out_t, out_v = list(times[i:j]), list(values[i:j])
+        if level == 0:
+            return out_t, out_v
+
+        # points of finer level newer than the last point folded into this one
+        covered = times[-1] if len(times) > 0 else float("-inf")
+        tail_t, tail_v = self.get_level_points(level - 1, max(start, covered), end)
+        k = bisect_right(tail_t, covered)
+        return out_t + tail_t[k:], out_v + tail_v[k:]
+
+    def query(self, start, end, points):
+        times, values = self.get_points(start, end, points * LTTB_OVERSAMPLE)
+        return lttb(times, values, points)
+
+
+class PlotFile:
+    """
+    plot_data of one fuzzer followed from saved offset: only appended bytes are read
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.inode = None
+        self.partial = b""  # last line not yet complete
+        self.columns = None  # list of [metric, column index]
+        self.relative_time = False
+        self.last_time = float("-inf")
+        self.series = dict((metric, Series()) for metric in PLOT_METRICS)
+
+    def set_columns(self, names):
+        self.relative_time = names[0] == "relative_time"
+        self.columns = list()
+        for metric, aliases in PLOT_METRICS.items():
+            for alias in aliases:
+                if alias in names:
+                    self.columns.append([metric, names.index(alias)])
+                    break
+
+    def update(self, time_base=0):
+        """
+        Read rows appended since last call. Relative times of AFL++ 4.00+ are added
+        to `time_base` (unix time when fuzzer's run_time was 0).
+        Returns number of rows read
+        """
+
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return 0
+
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.reset()  # file was recreated or truncated
+            self.inode = st.st_ino
+        if st.st_size == self.offset:
+            return 0
+
+        rows = 0
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                while True:
+                    data = f.read(PLOT_READ_SIZE)
+                    if not data:
+                        break
+                    self.offset += len(data)
+                    lines = (self.partial + data).split(b"\n")
+                    self.partial = lines.pop()
+                    rows += self.parse_lines(lines, time_base)
+        except OSError:
+            pass
+        return rows
+
+    def parse_lines(self, lines, time_base):
+        """
+        Parse complete lines and append their values to series at once.
+        Returns number of rows parsed
+        """
+
+        times = array("d")
+        columns = [[metric, i, array("f")] for metric, i in self.columns or ()]
+        last_time = self.last_time
+        for line in lines:
+            if line.startswith(b"#"):
+                self.flush(times, columns)
+                names = [
+                    n.strip() for n in line[1:].decode(errors="replace").split(",")
+                ]
+                self.set_columns(names)
+                times = array("d")
+                columns = [[metric, i, array("f")] for metric, i in self.columns]
+                continue
+            if self.columns is None:
+                self.set_columns(PLOT_DEFAULT_COLUMNS)
+                columns = [[metric, i, array("f")] for metric, i in self.columns]
+
+            fields = line.split(b",")
+            try:
+                t = float(fields[0])
+                # map_size is like "1.50%"
+                row = [float(fields[i].rstrip(b"% \r")) for _, i, _ in columns]
+            except (ValueError, IndexError):
+                continue  # broken or empty line
+
+            if self.relative_time:
+                t += time_base
+            if t < last_time:
+                t = last_time  # keep time sorted for bisect
+            last_time = t
+            times.append(t)
+            for column, value in zip(columns, row):
+                column[2].append(value)
+
+        self.last_time = last_time
+        return self.flush(times, columns)
+
+    def flush(self, times, columns):
+        for metric, _, values in columns:
+            self.series[metric].extend(times, values)
+        return len(times)
+
+
+class PlotHistory:
+    """
+    plot_data files of all fuzzers of sync dir. Version changes when new rows are read
+    """
+
+    def __init__(self):
+        self.files = dict()  # fuzzer name -> PlotFile
+        self.version = 0
+        self.modified = time.time()  # time of last change
+        self.num_rows = 0
+
+    def update(self, fuzzers):
+        """
+        `fuzzers` is a list of [name, fuzzer dir, time base]. Returns number of new rows
+        """
+
+        rows = 0
+        for name, fuzzer_dir, time_base in fuzzers:
+            plot = self.files.get(name)
+            if plot is None:
+                plot = self.files[name] = PlotFile(
+                    os.path.join(fuzzer_dir, "plot_data")
+                )
+            rows += plot.update(time_base)
+
+        if rows > 0:
+            self.num_rows += rows
+            self.version += 1
+            self.modified = time.time()
+        return rows
+
+    def get_range(self, fuzzer=None):
+        """
+        Returns [first time, last time] of history of fuzzer (all fuzzers if None)
+        """
+
+        first, last = None, None
+        for name, plot in self.files.items():
+            if fuzzer is not None and name != fuzzer:
+                continue
+            times = plot.series["execs_per_sec"].levels[0][0]
+            if len(times) > 0:
+                first = times[0] if first is None else min(first, times[0])
+                last = times[-1] if last is None else max(last, times[-1])
+        return first, last
+
+    def query(self, metric, start, end, points, fuzzer=None):
+        """
+        Returns [[time, value], ...] of at most `points` points for one fuzzer
+        or for all of them combined
+        """
+
+        if fuzzer is not None:
+            plot = self.files.get(fuzzer)
+            if plot is None:
+                return []
+            times, values = plot.series[metric].query(start, end, points)
+            return [[t, v] for t, v in zip(times, values)]
+
+        return self.query_aggregate(metric, start, end, points)
+
+    def query_aggregate(self, metric, start, end, points):
+        """
+        Values of all fuzzers on a grid of `points` steps: last value of each fuzzer
+        before end of every step (or its previous value) combined by PLOT_AGGREGATE
+        """
+
+        if end <= start or points < 1:
+            return []
+        step = (end - start) / float(points)
+        grid = [start + step * (i + 1) for i in range(points)]
+        combined = [[] for _ in range(points)]
+
+        for plot in self.files.values():
+            series = plot.series[metric]
+            if len(series) < 1:
+                continue
+            # fuzzers that stopped writing plot_data don't count after their last row
+            until = series.levels[0][0][-1] + max(step, PLOT_STALE_SEC)
+            before_t, before_v = series.get_points(float("-inf"), start, 1)
+            times, values = series.get_points(start, end, points * LTTB_OVERSAMPLE)
+            last = before_v[-1] if len(before_v) > 0 else None
+            j = 0
+            for i, t in enumerate(grid):
+                if t > until:
+                    break
+                while j < len(times) and times[j] <= t:
+                    last = values[j]
+                    j += 1
+                if last is not None:
+                    combined[i].append(last)
+
+        aggregate = PLOT_AGGREGATE[metric]
+        return [[t, aggregate(c)] for t, c in zip(grid, combined) if len(c) > 0]
@@ -0,0 +1,18 @@
+// helpers shared by pages of fuzz webview
+
+function formatSeconds(seconds) {
+	seconds = Math.max(0, Math.floor(seconds));
+	const s = seconds % 60, m = Math.floor(seconds / 60) % 60;
+	const h = Math.floor(seconds / 3600) % 24, d = Math.floor(seconds / 86400);
+	if (d > 0) return `${d} days, ${h} hrs, ${m} min, ${s} sec`;
+	if (h > 0) return `${h} hrs, ${m} min, ${s} sec`;
+	if (m > 0) return `${m} min, ${s} sec`;
+	return `${s} sec`;
+}
+
+function formatCount(n) {
+	if (n >= 1e9) return (n / 1e9).toFixed(4) + "B";
+	if (n >= 1e6) return (n / 1e6).toFixed(2) + "M";
+	if (n >= 1e3) return (n / 1e3).toFixed(2) + "K";
+	return String(n);
+}
@@ -0,0 +1,348 @@
+# file    :  fuzz_webview/webapp.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Flask app of fuzz webview, kept apart so flask is only imported to serve pages
+"""
+
+import os
+import json
+import time
+from threading import Lock
+from urllib.parse import quote
+
+from flask import Flask, Response, abort, render_template, request, send_from_directory
+
+from fuzzaide.tools.fuzz_webview.fuzz_webview import StatsLoader
+from fuzzaide.tools.fuzz_webview.federation import Federation
+from fuzzaide.tools.fuzz_webview.plot_history import PLOT_METRICS
+
+SSE_HEARTBEAT_SEC = 15.0
+SSE_RETRY_MS = 3000  # how soon browsers reconnect to event stream
+HISTORY_POINTS = 500  # default and maximum number of points of history charts
+HISTORY_CACHE_SIZE = 64  # max bodies of queries with parameters kept per version
+FEDERATION_WORKERS = 4
+
+
+class WebApp(Flask):
+    """
+    Page with stats of fuzzers and JSON API it's updated from:
+        /api/stats             - totals of all fuzzers
+        /api/fuzzers[?since=V] - stats of all fuzzers (or only ones changed after version V)
+        /api/fuzzers/NAME      - stats of one fuzzer
+        /api/events            - server-sent events: snapshot on connect, then deltas
+        /api/loader            - cost of last reload of stats (not cached)
+        /api/history?metric=M[&fuzzer=NAME][&start=T][&end=T|&last=SEC][&points=N]
+                               - points of plot_data chart of fuzzer or of all fuzzers
+    API responses have ETag and Last-Modified of stats snapshot and are answered
+    with 304 until stats change. JSON bodies are cached per snapshot version,
+    deltas are serialized once by StatsLoader and sent as is to every client.
+
+    With many sync dirs (or campaigns dirs, whose subdirs are sync dirs) the page
+    at / is a summary of campaigns (from /api/campaigns), and every campaign has
+    the page and API above under /c/CAMPAIGN/. Campaigns are loaded by Federation
+    """
+
+    def __init__(
+        self, appname, syncdirs, campaigns_dirs=(), workers=FEDERATION_WORKERS
+    ):
+        super().__init__(appname)
+        if isinstance(syncdirs, str):
+            syncdirs = [syncdirs]
+
+        self.stats_loader = None  # of single sync dir
+        self.federation = None
+        if len(syncdirs) == 1 and len(campaigns_dirs) < 1:
+            self.stats_lock = Lock()
+            self.stats_loader = StatsLoader(syncdirs[0], self.stats_lock)
+        else:
+            self.federation = Federation(syncdirs, campaigns_dirs, workers)
+
+        # ETags of previous run of webview must not match after restart
+        self.etag_prefix = "%x" % (int(time.time()),)
+        # key like (campaign, "fuzzer", name) -> [version, body]
+        self.json_cache = dict()
+        self.json_cache_lock = Lock()
+
+        @self.route("/", methods=["GET"])
+        def _index():
+            if self.federation is not None:
+                return self.render_campaigns()
+            return self.render_index()
+
+        @self.route("/api/campaigns", methods=["GET"])
+        def _api_campaigns():
+            return self.api_campaigns()
+
+        @self.route("/c/<campaign>/", methods=["GET"])
+        def _campaign_index(campaign):
+            self.get_loader(campaign)  # 404 for unknown campaigns
+            return self.render_index(campaign)
+
+        for path, view in (
+            ("/api/stats", self.api_stats),
+            ("/api/fuzzers", self.api_fuzzers),
+            ("/api/fuzzers/<name>", self.api_fuzzer),
+            ("/api/events", self.api_events),
+            ("/api/loader", self.api_loader),
+            ("/api/history", self.api_history),
+        ):
+            endpoint = path.replace("/", "_").replace("<name>", "name")
+            self.add_url_rule(path, endpoint, view, methods=["GET"])
+            self.add_url_rule(
+                "/c/<campaign>" + path, "c" + endpoint, view, methods=["GET"]
+            )
+
+        @self.route("/favicon.ico")
+        def _favicon():
+            return send_from_directory(
+                os.path.join(self.root_path, "static"),
+                "favicon.ico",
+                mimetype="image/x-icon",
+            )
+
+    def stop_stats_loader(self):
+        if self.federation is not None:
+            self.federation.stop()
+        else:
+            self.stats_loader.stop()
+
+    def get_loader(self, campaign=None):
+        """
+        Returns StatsLoader of single sync dir (campaign is None) or of campaign
+        """
+
+        if campaign is None:
+            if self.stats_loader is None:
+                abort(404)  # there are many campaigns, see /api/campaigns
+            return self.stats_loader
+
+        if self.federation is None:
+            if campaign != self.get_campaign_name():
+                abort(404)
+            return self.stats_loader
+        found = self.federation.get_campaign(campaign)
+        if found is None:
+            abort(404)
+        return found.loader
+
+    def get_campaign_name(self):
+        return os.path.basename(os.path.abspath(self.stats_loader.dir))
+
+    def get_json_body(self, key, version, build):
+        """
+        Returns JSON body for `key` built by `build()` once per snapshot version
+        """
+
+        with self.json_cache_lock:
+            entry = self.json_cache.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+            body = json.dumps(build(), separators=(",", ":"))
+            if key[1] in ("fuzzers", "history"):  # many bodies per version
+                same = [k for k in self.json_cache if k[:2] == key[:2]]
+                full = len(same) >= HISTORY_CACHE_SIZE  # e.g. clients asking odd ranges
+                for k in same:
+                    if full or self.json_cache[k][0] != version:
+                        del self.json_cache[k]
+            self.json_cache[key] = [version, body]
+            return body
+
+    def conditional_json(self, version, modified, key, build):
+        etag = "%s-%d" % (self.etag_prefix, version)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)  # the cheap path: nothing to build or send
+        else:
+            response = Response(
+                self.get_json_body(key, version, build), mimetype="application/json"
+            )
+
+        response.set_etag(etag)
+        response.last_modified = int(modified)
+        response.cache_control.no_cache = True  # always revalidate
+        if response.status_code == 304:
+            return response
+        return response.make_conditional(request)
+
+    def api_campaigns(self):
+        if self.federation is not None:
+            version, modified, campaigns = self.federation.get_summary()
+        else:
+            version, modified, common_stats, _ = self.stats_loader.get_snapshot()
+            campaigns = [
+                {
+                    "name": self.get_campaign_name(),
+                    "dir": os.path.abspath(self.stats_loader.dir),
+                    "status": "ok",
+                    "error": None,
+                    "stats": common_stats,
+                }
+            ]
+
+        return self.conditional_json(
+            version,
+            modified,
+            (None, "campaigns"),
+            lambda: {"version": version, "campaigns": campaigns},
+        )
+
+    def api_stats(self, campaign=None):
+        version, modified, common_stats, _ = self.get_loader(campaign).get_snapshot()
+        return self.conditional_json(
+            version,
+            modified,
+            (campaign, "stats"),
+            lambda: {"version": version, "stats": common_stats},
+        )
+
+    def api_fuzzers(self, campaign=None):
+        version, modified, _, fuzzers = self.get_loader(campaign).get_snapshot()
+        since = request.args.get("since", default=-1, type=int)
+
+        def build():
+            return {
+                "version": version,
+                "names": [f["name"] for f in fuzzers],
+                "fuzzers": [f for f in fuzzers if f["version"] > since],
+            }
+
+        key = (campaign, "fuzzers", since)
+        return self.conditional_json(version, modified, key, build)
+
+    def api_fuzzer(self, name, campaign=None):
+        _, _, _, fuzzers = self.get_loader(campaign).get_snapshot()
+        for fuzzer in fuzzers:
+            if fuzzer["name"] == name:
+                return self.conditional_json(
+                    fuzzer["version"],
+                    fuzzer["modified"],
+                    (campaign, "fuzzer", name),
+                    lambda: fuzzer,
+                )
+        abort(404)
+
+    def api_history(self, campaign=None):
+        loader = self.get_loader(campaign)
+        metric = request.args.get("metric", default="execs_per_sec", type=str)
+        if metric not in PLOT_METRICS:
+            abort(404)
+        fuzzer = request.args.get("fuzzer", default=None, type=str) or None
+        start = request.args.get("start", default=None, type=float)
+        end = request.args.get("end", default=None, type=float)
+        recent = request.args.get("last", default=None, type=float)
+        points = request.args.get("points", default=HISTORY_POINTS, type=int)
+        points = max(3, min(points, HISTORY_POINTS))
+
+        version, modified = loader.history.version, loader.history.modified
+        key = (campaign, "history", metric, fuzzer, start, end, recent, points)
+
+        def build():
+            _, time_range, data = loader.get_history(
+                metric, start, end, points, fuzzer, recent
+            )
+            return {
+                "version": version,
+                "metric": metric,
+                "fuzzer": fuzzer,
+                "range": time_range,
+                "points": data,
+            }
+
+        return self.conditional_json(version, modified, key, build)
+
+    def api_loader(self, campaign=None):
+        response = Response(
+            json.dumps(self.get_loader(campaign).load_info), mimetype="application/json"
+        )
+        response.cache_control.no_store = True
+        return response
+
+    def get_last_event_version(self):
+        """
+        Returns snapshot version from Last-Event-ID of reconnecting client or None
+        """
+
+        last_id = request.headers.get("Last-Event-ID")
+        if not last_id:
+            return None
+
+        prefix, _, version = last_id.rpartition("-")
+        if prefix != self.etag_prefix:
+            return None  # id given by previous run of webview
+        try:
+            return int(version)
+        except ValueError:
+            return None
+
+    def format_event(self, event, version, data):
+        return "id: %s-%d\nevent: %s\ndata: %s\n\n" % (
+            self.etag_prefix,
+            version,
+            event,
+            data,
+        )
+
+    def get_snapshot_event(self, loader, campaign):
+        version, _, common_stats, fuzzers = loader.get_snapshot()
+        body = self.get_json_body(
+            (campaign, "snapshot"),
+            version,
+            lambda: {
+                "version": version,
+                "stats": common_stats,
+                "names": [f["name"] for f in fuzzers],
+                "fuzzers": fuzzers,
+            },
+        )
+        return version, self.format_event("snapshot", version, body)
+
+    def api_events(self, campaign=None):
+        loader = self.get_loader(campaign)
+        last_version = self.get_last_event_version()
+
+        def heartbeat():
+            # keeps proxies from closing idle stream and tells clients server time
+            return "event: heartbeat\ndata: %.3f\n\n" % (time.time(),)
+
+        def stream():
+            version = last_version
+            yield "retry: %d\n\n" % (SSE_RETRY_MS,)
+            yield heartbeat()
+            while True:
+                deltas = None
+                if version is not None:
+                    deltas = loader.get_deltas_since(version)
+
+                if deltas is None:  # new client or missed too much: send everything
+                    version, event = self.get_snapshot_event(loader, campaign)
+                    yield event
+                else:
+                    for version, delta in deltas:
+                        yield self.format_event("delta", version, delta)
+
+                if loader.stopped():
+                    break
+                if not loader.wait_for_change(version, SSE_HEARTBEAT_SEC):
+                    yield heartbeat()
+
+        return Response(
+            stream(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    def render_index(self, campaign=None):
+        api_root = "" if campaign is None else "/c/" + quote(campaign)
+        return render_template(
+            "index.html",
+            campaign=campaign,
+            api_root=api_root,
+            federated=self.federation is not None,
+        )
+
+    def render_campaigns(self):
+        return render_template("campaigns.html")
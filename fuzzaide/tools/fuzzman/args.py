@@ -4,11 +4,15 @@
 # license :  MIT
 # check repository for more information
 
+import os
 import sys
+import shlex
 import argparse
+import configparser
 from multiprocessing import cpu_count
 
 from fuzzaide.common import FuzzaideArgumentParser
+from .presets import get_preset, parse_ram_size
 
 
 def get_launch_args():
@@ -24,8 +28,173 @@ def get_launch_args():
     return args
 
 
-def create_argument_parser():
+def get_bench_args(argv):
+    parser = create_argument_parser(prog="fuzzman bench")
+    add_bench_args_to_parser(parser)
+    add_bench_examples_to_parser(parser)
+
+    if len(argv) < 1:
+        parser.print_help()
+        sys.exit(0)
+
+    args = parser.parse_args(argv)
+    check_args_for_common_mistakes(args)
+    check_bench_args_for_common_mistakes(args)
+
+    return args
+
+
+def get_multi_args(argv):
+    parser = FuzzaideArgumentParser(
+        prog="fuzzman multi",
+        description="%(prog)s - fuzz several targets on a shared pool of cores, "
+        "time-slicing their instances with SIGSTOP/SIGCONT",
+    )
+    add_multi_args_to_parser(parser)
+    add_multi_examples_to_parser(parser)
+
+    if len(argv) < 1:
+        parser.print_help()
+        sys.exit(0)
+
+    args = parser.parse_args(argv)
+    check_multi_args_for_common_mistakes(args)
+
+    return args
+
+
+def read_named_args_file(path):
+    """
+    Read file with lines like 'name : fuzzman arguments'. Returns list of [name, argv].
+    Empty lines and lines starting with # are skipped
+    """
+
+    try:
+        with open(path, "r") as f:
+            lines = f.readlines()
+    except OSError as e:
+        sys.exit("Error: can't read '%s': %s" % (path, e))
+
+    entries = []
+    for lineno, line in enumerate(lines, start=1):
+        line = line.strip()
+        if len(line) < 1 or line.startswith("#"):
+            continue
+
+        name, sep, rest = line.partition(":")
+        name = name.strip()
+        if not sep or len(name) < 1:
+            sys.exit(
+                "Error: bad line %d in '%s', expected 'name : fuzzman arguments'"
+                % (lineno, path)
+            )
+        entries.append([name, shlex.split(rest)])
+
+    if len(entries) < 1:
+        sys.exit("Error: nothing to run in '%s'" % (path,))
+
+    names = [name for name, _ in entries]
+    if len(set(names)) != len(names):
+        sys.exit("Error: names in '%s' should be unique" % (path,))
+
+    return entries
+
+
+def get_multi_target_args(name, argv):
+    """
+    Parse fuzzman arguments of one target of `fuzzman multi`
+    """
+
+    parser = create_argument_parser(prog="fuzzman multi (target '%s')" % (name,))
+    parser.add_argument(
+        "--weight",
+        metavar="W",
+        help="relative share of cores for this target (default: 1)",
+        default=1.0,
+        type=float,
+    )
+
+    args = parser.parse_args(argv)
+    if args.weight <= 0.0:
+        sys.exit("Error: --weight of target '%s' should be positive" % (name,))
+
+    if args.output_dir is None:
+        sys.exit("Error: target '%s' should have its own output dir (-o)" % (name,))
+
+    if args.dump_cmd_file:
+        sys.exit("Error: option --dump-cmd-file is not supported by fuzzman multi")
+
+    if args.throttle:
+        sys.exit("Error: option --throttle is not supported by fuzzman multi")
+
+    check_args_for_common_mistakes(args)
+
+    return args
+
+
+def get_queue_args(argv):
     parser = FuzzaideArgumentParser(
+        prog="fuzzman queue",
+        description="%(prog)s - run queued fuzzman jobs back to back, "
+        "starting each one as soon as there are enough free cores",
+    )
+    add_queue_args_to_parser(parser)
+    add_queue_examples_to_parser(parser)
+
+    if len(argv) < 1:
+        parser.print_help()
+        sys.exit(0)
+
+    args = parser.parse_args(argv)
+    check_queue_args_for_common_mistakes(args)
+
+    return args
+
+
+def get_queue_job_args(name, argv):
+    """
+    Parse fuzzman arguments of one job of `fuzzman queue`
+    """
+
+    parser = create_argument_parser(prog="fuzzman queue (job '%s')" % (name,))
+    parser.add_argument(
+        "--priority",
+        metavar="P",
+        help="jobs with higher priority start first (default: 0)",
+        default=0,
+        type=int,
+    )
+
+    args = parser.parse_args(argv)
+    if args.output_dir is None:
+        sys.exit("Error: job '%s' should have its own output dir (-o)" % (name,))
+
+    if args.dump_cmd_file:
+        sys.exit("Error: option --dump-cmd-file is not supported by fuzzman queue")
+
+    check_args_for_common_mistakes(args)
+
+    return args
+
+
+def get_selfbench_args(argv):
+    parser = FuzzaideArgumentParser(
+        prog="fuzzman selfbench",
+        description="%(prog)s - measure CPU, memory and threads used by fuzzman and "
+        "how fast it stops the job, running it with fake afl-fuzz workers",
+    )
+    add_selfbench_args_to_parser(parser)
+    add_selfbench_examples_to_parser(parser)
+
+    args = parser.parse_args(argv)
+    check_selfbench_args_for_common_mistakes(args)
+
+    return args
+
+
+def create_argument_parser(prog=None):
+    parser = FuzzaideArgumentParser(
+        prog=prog,
         description="%(prog)s - your humble assistant to automate and manage fuzzing tasks",
         epilog="developed and tested by fuzzah for using with AFL++",
     )
@@ -71,9 +240,10 @@ def add_args_to_parser(parser):
     parser.add_argument(
         "--builds",
         nargs="+",
-        metavar="[NAME:]<dir/bin path>[:N[%]]",
+        metavar="[NAME:]<dir/bin path>[:N[%]][,cmplog=PATH[,cmplog-ratio=R]]",
         help="specify multiple binaries for fuzzing and number or percent of cores to use"
-        "(default: fuzz only one binary provided as the last argument)",
+        "(default: fuzz only one binary provided as the last argument). "
+        "Build with cmplog=PATH gets -c PATH for R (default: 0.3) of its instances",
         default=None,
     )
     parser.add_argument(
@@ -111,6 +281,28 @@ def add_args_to_parser(parser):
         help="additional arguments for fuzzer, added last (default: no arguments)",
         default=None,
     )
+    parser.add_argument(
+        "--preset",
+        metavar="NAME",
+        help="set AFL++ performance environment variables per worker role (main, secondary, "
+        "sanitizer, cmplog) from preset: fast, balanced, lowmem or one from --preset-file "
+        "(default: don't set)",
+        default=None,
+    )
+    parser.add_argument(
+        "--preset-file",
+        metavar="PATH",
+        help="INI file with more presets: section [NAME] holds variables for all roles "
+        "and options 'pin = yes' and 'inherit = OTHER', sections [NAME:ROLE] hold variables of role",
+        default=None,
+    )
+    parser.add_argument(
+        "--ram-budget",
+        metavar="SIZE",
+        help="scale AFL_TESTCACHE_SIZE of preset down so test case caches of all workers "
+        "fit into SIZE (e.g. 16G, default: no limit)",
+        default=None,
+    )
     parser.add_argument(
         "--fuzzer-binary",
         metavar="PATH",
@@ -131,6 +323,120 @@ def add_args_to_parser(parser):
         default=None,
         type=int,
     )
+    parser.add_argument(
+        "--max-job-duration",
+        metavar="N",
+        help="stop fuzzing job N seconds after start regardless of other conditions "
+        "(default: don't stop)",
+        default=None,
+        type=int,
+    )
+    parser.add_argument(
+        "--sync-groups",
+        metavar="N",
+        help="split instances into N groups with separate output dirs and relay new test cases "
+        "between groups (default: all instances share one output dir)",
+        default=None,
+        type=int,
+    )
+    parser.add_argument(
+        "--sync-interval",
+        metavar="N",
+        help="relay test cases between sync groups every N seconds (default: 60)",
+        default=60,
+        type=int,
+    )
+    parser.add_argument(
+        "--seed-drop",
+        metavar="DIR",
+        help="inject new files put into DIR (or its subdirectories named after their sources) "
+        "into running job (default: don't watch for new seeds)",
+        default=None,
+    )
+    parser.add_argument(
+        "--seed-drop-interval",
+        metavar="N",
+        help="check --seed-drop directory every N seconds (default: 10)",
+        default=10,
+        type=int,
+    )
+    parser.add_argument(
+        "--coverage",
+        help="measure edge coverage of merged corpus of all instances in background "
+        "with afl-showmap (default: don't measure)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--coverage-llvm",
+        metavar="PATH",
+        help="measure line/region/branch coverage with llvm-cov using PATH built with "
+        "-fprofile-instr-generate -fcoverage-mapping instead of afl-showmap",
+        default=None,
+    )
+    parser.add_argument(
+        "--coverage-interval",
+        metavar="N",
+        help="measure coverage of new queue entries every N seconds (default: 300)",
+        default=300,
+        type=int,
+    )
+    parser.add_argument(
+        "--coverage-jobs",
+        metavar="N",
+        help="number of parallel coverage runs (default: 1)",
+        default=1,
+        type=int,
+    )
+    parser.add_argument(
+        "--disk-guard",
+        help="watch free space on filesystem of output dir: compress cold artifacts into "
+        "per-worker archives and pause secondary instances when space runs low",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--disk-min-free",
+        metavar="SIZE",
+        help="pause secondary instances while free space is below SIZE (default: 1G)",
+        default="1G",
+    )
+    parser.add_argument(
+        "--disk-compact-free",
+        metavar="SIZE",
+        help="compact cold artifacts while free space is below SIZE (default: 5G)",
+        default="5G",
+    )
+    parser.add_argument(
+        "--disk-cold-age",
+        metavar="N",
+        help="hangs older than N seconds are cold (default: 3600)",
+        default=3600,
+        type=int,
+    )
+    parser.add_argument(
+        "--provenance",
+        help="keep SQLite index of queue, crash and hang entries of all instances in output dir "
+        "(query it with: fuzzman provenance -h)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--auto-timeout",
+        help="measure execution times on input corpus before start and pass -t to all instances "
+        "(default: let fuzzer choose timeout)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--auto-timeout-percentile",
+        metavar="P",
+        help="percentile of measured execution times to base -t on (default: 99)",
+        default=99.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--auto-timeout-retune",
+        help="adjust -t at runtime based on rate of timeouts reported by fuzzers "
+        "(default: keep calibrated value)",
+        action="store_true",
+    )
     parser.add_argument(
         "--dump-screens",
         help="dump all status screens on job stop (default: don't dump)",
@@ -141,6 +447,109 @@ def add_args_to_parser(parser):
         help="dump fuzzer commands to put in file for --cmd-file)",
         action="store_true",
     )
+    parser.add_argument(
+        "--headless",
+        help="don't display status screens of fuzzers, only print job stats "
+        "(default: display status screens)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--dashboard",
+        help="show job totals and a row per worker instead of cycling through status "
+        "screens, open status screen of a worker with arrow keys and Enter "
+        "(default: cycle through status screens)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile",
+        help="measure time fuzzman itself spends in health checks, status checks, "
+        "drawing, reading output of fuzzers and parsing their stats, print its CPU usage "
+        "and RSS in job status and time of each phase on exit",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        metavar="PATH",
+        help="with --profile also run cProfile in main thread of fuzzman and save its stats "
+        "to PATH on exit (see: python -m pstats PATH)",
+        default=None,
+    )
+    parser.add_argument(
+        "--control-socket",
+        metavar="PATH",
+        help="serve control requests of 'fuzzman ctl' on this UNIX socket "
+        "(default: <output dir>/fuzzman.sock)",
+        default=None,
+    )
+    parser.add_argument(
+        "--no-control-socket",
+        help="don't serve control socket",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--no-event-log",
+        help="don't write starts, exits and restarts of workers, new crashes and "
+        "stop condition checks to <output dir>/fuzzman_events.ndjson",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--event-log-max-size",
+        metavar="SIZE",
+        help="rotate event log when it grows bigger than SIZE, 3 rotated files "
+        "are kept (default: 16M)",
+        default="16M",
+    )
+    parser.add_argument(
+        "--no-stall-monitor",
+        help="don't sample CPU, memory and I/O stalls of workers "
+        "(shown in job status and in <output dir>/fuzzman_stats)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--swap-batch",
+        metavar="N",
+        help="restart N workers at a time when swapping tested program "
+        "with 'fuzzman ctl swap' or SIGUSR1 (default: quarter of workers)",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--throttle",
+        help="pause part of secondary instances while host is under CPU or memory pressure "
+        "(default: don't pause)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--throttle-share",
+        metavar="F",
+        help="fraction of secondary instances to pause under pressure (default: 0.5)",
+        default=0.5,
+        type=float,
+    )
+    parser.add_argument(
+        "--throttle-cpu-psi",
+        metavar="P",
+        help="pause when tasks waited for CPU P%% of time in the last 10 seconds "
+        "according to /proc/pressure/cpu (default: 20)",
+        default=20.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--throttle-memory-psi",
+        metavar="P",
+        help="pause when tasks waited for memory P%% of time in the last 10 seconds "
+        "according to /proc/pressure/memory (default: 10)",
+        default=10.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--throttle-load",
+        metavar="L",
+        help="if PSI is not available, pause when load average not caused by this job "
+        "exceeds L per core (default: 0.5)",
+        default=0.5,
+        type=float,
+    )
     parser.add_argument(
         "-v", "--verbose", help="print more messages", action="store_true"
     )
@@ -193,6 +602,69 @@ def add_examples_to_parser(parser):
             r"Fuzz multiple builds giving them some build/group names (./app_laf will use 100%-50%-10% = 40% of available cores)",
             r"--builds basic:./app:10% something:./app2:50% addr:./app_asan:1 UB:./app_ubsan:1 paths:./app_laf -- ./app @@",
         ],
+        [
+            "Pass cmplog build ./app_cmplog with -c to half of instances of ./app "
+            "and compare their find rate to the other half",
+            "--builds ./app,cmplog=./app_cmplog,cmplog-ratio=0.5 ./app_asan:1 -- ./app @@",
+        ],
+        [
+            "Add 4 more instances to the job running in ./out without restarting it "
+            "(see fuzzman ctl -h)",
+            "ctl -o out/ add 4",
+        ],
+        [
+            "Move workers of running job to rebuilt ./myapp_v2, 2 workers at a time, "
+            "each batch waits for the previous one to finish calibration",
+            "ctl swap ./myapp_v2 --batch 2",
+        ],
+        [
+            "Measure execution times on input corpus and use 99th percentile x 2 as timeout, "
+            "raise timeout later if fuzzers hit it too often",
+            "--auto-timeout --auto-timeout-retune -- ./myapp @@",
+        ],
+        [
+            "Run 128 instances in 8 sync groups (out/group1 .. out/group8), "
+            "relay new test cases between groups every 2 minutes",
+            "-n 128 --sync-groups 8 --sync-interval 120 -- ./myapp @@",
+        ],
+        [
+            "Import files put into seeds/ (e.g. seeds/grammar/1, seeds/manual/2) into running job, "
+            "show which sources give seeds that fuzzers find interesting",
+            "--seed-drop seeds/ -- ./myapp @@",
+        ],
+        [
+            "Measure coverage of corpus of all instances every 10 minutes "
+            "with llvm-cov build ./myapp_cov in 4 parallel runs",
+            "--coverage-llvm ./myapp_cov --coverage-interval 600 --coverage-jobs 4 -- ./myapp @@",
+        ],
+        [
+            "Use preset tuned for throughput (test case cache, fast calibration, "
+            "pinning to cores) with caches of all instances fitting into 8 GB of RAM",
+            "-n 32 --preset fast --ram-budget 8G -- ./myapp @@",
+        ],
+        [
+            "Compress hangs older than a day into archives when less than 20 GB is free, "
+            "pause secondary instances when less than 2 GB is free",
+            "--disk-guard --disk-compact-free 20G --disk-min-free 2G --disk-cold-age 86400 -- ./myapp @@",
+        ],
+        [
+            "Index findings of all instances to see which workers and mutation operators "
+            "find most (see: fuzzman provenance -h)",
+            "--provenance -- ./myapp @@",
+        ],
+        [
+            "Watch 64 instances in a single screen over slow SSH connection",
+            "-n 64 --dashboard -- ./myapp @@",
+        ],
+        [
+            "Find out how much CPU fuzzman itself uses with 64 instances "
+            "and which of its phases are the most expensive",
+            "-n 64 --headless --profile --profile-dump fuzzman.prof -- ./myapp @@",
+        ],
+        [
+            "Pause half of secondary instances while host is busy with other tasks",
+            "--throttle --throttle-share 0.5 -- ./myapp @@",
+        ],
         [
             "Run fuzzer commands from file job.fzm instead of commands generated by fuzzman "
             "(format of each line is name:command, names should match fuzzer dirs in output dir)",
@@ -202,6 +674,275 @@ def add_examples_to_parser(parser):
     parser.set_examples(examples)
 
 
+def add_bench_args_to_parser(parser):
+    parser.add_argument(
+        "--bench-window",
+        metavar="N",
+        help="measure each instance count for N seconds (default: 90)",
+        default=90,
+        type=int,
+    )
+    parser.add_argument(
+        "--bench-threshold",
+        metavar="R",
+        help="recommend instance count after which each added instance gives less than R "
+        "of single instance throughput (default: 0.5)",
+        default=0.5,
+        type=float,
+    )
+
+
+def add_bench_examples_to_parser(parser):
+    examples = [
+        [
+            "Measure throughput of ./myapp at 1, 2, 4 ... cpu count instances",
+            "bench ./myapp @@",
+        ],
+        [
+            "Measure up to 48 instances for 2 minutes each",
+            "bench -n 48 --bench-window 120 -o /tmp/bench -- ./myapp @@",
+        ],
+    ]
+    parser.set_examples(examples)
+
+
+def add_multi_args_to_parser(parser):
+    parser.add_argument(
+        "targets_file",
+        help="file with one target per line in format 'name : fuzzman arguments', "
+        "arguments may include --weight W",
+    )
+    parser.add_argument(
+        "-n",
+        "--cores",
+        metavar="N",
+        help="number of instances running at the same time (default: cpu count {%d})"
+        % cpu_count(),
+        default=cpu_count(),
+        type=int,
+    )
+    parser.add_argument(
+        "--slice",
+        metavar="N",
+        help="reconsider which instances run every N seconds (default: 60)",
+        default=60,
+        type=int,
+    )
+
+
+def add_multi_examples_to_parser(parser):
+    examples = [
+        [
+            "Fuzz targets listed in jobs.txt on 16 cores, e.g. line "
+            "'png : --weight 2 -n 16 -i in_png -o out_png -- ./png_fuzz @@'",
+            "multi -n 16 jobs.txt",
+        ],
+        [
+            "Switch running instances every 5 minutes",
+            "multi --slice 300 jobs.txt",
+        ],
+    ]
+    parser.set_examples(examples)
+
+
+def check_multi_args_for_common_mistakes(args):
+    if args.cores < 1:
+        sys.exit("Error: bad value used for --cores (e.g. --cores 16)")
+
+    if args.slice < 10:
+        sys.exit(
+            "Error: bad value used for --slice. You should specify at least 10 seconds "
+            "(e.g. --slice 60)"
+        )
+
+
+def add_queue_args_to_parser(parser):
+    parser.add_argument(
+        "jobs",
+        help="file with one job per line in format 'name : fuzzman arguments' or "
+        "directory of NAME.job files with fuzzman arguments, arguments may include --priority P",
+    )
+    parser.add_argument(
+        "-n",
+        "--cores",
+        metavar="N",
+        help="number of cores for all running jobs (default: cpu count {%d})"
+        % cpu_count(),
+        default=cpu_count(),
+        type=int,
+    )
+    parser.add_argument(
+        "--log-dir",
+        metavar="DIR",
+        help="save output of each job to DIR/NAME.log (default: ./fuzzman_queue_logs)",
+        default="./fuzzman_queue_logs",
+    )
+    parser.add_argument(
+        "--watch",
+        help="keep waiting for new job files in jobs directory when the queue is empty "
+        "(default: exit when all jobs are done)",
+        action="store_true",
+    )
+
+
+def add_queue_examples_to_parser(parser):
+    examples = [
+        [
+            "Run jobs from nightly.txt on 32 cores, e.g. line "
+            "'png : --priority 5 -n 16 --max-job-duration 14400 -i in_png -o out_png -- ./png_fuzz @@'",
+            "queue -n 32 nightly.txt",
+        ],
+        [
+            "Run NAME.job files from jobs/ as they appear there",
+            "queue --watch jobs/",
+        ],
+    ]
+    parser.set_examples(examples)
+
+
+def check_queue_args_for_common_mistakes(args):
+    if args.cores < 1:
+        sys.exit("Error: bad value used for --cores (e.g. --cores 16)")
+
+    if args.watch and not os.path.isdir(args.jobs):
+        sys.exit("Error: option --watch requires directory of job files")
+
+
+def add_selfbench_args_to_parser(parser):
+    parser.add_argument(
+        "-n",
+        "--workers",
+        metavar="N,N,..",
+        help="comma-separated numbers of fake workers to run fuzzman with "
+        "(default: 16,64,256). Each fake worker is a python process",
+        default="16,64,256",
+    )
+    parser.add_argument(
+        "--find-window",
+        metavar="SEC",
+        help="fake workers find new paths during first SEC seconds (default: 30)",
+        default=30,
+        type=int,
+    )
+    parser.add_argument(
+        "--no-paths-stop",
+        metavar="SEC",
+        help="--no-paths-stop passed to fuzzman (default: 15)",
+        default=15,
+        type=int,
+    )
+    parser.add_argument(
+        "--fps",
+        metavar="N",
+        help="status screens per second printed by each fake worker (default: 5)",
+        default=5.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--stats-interval",
+        metavar="SEC",
+        help="how often fake workers update fuzzer_stats (default: 5)",
+        default=5.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--fuzzman-args",
+        metavar="ARGS",
+        help="additional arguments for fuzzman, e.g. '--profile' or '--no-event-log'",
+        default=None,
+    )
+    parser.add_argument(
+        "--work-dir",
+        metavar="DIR",
+        help="create temporary seeds and output dirs here (default: system temp dir)",
+        default=None,
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="don't delete output dirs and fuzzman logs of benchmark runs",
+    )
+    parser.add_argument(
+        "--save",
+        metavar="FILE",
+        help="save results to JSON file to be used as baseline later",
+        default=None,
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        help="compare results to saved ones, exit with code 1 on regression",
+        default=None,
+    )
+    parser.add_argument(
+        "--tolerance",
+        metavar="T",
+        help="allowed relative growth of measurements over baseline (default: 0.25)",
+        default=0.25,
+        type=float,
+    )
+
+
+def add_selfbench_examples_to_parser(parser):
+    examples = [
+        ["Measure fuzzman with 16, 64 and 256 fake workers", "selfbench"],
+        [
+            "Save results of quick run as baseline",
+            "selfbench -n 8,32 --save base.json",
+        ],
+        [
+            "Check for regressions against baseline",
+            "selfbench -n 8,32 --baseline base.json",
+        ],
+    ]
+    parser.set_examples(examples)
+
+
+def check_selfbench_args_for_common_mistakes(args):
+    try:
+        args.workers = [int(x) for x in args.workers.split(",")]
+    except ValueError:
+        args.workers = []
+    if len(args.workers) < 1 or min(args.workers) < 1:
+        sys.exit("Error: bad value used for --workers (e.g. --workers 16,64,256)")
+
+    if args.find_window < 1 or args.no_paths_stop < 1:
+        sys.exit(
+            "Error: options --find-window and --no-paths-stop require at least 1 second"
+        )
+
+    if args.fps <= 0 or args.stats_interval <= 0:
+        sys.exit("Error: options --fps and --stats-interval require positive values")
+
+    if args.tolerance < 0:
+        sys.exit("Error: bad value used for --tolerance (e.g. --tolerance 0.25)")
+
+    if args.work_dir is not None and not os.path.isdir(args.work_dir):
+        sys.exit("Error: work dir '%s' doesn't exist" % (args.work_dir,))
+
+    if args.baseline is not None and not os.path.isfile(args.baseline):
+        sys.exit("Error: baseline file '%s' doesn't exist" % (args.baseline,))
+
+
+def check_bench_args_for_common_mistakes(args):
+    if args.cmd_file:
+        sys.exit(
+            "Error: fuzzman bench only works with generated commands, not --cmd-file"
+        )
+
+    if args.dump_cmd_file:
+        sys.exit("Error: option --dump-cmd-file is not supported by fuzzman bench")
+
+    if args.bench_window < 1:
+        sys.exit(
+            "Error: bad value used for --bench-window. You should specify number of seconds "
+            "(e.g. --bench-window 60)"
+        )
+
+    if not 0.0 < args.bench_threshold < 1.0:
+        sys.exit("Error: --bench-threshold should be between 0 and 1 (e.g. 0.5)")
+
+
 def check_args_for_common_mistakes(args):
     if args.cmd_file is None:
         t_len = len(args.program)
@@ -225,6 +966,147 @@ def check_args_for_common_mistakes(args):
             "(e.g. --minimal-job-duration 3600)"
         )
 
+    if args.max_job_duration is not None:
+        if args.max_job_duration < 1:
+            sys.exit(
+                "Error: bad value used for --max-job-duration. You should specify number of seconds "
+                "(e.g. --max-job-duration 28800)"
+            )
+
+        if (
+            args.minimal_job_duration
+            and args.minimal_job_duration > args.max_job_duration
+        ):
+            sys.exit(
+                "Error: --minimal-job-duration should not exceed --max-job-duration"
+            )
+
+    if args.sync_groups is not None:
+        if args.sync_groups < 1:
+            sys.exit("Error: bad value used for --sync-groups (e.g. --sync-groups 8)")
+
+        if args.cmd_file:
+            sys.exit("Error: options --sync-groups and --cmd-file are not compatible")
+
+    if args.sync_interval < 1:
+        sys.exit(
+            "Error: bad value used for --sync-interval. You should specify number of seconds "
+            "(e.g. --sync-interval 60)"
+        )
+
+    if args.seed_drop is not None:
+        if not os.path.isdir(args.seed_drop):
+            sys.exit("Error: --seed-drop directory '%s' not found" % (args.seed_drop,))
+
+        if args.seed_drop_interval < 1:
+            sys.exit(
+                "Error: bad value used for --seed-drop-interval. You should specify number of seconds "
+                "(e.g. --seed-drop-interval 10)"
+            )
+
+    if args.coverage or args.coverage_llvm:
+        if args.cmd_file:
+            sys.exit("Error: coverage measurement is not compatible with --cmd-file")
+
+        if args.coverage_llvm is not None and not os.path.isfile(args.coverage_llvm):
+            sys.exit(
+                "Error: --coverage-llvm build '%s' not found" % (args.coverage_llvm,)
+            )
+
+        if args.coverage_interval < 1 or args.coverage_jobs < 1:
+            sys.exit(
+                "Error: --coverage-interval and --coverage-jobs should be positive"
+            )
+
+    if args.auto_timeout:
+        if args.cmd_file:
+            sys.exit("Error: options --auto-timeout and --cmd-file are not compatible")
+
+        if args.more_args and "-t" in shlex.split(args.more_args):
+            sys.exit(
+                "Error: option --auto-timeout is not compatible with -t passed in --more-args"
+            )
+
+        if not 0.0 < args.auto_timeout_percentile <= 100.0:
+            sys.exit("Error: --auto-timeout-percentile should be between 0 and 100")
+
+    if args.auto_timeout_retune and not args.auto_timeout:
+        sys.exit("Error: option --auto-timeout-retune requires --auto-timeout")
+
+    if getattr(args, "dashboard", False):
+        if args.headless:
+            sys.exit("Error: options --dashboard and --headless are not compatible")
+
+        if not sys.stdout.isatty():
+            sys.exit("Error: option --dashboard requires a terminal")
+
+    if hasattr(args, "event_log_max_size"):
+        try:
+            args.event_log_max_size = parse_ram_size(args.event_log_max_size) * 1048576
+        except ValueError as e:
+            sys.exit("Error: bad value used for --event-log-max-size: %s" % (e,))
+
+        if args.event_log_max_size < 1:
+            sys.exit("Error: --event-log-max-size should be positive")
+
+    if getattr(args, "profile_dump", None) is not None and not args.profile:
+        sys.exit("Error: option --profile-dump requires --profile")
+
+    if args.swap_batch is not None and args.swap_batch < 1:
+        sys.exit("Error: bad value used for --swap-batch (e.g. --swap-batch 4)")
+
+    if args.throttle:
+        if not 0.0 < args.throttle_share <= 1.0:
+            sys.exit("Error: --throttle-share should be between 0 and 1 (e.g. 0.5)")
+
+        if (
+            min(args.throttle_cpu_psi, args.throttle_memory_psi, args.throttle_load)
+            <= 0
+        ):
+            sys.exit("Error: thresholds of --throttle should be positive")
+
+    if args.disk_guard:
+        try:
+            args.disk_min_free = parse_ram_size(args.disk_min_free) * 1048576
+            args.disk_compact_free = parse_ram_size(args.disk_compact_free) * 1048576
+        except ValueError as e:
+            sys.exit(
+                "Error: bad value used for --disk-min-free/--disk-compact-free: %s"
+                % (e,)
+            )
+
+        if args.disk_compact_free < args.disk_min_free:
+            sys.exit(
+                "Error: --disk-compact-free should not be less than --disk-min-free"
+            )
+
+        if args.disk_cold_age < 0:
+            sys.exit("Error: --disk-cold-age should not be negative")
+
+    if args.preset_file is not None and args.preset is None:
+        sys.exit("Error: option --preset-file requires --preset")
+
+    if args.ram_budget is not None and args.preset is None:
+        sys.exit("Error: option --ram-budget requires --preset")
+
+    if args.preset is not None:
+        if args.cmd_file:
+            sys.exit(
+                "Error: options --preset and --cmd-file are not compatible "
+                "(use --dump-cmd-file with --preset to put preset into command file)"
+            )
+
+        try:
+            get_preset(args.preset, args.preset_file)
+        except (OSError, ValueError, configparser.Error) as e:
+            sys.exit("Error: can't use preset '%s': %s" % (args.preset, e))
+
+        if args.ram_budget is not None:
+            try:
+                args.ram_budget = parse_ram_size(args.ram_budget)
+            except ValueError as e:
+                sys.exit("Error: bad value used for --ram-budget: %s" % (e,))
+
     if args.cmd_file:
         if args.builds:
             sys.exit("Error: options --builds and --cmd-file are not compatible")
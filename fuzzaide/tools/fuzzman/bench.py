@@ -0,0 +1,191 @@
+# file    :  tools/fuzzman/bench.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+fuzzman bench: run the same fuzzing job with growing number of instances
+and find out where adding instances stops paying off
+"""
+
+import os
+import sys
+import copy
+from time import sleep
+from multiprocessing import cpu_count
+
+from .args import get_bench_args
+
+
+def get_instance_counts(max_instances, min_instances=1):
+    """
+    Returns list of instance counts to measure: `min_instances`, then powers of two
+    up to `max_instances`. `max_instances` itself is always measured
+    """
+
+    if max_instances < min_instances:
+        max_instances = min_instances
+
+    counts = [min_instances]
+    n = 1
+    while n <= min_instances:
+        n *= 2
+
+    while n < max_instances:
+        counts.append(n)
+        n *= 2
+
+    if counts[-1] != max_instances:
+        counts.append(max_instances)
+
+    return counts
+
+
+def get_execs_per_sec(stats):
+    """
+    Returns recent exec speed from fuzzer_stats dict or None.
+    afl++ reports speed of the last minute separately, it's preferred when available
+    """
+
+    for stat_name in ("execs_ps_last_min", "execs_per_sec"):
+        try:
+            value = float(stats.get(stat_name, 0))
+        except ValueError:
+            continue
+
+        if value > 0.0:
+            return value
+
+    return None
+
+
+def recommend_instance_count(results, threshold):
+    """
+    `results` is a list of [instance count, total execs per second] sorted by instance count.
+    Returns the instance count after which each added instance contributes less
+    than `threshold` of per-core throughput measured at the smallest instance count
+    """
+
+    if len(results) < 1:
+        return None
+
+    first_count, first_total = results[0]
+    base_per_core = first_total / first_count
+    if base_per_core <= 0.0:
+        return None
+
+    for (prev_count, prev_total), (count, total) in zip(results, results[1:]):
+        marginal = (total - prev_total) / (count - prev_count)
+        if marginal < threshold * base_per_core:
+            return prev_count
+
+    return results[-1][0]
+
+
+class ScalingBenchmark:
+    """
+    Starts fuzzing job via `manager_cls` for each instance count,
+    lets it run for a fixed window and sums exec speed of all instances
+    """
+
+    def __init__(self, args, manager_cls):
+        self.args = args
+        self.manager_cls = manager_cls
+        self.results = list()  # [instance count, total execs/s]
+
+        min_instances = len(args.builds) if args.builds else 1
+        max_instances = args.instances or cpu_count()
+        self.counts = get_instance_counts(max_instances, min_instances)
+
+    def measure(self, count):
+        args = copy.copy(self.args)
+        args.instances = count
+        args.output_dir = os.path.join(self.args.output_dir, "bench_n%d" % count)
+        args.cleanup = True
+        args.dump_screens = False
+
+        print(
+            "\n[bench] Measuring %d instance(s) for %d seconds"
+            % (count, args.bench_window)
+        )
+
+        fuzzman = self.manager_cls(args)
+        try:
+            fuzzman.start()
+            sleep(args.bench_window)
+
+            total = 0.0
+            num_reported = 0
+            for idx, instance in enumerate(fuzzman.procs, start=1):
+                stats = fuzzman.get_fuzzer_stats(args.output_dir, idx, instance)
+                speed = get_execs_per_sec(stats) if stats else None
+                if speed is None:
+                    continue
+                total += speed
+                num_reported += 1
+        finally:
+            fuzzman.stop()
+
+        if num_reported < count:
+            print(
+                "[bench] Warning: only %d/%d instances reported exec speed, "
+                "consider increasing --bench-window" % (num_reported, count),
+                file=sys.stderr,
+            )
+
+        return total
+
+    def run(self):
+        print(
+            "[bench] Instance counts to measure: %s" % ", ".join(map(str, self.counts))
+        )
+        for count in self.counts:
+            total = self.measure(count)
+            if total <= 0.0:
+                print(
+                    "[bench] No exec speed reported for %d instance(s), stopping benchmark"
+                    % (count,),
+                    file=sys.stderr,
+                )
+                break
+            self.results.append([count, total])
+
+    def print_report(self):
+        if len(self.results) < 1:
+            print("\n[bench] No results")
+            return
+
+        print("\n[bench] Results:")
+        print(
+            "%10s %16s %16s %16s"
+            % ("instances", "total execs/s", "per core", "marginal")
+        )
+        prev_count, prev_total = 0, 0.0
+        for count, total in self.results:
+            marginal = (total - prev_total) / (count - prev_count)
+            print("%10d %16.2f %16.2f %16.2f" % (count, total, total / count, marginal))
+            prev_count, prev_total = count, total
+
+        recommended = recommend_instance_count(self.results, self.args.bench_threshold)
+        if recommended is None:
+            return
+
+        print(
+            "\n[bench] Recommended number of instances: %d "
+            "(marginal gain threshold: %.0f%% of per-instance throughput at %d instance(s))"
+            % (recommended, 100.0 * self.args.bench_threshold, self.results[0][0])
+        )
+
+
+def bench_main(argv, manager_cls):
+    args = get_bench_args(argv)
+
+    bench = ScalingBenchmark(args, manager_cls)
+    try:
+        bench.run()
+    except KeyboardInterrupt:
+        print("\n[bench] Interrupted, reporting partial results")
+
+    bench.print_report()
+    return 0
@@ -0,0 +1,423 @@
+# file    :  tools/fuzzman/control.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Control socket of running fuzzman job and `fuzzman ctl` client for it.
+Protocol: client sends one JSON object per line {"cmd": "...", ...},
+server answers with one JSON object per line {"ok": true/false, ...}
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import socket
+from threading import Thread, Event
+
+from fuzzaide.common import FuzzaideArgumentParser
+from fuzzaide.common.exception import FuzzaideException
+
+CONTROL_SOCKET_NAME = "fuzzman.sock"
+MAX_REQUEST_SIZE = 65536
+MAX_REQUEST_COUNT = 1024  # of workers added, removed or swapped by one request
+
+
+def get_control_socket_path(output_dir):
+    return os.path.join(output_dir, CONTROL_SOCKET_NAME)
+
+
+def get_count(request):
+    count = request.get("count", 1)
+    if isinstance(count, bool) or not isinstance(count, int):
+        raise FuzzaideException("count should be a number")
+
+    if count < 1 or count > MAX_REQUEST_COUNT:
+        raise FuzzaideException("count should be from 1 to %d" % (MAX_REQUEST_COUNT,))
+
+    return count
+
+
+def get_string(request, name, required=False):
+    """
+    Returns string field of request or None if it's not given
+    """
+
+    value = request.get(name)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str):
+        raise FuzzaideException("%s should be a string" % (name,))
+    return value
+
+
+def handle_list(fuzzman, request):
+    return {"workers": fuzzman.get_workers_info()}
+
+
+def handle_stats(fuzzman, request):
+    return {"stats": fuzzman.get_job_totals()}
+
+
+def handle_add(fuzzman, request):
+    build = get_string(request, "build")
+    return {"added": fuzzman.add_workers(build, get_count(request))}
+
+
+def handle_remove(fuzzman, request):
+    build = get_string(request, "build")
+    return {"removed": fuzzman.remove_workers(build, get_count(request))}
+
+
+def handle_restart(fuzzman, request):
+    worker = get_string(request, "worker", required=True)
+    fuzzman.restart_worker(worker)
+    return {"restarted": worker}
+
+
+def handle_swap(fuzzman, request):
+    batch = request.get("batch")
+    if batch is not None:
+        batch = get_count({"count": batch})
+    workers, batch = fuzzman.swap_binary(
+        get_string(request, "build"), get_string(request, "path"), batch
+    )
+    return {"workers": workers, "batch": batch}
+
+
+def handle_headless(fuzzman, request):
+    enabled = request.get("enabled")
+    if enabled is not None and not isinstance(enabled, bool):
+        raise FuzzaideException("enabled should be true, false or null")
+    fuzzman.headless = (not fuzzman.headless) if enabled is None else enabled
+    return {"headless": fuzzman.headless}
+
+
+def handle_dump_screens(fuzzman, request):
+    class ScreensBuffer:
+        def __init__(self):
+            self.chunks = []
+
+        def write(self, data):
+            self.chunks.append(data)
+
+    outfile = ScreensBuffer()
+    fuzzman.dump_status_screens(outfile=outfile)
+    # screens are raw bytes with terminal escapes, latin-1 keeps them intact
+    return {"screens": b"".join(outfile.chunks).decode("latin-1")}
+
+
+REQUEST_HANDLERS = {
+    "list": handle_list,
+    "stats": handle_stats,
+    "add": handle_add,
+    "remove": handle_remove,
+    "restart": handle_restart,
+    "swap": handle_swap,
+    "headless": handle_headless,
+    "dump_screens": handle_dump_screens,
+}
+
+
+def handle_request(fuzzman, data):
+    """
+    Parse one request line and run it against `fuzzman`. Returns response dict
+    """
+
+    try:
+        request = json.loads(data)
+    except ValueError:
+        return {"ok": False, "error": "request is not valid JSON"}
+
+    if not isinstance(request, dict):
+        return {"ok": False, "error": "request should be a JSON object"}
+
+    handler = REQUEST_HANDLERS.get(request.get("cmd"))
+    if handler is None:
+        return {
+            "ok": False,
+            "error": "unknown command, supported: %s" % ", ".join(REQUEST_HANDLERS),
+        }
+
+    try:
+        response = handler(fuzzman, request)
+    except Exception as e:  # bad request must not kill control thread
+        return {"ok": False, "error": str(e) or type(e).__name__}
+
+    response["ok"] = True
+    return response
+
+
+class ControlServer(Thread):
+    """
+    Serves control requests on UNIX domain socket, one connection at a time
+    """
+
+    def __init__(self, path, fuzzman):
+        super().__init__()
+        self.path = path
+        self.fuzzman = fuzzman
+        self._stop_evt = Event()
+
+        if os.path.exists(path):
+            try:
+                send_request(path, {"cmd": "stats"})
+            except FuzzaideException:
+                os.unlink(path)  # left by fuzzman that wasn't stopped properly
+            else:
+                raise FuzzaideException(
+                    "control socket '%s' is used by another fuzzman" % (path,)
+                )
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.bind(path)
+            os.chmod(path, 0o600)
+            self.sock.listen(8)
+        except OSError as e:
+            self.sock.close()
+            raise FuzzaideException("can't serve control socket '%s': %s" % (path, e))
+        self.sock.settimeout(1.0)
+
+        self.start()
+
+    def serve_connection(self, conn):
+        conn.settimeout(10.0)
+        with conn.makefile("rwb") as f:
+            while not self._stop_evt.is_set():
+                data = f.readline(MAX_REQUEST_SIZE)
+                if not data:
+                    break
+                response = handle_request(self.fuzzman, data)
+                f.write(json.dumps(response).encode() + b"\n")
+                f.flush()
+
+    def run(self):
+        while not self._stop_evt.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if self._stop_evt.is_set() or e.errno in (errno.EBADF, errno.EINVAL):
+                    break  # socket is closed
+                time.sleep(0.1)  # e.g. out of file descriptors, try again later
+                continue
+
+            with conn:
+                try:
+                    self.serve_connection(conn)
+                except Exception:
+                    pass  # client went away or sent garbage, keep serving others
+
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def stop(self):
+        self._stop_evt.set()
+
+
+def send_request(path, request):
+    """
+    Send request to control socket of running fuzzman. Returns response dict
+    """
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(60.0)
+            sock.connect(path)
+            with sock.makefile("rwb") as f:
+                f.write(json.dumps(request).encode() + b"\n")
+                f.flush()
+                data = f.readline()
+    except OSError as e:
+        raise FuzzaideException("can't talk to fuzzman via '%s': %s" % (path, e))
+
+    try:
+        return json.loads(data)
+    except ValueError:
+        raise FuzzaideException("bad response from fuzzman: %r" % (data,))
+
+
+def create_ctl_argument_parser():
+    parser = FuzzaideArgumentParser(
+        prog="fuzzman ctl",
+        description="%(prog)s - inspect and change running fuzzman job",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="output directory of running job (default: ./out)",
+        default="./out",
+    )
+    parser.add_argument(
+        "-s",
+        "--socket",
+        metavar="PATH",
+        help="control socket of running job (default: <output dir>/%s)"
+        % (CONTROL_SOCKET_NAME,),
+        default=None,
+    )
+    parser.add_argument(
+        "--json", help="print raw responses of fuzzman", action="store_true"
+    )
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("list", help="list workers and their stats")
+    commands.add_parser("stats", help="show stats of the whole job")
+    for name, action in (("add", "start"), ("remove", "stop")):
+        cmd = commands.add_parser(name, help="%s N secondary instances" % (action,))
+        cmd.add_argument("count", type=int, help="number of instances")
+        cmd.add_argument(
+            "-b",
+            "--build",
+            help="build name or path (default: the only build of the job)",
+            default=None,
+        )
+    cmd = commands.add_parser("restart", help="restart one worker resuming its state")
+    cmd.add_argument("worker", help="worker name (e.g. s3)")
+    cmd = commands.add_parser(
+        "swap", help="restart workers onto new tested program batch by batch"
+    )
+    cmd.add_argument(
+        "path",
+        nargs="?",
+        help="new tested program (default: restart all workers on their current programs)",
+        default=None,
+    )
+    cmd.add_argument(
+        "-b",
+        "--build",
+        help="build name or path to swap (default: the only build of the job)",
+        default=None,
+    )
+    cmd.add_argument(
+        "--batch",
+        metavar="N",
+        type=int,
+        help="number of workers to restart at a time (default: --swap-batch of the job)",
+        default=None,
+    )
+    cmd = commands.add_parser("headless", help="toggle displaying status screens")
+    cmd.add_argument(
+        "mode", choices=["on", "off", "toggle"], nargs="?", default="toggle"
+    )
+    commands.add_parser("dump-screens", help="print status screens of all workers")
+
+    parser.set_examples(
+        [
+            ["List workers of job in ./out", "ctl list"],
+            ["Start 4 more instances of build 'asan'", "ctl -o out/ add 4 -b asan"],
+            ["Stop 8 secondary instances", "ctl remove 8"],
+            ["Move build 'asan' to rebuilt binary", "ctl swap -b asan ./app_asan_v2"],
+            ["Stop drawing status screens", "ctl headless on"],
+        ]
+    )
+    return parser
+
+
+def get_ctl_request(args):
+    if args.command in ("add", "remove"):
+        return {"cmd": args.command, "count": args.count, "build": args.build}
+
+    if args.command == "restart":
+        return {"cmd": "restart", "worker": args.worker}
+
+    if args.command == "swap":
+        path = args.path
+        if path is not None and os.path.sep in path:
+            path = os.path.abspath(path)  # fuzzman may run in another dir
+        return {"cmd": "swap", "path": path, "build": args.build, "batch": args.batch}
+
+    if args.command == "headless":
+        enabled = {"on": True, "off": False, "toggle": None}[args.mode]
+        return {"cmd": "headless", "enabled": enabled}
+
+    return {"cmd": args.command.replace("-", "_")}
+
+
+def print_ctl_response(args, response):
+    if args.command == "list":
+        fmt = "%-10s %-12s %8s %-8s %10s %8s %8s %8s %10s"
+        print(
+            fmt
+            % (
+                "worker",
+                "build",
+                "pid",
+                "state",
+                "execs/s",
+                "corpus",
+                "found",
+                "crashes",
+                "stability",
+            )
+        )
+        for w in response["workers"]:
+            print(
+                fmt
+                % (
+                    w["name"],
+                    w["build"] or "-",
+                    w["pid"] or "-",
+                    "running" if w["running"] else "stopped",
+                    w["execs_per_sec"] or "-",
+                    "-" if w["corpus"] is None else w["corpus"],
+                    "-" if w["found"] is None else w["found"],
+                    "-" if w["crashes"] is None else w["crashes"],
+                    w["stability"] or "-",
+                )
+            )
+    elif args.command == "stats":
+        for k, v in response["stats"].items():
+            print("%-20s: %s" % (k, v))
+    elif args.command == "add":
+        print("Started workers: %s" % ", ".join(response["added"]))
+    elif args.command == "remove":
+        print("Stopped workers: %s" % ", ".join(response["removed"]))
+    elif args.command == "restart":
+        print("Restarted worker %s" % (response["restarted"],))
+    elif args.command == "swap":
+        print(
+            "Restarting workers %s, %d at a time"
+            % (", ".join(response["workers"]), response["batch"])
+        )
+    elif args.command == "headless":
+        print("Headless mode is %s" % ("on" if response["headless"] else "off",))
+    elif args.command == "dump-screens":
+        outbuf = getattr(sys.stdout, "buffer", sys.stdout)
+        outbuf.write(response["screens"].encode("latin-1"))
+        outbuf.flush()
+
+
+def ctl_main(argv):
+    parser = create_ctl_argument_parser()
+    if len(argv) < 1:
+        parser.print_help()
+        return 0
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 0
+
+    path = args.socket or get_control_socket_path(args.output_dir)
+    try:
+        response = send_request(path, get_ctl_request(args))
+    except FuzzaideException as e:
+        sys.exit("Error: %s" % (e,))
+
+    if args.json:
+        print(json.dumps(response, indent=2))
+    elif not response.get("ok"):
+        sys.exit("Error: %s" % (response.get("error"),))
+    else:
+        print_ctl_response(args, response)
+
+    return 0 if response.get("ok") else 1
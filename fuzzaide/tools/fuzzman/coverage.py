@@ -0,0 +1,462 @@
+# file    :  tools/fuzzman/coverage.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Background coverage measurement of merged corpus of all fuzzers.
+Only queue entries added since the previous pass are run, results are merged into
+coverage saved in <output dir>/fuzzman_coverage:
+    bitmap    - edges hit by corpus (afl-showmap mode), bit N is set if edge N was hit
+    merged.profdata - merged profile (llvm-cov mode)
+    measured  - queue entries already measured, one path per line
+    history   - coverage over time, one line per pass (columns are listed in the first line)
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from time import time
+from threading import Thread, Event
+from concurrent.futures import ThreadPoolExecutor
+
+from .sync import QueueWatcher
+from .timeout_calibration import time_one_run
+
+COVERAGE_DIR_NAME = "fuzzman_coverage"
+COVERAGE_CHUNK_SIZE = 256
+SHOWMAP_TIMEOUT_SEC = 600  # for the whole chunk
+
+
+def parse_showmap_output(path):
+    """
+    Returns set of edge ids from afl-showmap output file with lines like "001234:1"
+    """
+
+    edges = set()
+    with open(path, "r") as f:
+        for line in f:
+            edge, sep, _ = line.partition(":")
+            if sep:
+                try:
+                    edges.add(int(edge))
+                except ValueError:
+                    continue
+    return edges
+
+
+def edges_to_bitmap(edges):
+    bitmap = bytearray((max(edges) // 8 + 1) if edges else 0)
+    for edge in edges:
+        bitmap[edge // 8] |= 1 << (edge % 8)
+    return bytes(bitmap)
+
+
+def bitmap_to_edges(bitmap):
+    return set(
+        i * 8 + bit
+        for i, byte in enumerate(bytearray(bitmap))
+        if byte
+        for bit in range(8)
+        if byte & (1 << bit)
+    )
+
+
+class ShowmapRunner:
+    """
+    Measures edge coverage of AFL-instrumented program with afl-showmap
+    """
+
+    def __init__(self, showmap, program, timeout_ms=None):
+        self.showmap = showmap
+        self.program = program
+        self.timeout_ms = timeout_ms
+        self.work_dir = None  # set by CoverageMonitor
+        self.edges = set()
+
+    def run_chunk(self, paths):
+        """
+        Returns set of edges hit by inputs at `paths` or None if afl-showmap failed
+        """
+
+        tmp_dir = tempfile.mkdtemp(prefix="showmap.", dir=self.work_dir)
+        try:
+            in_dir = os.path.join(tmp_dir, "in")
+            out_dir = os.path.join(tmp_dir, "out")
+            os.makedirs(in_dir)
+            for i, path in enumerate(paths):
+                link = os.path.join(in_dir, str(i))
+                try:
+                    os.link(path, link)
+                except OSError:
+                    shutil.copyfile(path, link)
+
+            cmd = [self.showmap, "-q", "-m", "none", "-i", in_dir, "-o", out_dir]
+            if self.timeout_ms is not None:
+                cmd += ["-t", str(self.timeout_ms)]
+            cmd += ["--"] + self.program
+            subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=SHOWMAP_TIMEOUT_SEC,
+            )
+
+            edges = set()
+            for name in os.listdir(out_dir):
+                edges.update(parse_showmap_output(os.path.join(out_dir, name)))
+            return edges
+        except (OSError, subprocess.SubprocessError) as e:
+            print("Coverage: afl-showmap failed: %s" % (e,), file=sys.stderr)
+            return None
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, coverage_dir):
+        try:
+            with open(os.path.join(coverage_dir, "bitmap"), "rb") as f:
+                self.edges = bitmap_to_edges(f.read())
+        except OSError:
+            self.edges = set()
+
+    def merge(self, results, coverage_dir):
+        """
+        Add results of chunks to saved coverage. Returns True on success
+        """
+
+        for edges in results:
+            self.edges.update(edges)
+
+        tmp_path = os.path.join(coverage_dir, "bitmap.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(edges_to_bitmap(self.edges))
+            os.replace(tmp_path, os.path.join(coverage_dir, "bitmap"))
+        except OSError as e:
+            print("Coverage: can't save bitmap: %s" % (e,), file=sys.stderr)
+            return False
+        return True
+
+    def get_summary(self):
+        return {"edges": len(self.edges)}
+
+    @staticmethod
+    def format_summary(summary):
+        return "%d edges" % (summary["edges"],)
+
+
+class LlvmCovRunner:
+    """
+    Measures line, region and branch coverage of program built with
+    -fprofile-instr-generate -fcoverage-mapping using llvm-profdata and llvm-cov
+    """
+
+    def __init__(self, program, profdata="llvm-profdata", cov="llvm-cov"):
+        self.program = program
+        self.work_dir = None  # set by CoverageMonitor
+        self.profdata = profdata
+        self.cov = cov
+        self.merged_path = None
+
+    def run_chunk(self, paths):
+        """
+        Returns list with path to .profdata of inputs at `paths` (empty if they
+        left no profiles) or None if llvm-profdata failed
+        """
+
+        tmp_dir = tempfile.mkdtemp(prefix="llvm.", dir=self.work_dir)
+        try:
+            env = dict(os.environ)
+            env["LLVM_PROFILE_FILE"] = os.path.join(tmp_dir, "%p.profraw")
+            for path in paths:
+                time_one_run(self.program, path, env)
+
+            raw_paths = [
+                os.path.join(tmp_dir, name)
+                for name in os.listdir(tmp_dir)
+                if name.endswith(".profraw")
+            ]
+            if len(raw_paths) < 1:
+                return []
+
+            fd, chunk_path = tempfile.mkstemp(suffix=".profdata", dir=self.work_dir)
+            os.close(fd)
+            try:
+                subprocess.run(
+                    [self.profdata, "merge", "-sparse", "-o", chunk_path] + raw_paths,
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            except (OSError, subprocess.SubprocessError):
+                os.unlink(chunk_path)
+                raise
+            return [chunk_path]
+        except (OSError, subprocess.SubprocessError) as e:
+            print("Coverage: llvm-profdata failed: %s" % (e,), file=sys.stderr)
+            return None
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, coverage_dir):
+        self.merged_path = os.path.join(coverage_dir, "merged.profdata")
+
+    def merge(self, results, coverage_dir):
+        """
+        Merge profiles of chunks into saved profile. Returns True on success.
+        Profiles of chunks are removed either way: entries of failed chunks are run again
+        """
+
+        chunk_paths = [path for paths in results for path in paths]
+        if len(chunk_paths) < 1:
+            return True
+
+        inputs = list(chunk_paths)
+        if os.path.isfile(self.merged_path):
+            inputs.append(self.merged_path)
+
+        tmp_path = self.merged_path + ".tmp"
+        try:
+            subprocess.run(
+                [self.profdata, "merge", "-sparse", "-o", tmp_path] + inputs,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            os.replace(tmp_path, self.merged_path)
+        except (OSError, subprocess.SubprocessError) as e:
+            print("Coverage: llvm-profdata failed: %s" % (e,), file=sys.stderr)
+            return False
+        finally:
+            for path in chunk_paths:
+                os.unlink(path)
+        return True
+
+    def get_summary(self):
+        if not os.path.isfile(self.merged_path):
+            return None
+
+        try:
+            out = subprocess.run(
+                [
+                    self.cov,
+                    "export",
+                    "-summary-only",
+                    "-instr-profile",
+                    self.merged_path,
+                    self.program[0],
+                ],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            ).stdout
+            totals = json.loads(out)["data"][0]["totals"]
+        except (OSError, subprocess.SubprocessError, ValueError, KeyError) as e:
+            print("Coverage: llvm-cov failed: %s" % (e,), file=sys.stderr)
+            return None
+
+        summary = dict()
+        for kind in ("lines", "regions", "branches"):
+            summary[kind] = [totals[kind]["covered"], totals[kind]["count"]]
+        return summary
+
+    @staticmethod
+    def format_summary(summary):
+        return ", ".join(
+            "%s %.2f%% (%d/%d)" % (kind, 100.0 * covered / (count or 1), covered, count)
+            for kind, (covered, count) in summary.items()
+        )
+
+
+class CoverageMonitor(Thread):
+    """
+    Every `interval` seconds measures coverage of queue entries added by fuzzers
+    since the previous pass, `jobs` chunks at a time
+    """
+
+    def __init__(self, fuzzman, runner, coverage_dir, interval, jobs):
+        super().__init__()
+        self.fuzzman = fuzzman
+        self.runner = runner
+        self.coverage_dir = coverage_dir
+        self.interval = interval
+        self.jobs = jobs
+
+        os.makedirs(coverage_dir, exist_ok=True)
+        self.runner.work_dir = coverage_dir
+        self.runner.load(coverage_dir)
+
+        self.watchers = dict()  # queue dir -> QueueWatcher
+        self.hashes = set()
+        self.measured_path = os.path.join(coverage_dir, "measured")
+        self.num_measured = 0
+        self.load_measured()
+
+        self.summary = None
+        self.prev_summary = None
+        self.last_pass_time = None
+        self._stop_evt = Event()
+
+        self.start()
+
+    def get_watcher(self, queue_dir):
+        watcher = self.watchers.get(queue_dir)
+        if watcher is None:
+            watcher = self.watchers[queue_dir] = QueueWatcher(queue_dir)
+        return watcher
+
+    @staticmethod
+    def get_digest(path):
+        try:
+            with open(path, "rb") as f:
+                return hashlib.sha1(f.read()).digest()
+        except OSError:
+            return None
+
+    def load_measured(self):
+        """
+        Entries measured before restart of fuzzman are not measured again,
+        neither are new entries with the same contents
+        """
+
+        try:
+            with open(self.measured_path, "r") as f:
+                paths = f.read().splitlines()
+        except OSError:
+            return
+
+        for path in paths:
+            queue_dir, name = os.path.split(path)
+            self.get_watcher(queue_dir).seen.add(name)
+            digest = self.get_digest(path)
+            if digest is not None:
+                self.hashes.add(digest)
+        self.num_measured = len(paths)
+
+    def requeue(self, paths):
+        """
+        Entries of chunks that failed are measured on the next pass
+        """
+
+        for path in paths:
+            queue_dir, name = os.path.split(path)
+            self.get_watcher(queue_dir).seen.discard(name)
+            self.get_watcher(queue_dir).mtime_ns = None  # list dir again
+            self.hashes.discard(self.get_digest(path))
+
+    def get_new_entries(self):
+        output_dir = self.fuzzman.args.output_dir
+        paths = []
+        for proc in self.fuzzman.procs:
+            queue_dir = os.path.join(proc.sync_dir or output_dir, proc.name, "queue")
+            watcher = self.get_watcher(queue_dir)
+            for name in watcher.get_new_entries(min_age=1.0):
+                paths.append(os.path.join(queue_dir, name))
+
+        return paths
+
+    def filter_duplicates(self, paths):
+        """
+        Fuzzers import each other's findings, same inputs are only measured once
+        """
+
+        unique = []
+        for path in paths:
+            digest = self.get_digest(path)
+            if digest is None:
+                continue
+
+            if digest not in self.hashes:
+                self.hashes.add(digest)
+                unique.append(path)
+        return unique
+
+    def measure_once(self, stop_evt=None):
+        """
+        Measure new queue entries. Pass may be interrupted between batches of chunks
+        by setting `stop_evt`, the rest of entries is measured on the next pass.
+        Entries are only saved as measured once their coverage is merged
+        """
+
+        paths = self.get_new_entries()
+        unique = self.filter_duplicates(paths)
+        unique_set = set(unique)
+        measured = [path for path in paths if path not in unique_set]
+        chunks = [
+            unique[i : i + COVERAGE_CHUNK_SIZE]
+            for i in range(0, len(unique), COVERAGE_CHUNK_SIZE)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for i in range(0, len(chunks), self.jobs):
+                if stop_evt is not None and stop_evt.is_set():
+                    for chunk in chunks[i:]:
+                        self.requeue(chunk)
+                    break
+
+                batch = chunks[i : i + self.jobs]
+                results = list(executor.map(self.runner.run_chunk, batch))
+                done = [c for c, r in zip(batch, results) if r is not None]
+                failed = [c for c, r in zip(batch, results) if r is None]
+                merged = [r for r in results if r is not None]
+                if not self.runner.merge(merged, self.coverage_dir):
+                    failed, done = failed + done, []
+                for chunk in done:
+                    measured.extend(chunk)
+                for chunk in failed:
+                    self.requeue(chunk)
+
+        with open(self.measured_path, "a") as f:
+            for path in measured:
+                f.write(path + "\n")
+        self.num_measured += len(measured)
+
+        summary = self.runner.get_summary()
+        if summary is None:
+            return
+
+        self.prev_summary, self.summary = self.summary, summary
+        self.last_pass_time = int(time())
+        self.write_history()
+
+    def write_history(self):
+        columns = ["unix_time", "measured_entries"]
+        values = [self.last_pass_time, self.num_measured]
+        for name, value in self.summary.items():
+            if isinstance(value, list):
+                columns += [name + "_covered", name + "_total"]
+                values += value
+            else:
+                columns.append(name)
+                values.append(value)
+
+        path = os.path.join(self.coverage_dir, "history")
+        write_header = not os.path.isfile(path)
+        with open(path, "a") as f:
+            if write_header:
+                f.write("# %s\n" % (", ".join(columns),))
+            f.write("%s\n" % (", ".join(str(v) for v in values),))
+
+    def format_summary(self):
+        if self.summary is None:
+            return None
+
+        text = self.runner.format_summary(self.summary)
+        if "edges" in self.summary and self.prev_summary is not None:
+            text += " (+%d since previous pass)" % (
+                self.summary["edges"] - self.prev_summary["edges"],
+            )
+        return "%s, %d queue entries measured" % (text, self.num_measured)
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval):
+            self.measure_once(self._stop_evt)
+
+    def stop(self):
+        self._stop_evt.set()
@@ -0,0 +1,519 @@
+# file    :  tools/fuzzman/dashboard.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Terminal dashboard: job totals and one compact row per worker, status screen
+of single worker on demand. Only changed cells of the screen are sent to terminal
+and only rows fitting the screen are rendered, so output stays small over SSH
+no matter how many workers run
+"""
+
+import os
+import sys
+import shutil
+import select
+from time import sleep, time
+from threading import Lock
+from collections import deque
+
+from .profiler import profiled
+from .const import CURSOR_HIDE, CURSOR_SHOW, TERM_CLEAR, bSTOP, cRST, RESET_G1
+
+try:
+    import termios
+    import tty
+except ImportError:  # not a POSIX system: no keyboard control
+    termios = None
+    tty = None
+
+ALT_SCREEN_ON = b"\x1b[?1049h"
+ALT_SCREEN_OFF = b"\x1b[?1049l"
+CLEAR_EOL = b"\x1b[K"
+
+DASHBOARD_FRAME_SEC = 0.25  # keyboard poll and redraw period
+DASHBOARD_STATS_SEC = 2.0  # how often fuzzer_stats files are reread
+DASHBOARD_CHECK_SEC = 15.0  # health check and job status check period
+DASHBOARD_LOG_LINES = 5
+
+ROW_FORMAT = "%1s%4s %-14.14s %-6s %9s %8s %7s %6s %6s %7s %10s"
+ROW_HEADER = ROW_FORMAT % (
+    "",
+    "#",
+    "NAME",
+    "STATE",
+    "EXEC/S",
+    "CORPUS",
+    "FINDS",
+    "CRASH",
+    "HANGS",
+    "STAB",
+    "LAST FIND",
+)
+
+KEYS = {
+    b"\x1b[A": "up",
+    b"\x1bOA": "up",
+    b"k": "up",
+    b"\x1b[B": "down",
+    b"\x1bOB": "down",
+    b"j": "down",
+    b"\x1b[5~": "pgup",
+    b"\x1b[6~": "pgdn",
+    b"\x1b[C": "open",
+    b"\r": "open",
+    b"\n": "open",
+    b"l": "open",
+    b"\x1b[D": "back",
+    b"\x1b": "back",
+    b"q": "back",
+    b"h": "back",
+    b"n": "next",
+    b"p": "prev",
+}
+
+
+def format_count(n):
+    """
+    Returns short form of number: 123, 12.3K, 1.23M
+    """
+
+    for limit, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if n >= limit:
+            value = n / limit
+            if value >= 100:
+                return "%.0f%s" % (value, suffix)
+            if value >= 10:
+                return "%.1f%s" % (value, suffix)
+            return "%.2f%s" % (value, suffix)
+    return "%d" % (n,)
+
+
+def format_ago(seconds):
+    """
+    Returns short form of time interval: 5s, 3m 12s, 2h 5m, 4d 7h
+    """
+
+    if seconds is None:
+        return "never"
+
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return "%ds" % (seconds,)
+    if seconds < 3600:
+        return "%dm %ds" % (seconds // 60, seconds % 60)
+    if seconds < 86400:
+        return "%dh %dm" % (seconds // 3600, (seconds // 60) % 60)
+    return "%dd %dh" % (seconds // 86400, (seconds // 3600) % 24)
+
+
+def parse_keys(data):
+    """
+    Split bytes read from terminal into names of keys from KEYS, unknown keys are skipped
+    """
+
+    keys = []
+    i = 0
+    while i < len(data):
+        for length in (4, 3, 1):
+            key = KEYS.get(data[i : i + length])
+            if key is not None:
+                keys.append(key)
+                i += length
+                break
+        else:
+            i += 1
+    return keys
+
+
+class DiffRenderer:
+    """
+    Draws frames (lists of text lines) sending only parts of lines changed since previous frame
+    """
+
+    def __init__(self, outbuf):
+        self.outbuf = outbuf
+        self.lines = []
+
+    def invalidate(self):
+        """
+        Forget what is on screen, next frame is drawn from scratch
+        """
+
+        self.lines = []
+        self.outbuf.write(TERM_CLEAR)
+
+    def render(self, lines, width):
+        """
+        Returns number of bytes written
+        """
+
+        data = []
+        lines = [line[:width].ljust(width) for line in lines]
+        for row, line in enumerate(lines):
+            old = self.lines[row] if row < len(self.lines) else None
+            if old == line:
+                continue
+
+            start, end = 0, len(line)
+            if old is not None and len(old) == len(line):
+                while old[start] == line[start]:
+                    start += 1
+                while old[end - 1] == line[end - 1]:
+                    end -= 1
+
+            data.append(b"\x1b[%d;%dH" % (row + 1, start + 1))
+            data.append(line[start:end].encode("utf-8", "replace"))
+
+        for row in range(len(lines), len(self.lines)):
+            data.append(b"\x1b[%d;1H" % (row + 1,) + CLEAR_EOL)
+
+        self.lines = lines
+        data = b"".join(data)
+        if len(data) > 0:
+            self.outbuf.write(data)
+            self.outbuf.flush()
+        return len(data)
+
+
+class LogCapture:
+    """
+    Replacement of sys.stdout and sys.stderr keeping last lines of text printed
+    while dashboard occupies the terminal
+    """
+
+    def __init__(self, max_lines=100):
+        self.lines = deque(maxlen=max_lines)
+        self.partial = ""
+        self.lock = Lock()
+
+    def write(self, text):
+        with self.lock:
+            parts = (self.partial + text).split("\n")
+            self.partial = parts.pop()
+            for line in parts:
+                line = line.expandtabs(4).rstrip()
+                if len(line) > 0:
+                    self.lines.append(line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def get_lines(self, num_lines):
+        with self.lock:
+            return list(self.lines)[-num_lines:] if num_lines > 0 else []
+
+
+class Dashboard:
+    """
+    Interactive view of fuzzing job. Keys: up/down (j/k) select worker, PgUp/PgDn scroll,
+    Enter opens status screen of selected worker, Esc/q goes back, n/p switch worker
+    """
+
+    def __init__(self, fuzzman, outfile=None, infile=None):
+        self.fuzzman = fuzzman
+        self.profiler = getattr(fuzzman, "profiler", None)
+        self.outfile = outfile or sys.__stdout__
+        self.outbuf = getattr(self.outfile, "buffer", self.outfile)
+        self.infile = infile or sys.__stdin__
+        self.renderer = DiffRenderer(self.outbuf)
+        self.log = LogCapture()
+
+        self.job_stats = None
+        self.stats_time = 0.0
+        # refreshed with job_stats, frames only look up rows shown on screen
+        self.worker_stats = dict()  # id(instance) -> [fuzzer_stats, worker]
+        self.num_alive = 0
+        self.selected = 0
+        self.top = 0  # first worker row shown on screen
+        self.opened = None  # instance whose status screen is shown
+        self.last_screen = None
+        self.size = None
+        self.rows_per_page = 1
+
+        self.saved_tty = None
+        self.saved_streams = None
+
+    def open(self):
+        """
+        Take over the terminal: alternate screen, no cursor, keys without Enter, prints to log
+        """
+
+        if self.saved_streams is not None:
+            return
+
+        fd = self.get_input_fd()
+        if fd is not None:
+            try:
+                self.saved_tty = termios.tcgetattr(fd)
+                tty.setcbreak(fd)
+            except termios.error:
+                self.saved_tty = None
+
+        self.saved_streams = (sys.stdout, sys.stderr)
+        sys.stdout = self.log
+        sys.stderr = self.log
+        self.outbuf.write(ALT_SCREEN_ON + CURSOR_HIDE)
+        self.renderer.invalidate()
+
+    def close(self):
+        """
+        Give the terminal back, safe to call more than once
+        """
+
+        if self.saved_streams is None:
+            return
+
+        sys.stdout, sys.stderr = self.saved_streams
+        self.saved_streams = None
+        self.outbuf.write(bSTOP + cRST + RESET_G1 + CURSOR_SHOW + ALT_SCREEN_OFF)
+        self.outbuf.flush()
+
+        if self.saved_tty is not None:
+            termios.tcsetattr(self.get_input_fd(), termios.TCSADRAIN, self.saved_tty)
+            self.saved_tty = None
+
+        # messages printed while dashboard was shown
+        for line in self.log.get_lines(DASHBOARD_LOG_LINES * 4):
+            print(line)
+
+    def get_input_fd(self):
+        if termios is None or self.infile is None:
+            return None
+        try:
+            fd = self.infile.fileno()
+        except (AttributeError, ValueError, OSError):
+            return None
+        return fd if os.isatty(fd) else None
+
+    def read_keys(self, timeout):
+        """
+        Wait up to `timeout` seconds for key presses. Returns list of key names
+        """
+
+        fd = self.get_input_fd()
+        if fd is None or self.saved_tty is None:
+            sleep(timeout)
+            return []
+
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if len(ready) < 1:
+            return []
+        try:
+            return parse_keys(os.read(fd, 64))
+        except OSError:
+            return []
+
+    def handle_key(self, key, rows_per_page):
+        procs = self.fuzzman.procs
+        if len(procs) < 1:
+            self.opened = None
+            return
+
+        if self.opened is not None:
+            if key == "back":
+                self.opened = None
+                self.renderer.invalidate()
+                return
+            if key in ("next", "prev", "down", "up"):
+                step = 1 if key in ("next", "down") else -1
+                idx = procs.index(self.opened) if self.opened in procs else 0
+                self.selected = (idx + step) % len(procs)
+                self.opened = procs[self.selected]
+                self.last_screen = None
+            return
+
+        if key == "up":
+            self.selected -= 1
+        elif key == "down":
+            self.selected += 1
+        elif key == "pgup":
+            self.selected -= rows_per_page
+        elif key == "pgdn":
+            self.selected += rows_per_page
+        elif key == "open":
+            self.selected = min(max(self.selected, 0), len(procs) - 1)
+            self.opened = procs[self.selected]
+            self.last_screen = None
+            self.outbuf.write(TERM_CLEAR)
+            return
+        self.selected = min(max(self.selected, 0), len(procs) - 1)
+
+    def update_stats(self, now):
+        if self.job_stats is None or now - self.stats_time >= DASHBOARD_STATS_SEC:
+            fuzzman = self.fuzzman
+            self.job_stats = fuzzman.collect_job_stats(quiet=True)
+            self.stats_time = now
+            self.worker_stats = dict(
+                (id(instance), [fuzzer_stats, worker])
+                for instance, fuzzer_stats, worker in self.job_stats["workers"]
+            )
+            self.num_alive = sum(
+                1
+                for proc in fuzzman.procs
+                if fuzzman.is_process_still_running(proc.proc)
+            )
+
+    def format_row(self, idx, instance, stats, worker, now):
+        if not self.fuzzman.is_process_still_running(instance.proc):
+            state = "dead"
+        elif instance.paused:
+            state = "paused"
+        else:
+            state = "run"
+
+        if stats is None:
+            cells = ["-"] * 7
+        else:
+            last_find = None
+            if worker["last_path"] > 0:
+                last_find = now - worker["last_path"]
+            try:
+                execs_per_sec = "%.1f" % (float(stats.get("execs_per_sec", 0)),)
+            except ValueError:
+                execs_per_sec = "-"
+            cells = [
+                execs_per_sec,
+                format_count(worker["paths_total"]),
+                format_count(worker["paths_found"]),
+                format_count(worker["crashes"]),
+                format_count(worker["hangs"]),
+                stats.get("stability", "-"),
+                format_ago(last_find),
+            ]
+
+        marker = ">" if idx - 1 == self.selected else ""
+        return ROW_FORMAT % tuple([marker, idx, instance.name or "?", state] + cells)
+
+    def get_header(self, now):
+        fuzzman = self.fuzzman
+        stats = self.job_stats
+        lines = [
+            "fuzzman: %s   workers: %d/%d alive   up %s"
+            % (
+                fuzzman.args.output_dir,
+                self.num_alive,
+                len(fuzzman.procs),
+                format_ago(now - fuzzman.start_time),
+            )
+        ]
+
+        last_find = None
+        if stats["newest_path_stamp"] > 0:
+            last_find = now - stats["newest_path_stamp"]
+        lines.append(
+            "exec/s: %.1f   execs: %s   corpus: %s   crashes: %s   hangs: %s   "
+            "last find: %s"
+            % (
+                stats["execs_per_sec"],
+                format_count(stats["execs"]),
+                format_count(stats["paths"]),
+                format_count(stats["crashes"]),
+                format_count(stats["hangs"]),
+                format_ago(last_find),
+            )
+        )
+        return lines
+
+    def build_frame(self, width, height, now):
+        """
+        Returns list of lines of worker table fitting `height` lines
+        """
+
+        procs = self.fuzzman.procs
+        log_lines = self.log.get_lines(DASHBOARD_LOG_LINES)
+        lines = self.get_header(now) + ["", ROW_HEADER]
+
+        # header, table, key help and log, last line of screen stays empty
+        rows_per_page = max(1, height - len(lines) - len(log_lines) - 2)
+        self.rows_per_page = rows_per_page
+
+        self.selected = min(max(self.selected, 0), max(0, len(procs) - 1))
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + rows_per_page:
+            self.top = self.selected - rows_per_page + 1
+        self.top = max(0, min(self.top, len(procs) - rows_per_page))
+
+        # rows that don't fit the screen are not formatted at all
+        visible = procs[self.top : self.top + rows_per_page]
+        for idx, instance in enumerate(visible, start=self.top + 1):
+            fuzzer_stats, worker = self.worker_stats.get(id(instance), [None, None])
+            lines.append(self.format_row(idx, instance, fuzzer_stats, worker, now))
+
+        lines += [""] * (rows_per_page - len(visible))
+        lines.append(
+            "j/k: select  Enter: open worker  Esc: back  Ctrl+C: stop job"
+            "   workers %d-%d of %d"
+            % (min(self.top + 1, len(procs)), self.top + len(visible), len(procs))
+        )
+        lines += log_lines
+        return lines[:height]
+
+    def draw_worker_screen(self, width, height):
+        instance = self.opened
+        screen = self.fuzzman.get_status_screen(instance)
+        if screen == self.last_screen:
+            return
+
+        self.last_screen = screen
+        self.outbuf.write(b"\x1b[H" + screen + bSTOP + cRST + RESET_G1)
+        help_line = "%s: Esc: back  n/p: next/previous worker" % (instance.name,)
+        self.outbuf.write(
+            b"\x1b[%d;1H" % (height,) + help_line[:width].encode() + CLEAR_EOL
+        )
+        self.outbuf.flush()
+
+    @profiled("dashboard_draw")
+    def draw(self, now=None):
+        now = now or time()
+        size = shutil.get_terminal_size()
+        if size != self.size:
+            self.size = size
+            self.last_screen = None
+            self.renderer.invalidate()
+
+        if self.opened is not None:
+            if self.opened in self.fuzzman.procs:
+                self.draw_worker_screen(size.columns, size.lines)
+                return
+            self.opened = None  # removed via control socket
+            self.renderer.invalidate()
+
+        self.update_stats(now)
+        self.renderer.render(
+            self.build_frame(size.columns, size.lines, now), size.columns
+        )
+
+    def run(self):
+        """
+        Show dashboard until stop condition is met or all workers die.
+        Returns 0 on stop condition, 1 if no worker is alive
+        """
+
+        self.open()
+        try:
+            next_check = time() + DASHBOARD_CHECK_SEC
+            while True:
+                self.draw()
+                for key in self.read_keys(DASHBOARD_FRAME_SEC):
+                    self.handle_key(key, self.rows_per_page)
+
+                if time() < next_check:
+                    continue
+                next_check = time() + DASHBOARD_CHECK_SEC
+
+                if not self.fuzzman.health_check():
+                    return 1
+                # this prints stats to the log and decides if we need to stop
+                if self.fuzzman.job_status_check():
+                    print("STOP CONDITION MET. Stopping current fuzzing job...")
+                    return 0
+        finally:
+            self.close()
@@ -0,0 +1,262 @@
+# file    :  tools/fuzzman/disk_guard.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Watch free space on filesystem of output dir. When it runs low, cold artifacts
+(old hangs, queues of workers that don't run anymore) are compressed into per-worker archives.
+When it's almost exhausted, secondary workers are paused instead of letting their writes fail
+"""
+
+import os
+import shutil
+import tarfile
+from time import time, strftime, localtime
+from threading import Thread, Event, Lock
+
+from .provenance import find_worker_dirs
+from .throttle import get_secondaries
+
+DISK_CHECK_INTERVAL_SEC = 30.0
+DISK_RESUME_FACTOR = 1.5  # resume workers when free space is this much above threshold
+ARCHIVE_DIR_NAME = "fuzzman_archive"
+
+
+def get_free_space(path):
+    """
+    Returns number of bytes available to unprivileged users on filesystem of `path`
+    """
+
+    st = os.statvfs(path)
+    return st.f_bavail * st.f_frsize
+
+
+def get_disk_usage(path):
+    """
+    Returns number of bytes allocated for file or directory tree
+    """
+
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return 0
+
+    usage = st.st_blocks * 512
+    if os.path.isdir(path) and not os.path.islink(path):
+        for name in os.listdir(path):
+            usage += get_disk_usage(os.path.join(path, name))
+    return usage
+
+
+def archive_and_remove(archive_path, paths, base_dir):
+    """
+    Put `paths` (relative to `base_dir` in archive) into new gzipped tar archive, then remove them.
+    Returns number of bytes freed
+    """
+
+    usage = sum(get_disk_usage(p) for p in paths)
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+    tmp_path = archive_path + ".tmp"
+    with tarfile.open(tmp_path, "w:gz") as tar:
+        for p in paths:
+            tar.add(p, arcname=os.path.relpath(p, base_dir))
+    os.replace(tmp_path, archive_path)
+
+    for p in paths:
+        if os.path.isdir(p) and not os.path.islink(p):
+            shutil.rmtree(p, ignore_errors=True)
+        else:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    return usage - get_disk_usage(archive_path)
+
+
+def get_cold_hangs(worker_dir, max_mtime):
+    hangs_dir = os.path.join(worker_dir, "hangs")
+    try:
+        names = sorted(os.listdir(hangs_dir))
+    except OSError:
+        return []
+
+    hangs = []
+    for name in names:
+        path = os.path.join(hangs_dir, name)
+        try:
+            if name.startswith("id:") and os.path.getmtime(path) < max_mtime:
+                hangs.append(path)
+        except OSError:
+            continue
+    return hangs
+
+
+class DiskGuard(Thread):
+    """
+    Checks free space every `interval` seconds. Below `compact_free` bytes compacts
+    hangs older than `cold_age` seconds and queues of stopped workers,
+    below `min_free` bytes pauses secondary workers
+    """
+
+    def __init__(
+        self,
+        fuzzman,
+        min_free,
+        compact_free,
+        cold_age,
+        interval=DISK_CHECK_INTERVAL_SEC,
+    ):
+        super().__init__()
+        self.fuzzman = fuzzman
+        self.min_free = min_free
+        self.compact_free = compact_free
+        self.cold_age = cold_age
+        self.interval = interval
+
+        self.free = None
+        self.space_low = False
+        self.paused = []
+        self.num_compacted = 0  # files
+        self.reclaimed = 0  # bytes
+        self.compaction_time = 0.0
+        self.lock = Lock()
+        self._stop_evt = Event()
+
+        self.start()
+
+    def get_stopped_worker_dirs(self):
+        running = set(proc.name for proc in self.fuzzman.procs)
+        return [
+            [name, path]
+            for name, path in find_worker_dirs(self.fuzzman.args.output_dir)
+            if name not in running
+        ]
+
+    def get_worker_dirs(self):
+        output_dir = self.fuzzman.args.output_dir
+        return [
+            [proc.name, os.path.join(proc.sync_dir or output_dir, proc.name)]
+            for proc in self.fuzzman.procs
+        ]
+
+    def compact(self, now):
+        """
+        Returns number of bytes freed
+        """
+
+        start = time()
+        stamp = strftime("%Y%m%d-%H%M%S", localtime(now))
+        reclaimed = 0
+        num_files = 0
+        for name, worker_dir in self.get_worker_dirs() + self.get_stopped_worker_dirs():
+            hangs = get_cold_hangs(worker_dir, now - self.cold_age)
+            if len(hangs) < 1:
+                continue
+            archive = os.path.join(
+                worker_dir, ARCHIVE_DIR_NAME, "hangs-%s.tar.gz" % stamp
+            )
+            try:
+                reclaimed += archive_and_remove(archive, hangs, worker_dir)
+                num_files += len(hangs)
+            except (OSError, tarfile.TarError) as e:
+                print("Can't compact hangs of %s: %s" % (name, e))
+
+        for name, worker_dir in self.get_stopped_worker_dirs():
+            paths = [
+                os.path.join(worker_dir, d)
+                for d in ("queue", ".state")
+                if os.path.isdir(os.path.join(worker_dir, d))
+            ]
+            if len(paths) < 1 or not paths[0].endswith("queue"):
+                continue  # already compacted
+
+            archive = os.path.join(
+                worker_dir, ARCHIVE_DIR_NAME, "queue-%s.tar.gz" % stamp
+            )
+            try:
+                num_entries = len(os.listdir(paths[0]))
+                reclaimed += archive_and_remove(archive, paths, worker_dir)
+                num_files += num_entries
+            except (OSError, tarfile.TarError) as e:
+                print("Can't compact queue of stopped worker %s: %s" % (name, e))
+
+        with self.lock:
+            self.num_compacted += num_files
+            self.reclaimed += reclaimed
+            self.compaction_time += time() - start
+
+        if num_files > 0:
+            print(
+                "Low disk space: compacted %d cold files, %.1f MB freed"
+                % (num_files, reclaimed / 1048576.0)
+            )
+        return reclaimed
+
+    def pause_workers(self, now):
+        self.space_low = True
+        self.paused = get_secondaries(self.fuzzman.procs)
+        for proc in self.paused:
+            proc.pause("disk")
+        print(
+            "Disk is almost full (%.1f MB free), paused %d workers"
+            % (self.free / 1048576.0, len(self.paused))
+        )
+
+    def resume_workers(self, now):
+        self.space_low = False
+        for proc in self.paused:
+            proc.resume("disk")  # unless it's paused for other reasons too
+        print(
+            "Disk space is back (%.1f MB free), resumed %d workers"
+            % (self.free / 1048576.0, len(self.paused))
+        )
+        self.paused = []
+
+    def check(self, now):
+        try:
+            self.free = get_free_space(self.fuzzman.args.output_dir)
+            if self.free < self.compact_free:
+                self.compact(now)
+                self.free = get_free_space(self.fuzzman.args.output_dir)
+        except OSError as e:
+            print("Can't check free disk space: %s" % (e,))
+            return
+
+        if not self.space_low:
+            if self.free < self.min_free:
+                self.pause_workers(now)
+        elif self.free >= self.min_free * DISK_RESUME_FACTOR:
+            self.resume_workers(now)
+        else:
+            for proc in self.paused:
+                proc.pause("disk")  # in case worker was restarted meanwhile
+
+    def format_summary(self):
+        if self.free is None:
+            return None
+
+        with self.lock:
+            text = "%.1f MB free" % (self.free / 1048576.0,)
+            if self.num_compacted > 0:
+                text += ", compacted %d files (%.1f MB reclaimed in %.1f sec)" % (
+                    self.num_compacted,
+                    self.reclaimed / 1048576.0,
+                    self.compaction_time,
+                )
+        if self.space_low:
+            text += ", %d workers paused" % (len(self.paused),)
+        return text
+
+    def run(self):
+        self.check(time())
+        while not self._stop_evt.wait(self.interval):
+            self.check(time())
+
+        if self.space_low:
+            self.resume_workers(time())
+
+    def stop(self):
+        self._stop_evt.set()
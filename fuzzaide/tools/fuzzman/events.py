@@ -0,0 +1,164 @@
+# file    :  tools/fuzzman/events.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Log of job lifecycle events (workers starting, exiting and restarting, new crashes,
+stop condition checks) written as newline-delimited JSON into output dir
+"""
+
+import os
+import json
+from time import time, monotonic
+from threading import Thread, Event, Lock
+
+EVENT_LOG_NAME = "fuzzman_events.ndjson"
+EVENT_LOG_MAX_SIZE = 16 * 1048576  # bytes per file before rotation
+EVENT_LOG_BACKUPS = 3  # rotated files kept: .1 (newest) ... .3 (oldest)
+EVENT_LOG_FLUSH_SEC = 5.0
+EVENT_LOG_BUFFER_SIZE = 65536  # flush earlier when this many bytes are buffered
+
+# fields of fuzzer_stats saved with worker events (old and new names of AFL++ stats)
+SNAPSHOT_STATS = (
+    "execs_done",
+    "execs_per_sec",
+    "corpus_count",
+    "paths_total",
+    "corpus_found",
+    "paths_found",
+    "saved_crashes",
+    "unique_crashes",
+    "saved_hangs",
+    "unique_hangs",
+    "stability",
+    "bitmap_cvg",
+    "last_update",
+)
+
+
+def get_stats_snapshot(stats):
+    """
+    Returns subset of fuzzer_stats dict worth saving with an event
+    """
+
+    if not stats:
+        return None
+    return dict((name, stats[name]) for name in SNAPSHOT_STATS if name in stats)
+
+
+def read_events(path):
+    """
+    Returns list of events from log file (including rotated files, oldest first)
+    """
+
+    paths = ["%s.%d" % (path, i) for i in range(EVENT_LOG_BACKUPS, 0, -1)] + [path]
+    events = []
+    for p in paths:
+        try:
+            with open(p, "rt") as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue  # line cut by crash of fuzzman
+        except OSError:
+            continue
+    return events
+
+
+class EventLog(Thread):
+    """
+    Buffered NDJSON log. Events are written every `flush_interval` seconds or earlier
+    when buffer grows big, file is rotated when it exceeds `max_size` bytes.
+    Each event has wall clock time and monotonic time since start of the log
+    """
+
+    def __init__(
+        self,
+        path,
+        max_size=EVENT_LOG_MAX_SIZE,
+        backups=EVENT_LOG_BACKUPS,
+        flush_interval=EVENT_LOG_FLUSH_SEC,
+    ):
+        super().__init__()
+        self.path = path
+        self.max_size = max_size
+        self.backups = backups
+        self.flush_interval = flush_interval
+
+        self.mono_start = monotonic()
+        self.buffer = []
+        self.buffer_size = 0
+        self.lock = Lock()  # guards buffer
+        self.file_lock = Lock()  # guards file writes and rotation
+        self.num_events = 0
+        self.error = None
+        self._stop_evt = Event()
+
+        self.start()
+
+    def log(self, event, **fields):
+        record = {
+            "event": event,
+            "time": round(time(), 3),
+            "mono": round(monotonic() - self.mono_start, 3),
+        }
+        record.update(fields)
+        line = json.dumps(record, default=str) + "\n"
+
+        with self.lock:
+            self.buffer.append(line)
+            self.buffer_size += len(line)
+            self.num_events += 1
+            need_flush = self.buffer_size >= EVENT_LOG_BUFFER_SIZE
+
+        if need_flush:
+            self.flush()
+
+    def rotate(self):
+        for i in range(self.backups, 0, -1):
+            src = self.path if i == 1 else "%s.%d" % (self.path, i - 1)
+            if os.path.exists(src):
+                os.replace(src, "%s.%d" % (self.path, i))
+        if self.backups < 1:
+            os.remove(self.path)  # nothing to keep, start over
+
+    def flush(self):
+        with self.file_lock:  # taken first so lines of concurrent flushes keep order
+            with self.lock:
+                lines = self.buffer
+                self.buffer = []
+                self.buffer_size = 0
+
+            if len(lines) < 1:
+                return
+
+            f = None
+            try:
+                f = open(self.path, "at")
+                size = f.tell()
+                for line in lines:
+                    if size > 0 and size + len(line) > self.max_size:
+                        f.close()
+                        self.rotate()
+                        f = open(self.path, "at")
+                        size = 0
+                    f.write(line)
+                    size += len(line)
+            except OSError as e:
+                if self.error is None:  # report only once
+                    print("Can't write event log %s: %s" % (self.path, e))
+                self.error = e
+            finally:
+                if f is not None:
+                    f.close()
+
+    def run(self):
+        while not self._stop_evt.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def stop(self):
+        self._stop_evt.set()
@@ -0,0 +1,412 @@
+# file    :  tools/fuzzman/fake_afl.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Stand-in for afl-fuzz that doesn't run any target: draws status screens,
+writes fuzzer_stats, plot_data and queue/crash files at configured rates and
+crashes or hangs on command. Use it as --fuzzer-binary to load fuzzman itself.
+
+Behaviour is set with environment variables:
+    FAKE_AFL_FPS              status screens per second (default: 5)
+    FAKE_AFL_EXECS_PER_SEC    reported exec speed (default: 1000)
+    FAKE_AFL_FINDS_PER_MIN    new queue entries per minute (default: 6)
+    FAKE_AFL_FIND_UNTIL       stop finding new entries after N seconds (default: never)
+    FAKE_AFL_CRASHES_PER_MIN  new crashes per minute (default: 0)
+    FAKE_AFL_STATS_INTERVAL   seconds between fuzzer_stats updates (default: 60, like afl-fuzz)
+    FAKE_AFL_PLOT_INTERVAL    seconds between plot_data updates (default: 5, like afl-fuzz)
+    FAKE_AFL_CRASH_AFTER      die with SIGSEGV after N seconds
+    FAKE_AFL_HANG_AFTER       stop responding (and ignore SIGINT) after N seconds
+SIGUSR1 makes it crash right away, SIGUSR2 makes it hang
+"""
+
+import os
+import sys
+import signal
+from time import sleep, time
+
+FAKE_AFL_VERSION = "4.09c-fake"
+
+# options of afl-fuzz followed by a value, others are flags
+VALUE_OPTIONS = set("abBceEfFgGiIlLmMopsStTVx")
+
+BOX_TOP = "lqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqk"
+BOX_BOTTOM = (
+    "mqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqj"
+)
+
+PLOT_HEADER = (
+    "# relative_time, cycles_done, cur_item, corpus_count, pending_total, "
+    "pending_favs, map_size, saved_crashes, saved_hangs, max_depth, execs_per_sec, "
+    "total_execs, edges_found\n"
+)
+
+
+def parse_fuzzer_args(argv):
+    """
+    Returns dict of afl-fuzz options (letter -> value or True) and command line of target
+    """
+
+    options = dict()
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--":
+            return options, argv[i + 1 :]
+        if len(arg) < 2 or arg[0] != "-":
+            return options, argv[i:]  # target without "--"
+
+        letter = arg[1]
+        if letter in VALUE_OPTIONS:
+            if len(arg) > 2:
+                options[letter] = arg[2:]
+            elif i + 1 < len(argv):
+                i += 1
+                options[letter] = argv[i]
+            else:
+                raise ValueError("option -%s requires a value" % (letter,))
+        else:
+            options[letter] = True
+        i += 1
+
+    return options, []
+
+
+def get_env_float(name, default):
+    value = os.environ.get(name)
+    if value is None or len(value) < 1:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        sys.exit("[-] PROGRAM ABORT : bad value of %s: '%s'" % (name, value))
+
+
+class FakeFuzzer:
+    """
+    State of one fake afl-fuzz instance. All counters are derived from time since start
+    so output is the same no matter how often `tick` is called
+    """
+
+    def __init__(self, options, target, now=None):
+        if "o" not in options:
+            raise ValueError("no output dir (-o) specified")
+
+        self.name = options.get("M") or options.get("S") or "default"
+        self.is_main = "M" in options
+        self.out_dir = os.path.join(options["o"], self.name)
+        self.input_dir = options.get("i")
+        self.target = target
+        self.command_line = " ".join(["afl-fuzz"] + sys.argv[1:])
+
+        self.fps = get_env_float("FAKE_AFL_FPS", 5.0)
+        self.execs_per_sec = get_env_float("FAKE_AFL_EXECS_PER_SEC", 1000.0)
+        self.finds_per_min = get_env_float("FAKE_AFL_FINDS_PER_MIN", 6.0)
+        self.find_until = get_env_float("FAKE_AFL_FIND_UNTIL", None)
+        self.crashes_per_min = get_env_float("FAKE_AFL_CRASHES_PER_MIN", 0.0)
+        self.stats_interval = get_env_float("FAKE_AFL_STATS_INTERVAL", 60.0)
+        self.plot_interval = get_env_float("FAKE_AFL_PLOT_INTERVAL", 5.0)
+        self.crash_after = get_env_float("FAKE_AFL_CRASH_AFTER", None)
+        self.hang_after = get_env_float("FAKE_AFL_HANG_AFTER", None)
+
+        self.start_time = now or time()
+        self.last_stats = None
+        self.last_plot = None
+        self.num_seeds = 0
+        self.num_found = 0
+        self.num_crashes = 0
+        self.last_find = 0
+        self.last_crash = 0
+        self.found_before = 0  # entries and crashes of previous runs when resuming
+        self.crashes_before = 0
+
+        self.setup_dirs()
+
+    def setup_dirs(self):
+        queue_dir = os.path.join(self.out_dir, "queue")
+        for d in ("queue", "crashes", "hangs", ".synced"):
+            os.makedirs(os.path.join(self.out_dir, d), exist_ok=True)
+
+        existing = [n for n in os.listdir(queue_dir) if n.startswith("id:")]
+        if len(existing) > 0:  # resuming
+            self.num_seeds = len([n for n in existing if ",orig:" in n])
+            self.num_found = len(existing) - self.num_seeds
+            self.num_crashes = len(
+                [
+                    n
+                    for n in os.listdir(os.path.join(self.out_dir, "crashes"))
+                    if n.startswith("id:")
+                ]
+            )
+            self.found_before = self.num_found
+            self.crashes_before = self.num_crashes
+            return
+
+        seeds = []
+        if self.input_dir not in (None, "-") and os.path.isdir(self.input_dir):
+            seeds = sorted(os.listdir(self.input_dir))
+        if len(seeds) < 1:
+            seeds = ["seed"]
+
+        for idx, seed in enumerate(seeds):
+            data = b"12345"
+            try:
+                with open(os.path.join(self.input_dir, seed), "rb") as f:
+                    data = f.read(1048576)
+            except (OSError, TypeError):
+                pass
+            name = "id:%06d,time:0,execs:0,orig:%s" % (idx, seed)
+            with open(os.path.join(queue_dir, name), "wb") as f:
+                f.write(data)
+        self.num_seeds = len(seeds)
+
+        with open(os.path.join(self.out_dir, "plot_data"), "w") as f:
+            f.write(PLOT_HEADER)
+
+    def get_execs(self, now):
+        return int((now - self.start_time) * self.execs_per_sec)
+
+    def get_expected_count(self, per_min, now):
+        elapsed = now - self.start_time
+        if self.find_until is not None:
+            elapsed = min(elapsed, self.find_until)
+        return int(elapsed * per_min / 60.0)
+
+    def add_entries(self, now):
+        """
+        Create queue entries and crashes expected by this time
+        """
+
+        execs = self.get_execs(now)
+        rel_ms = int((now - self.start_time) * 1000)
+        expected = self.found_before + self.get_expected_count(self.finds_per_min, now)
+        while self.num_found < expected:
+            idx = self.num_seeds + self.num_found
+            name = "id:%06d,src:%06d,time:%d,execs:%d,op:havoc,rep:2,+cov" % (
+                idx,
+                idx - 1,
+                rel_ms,
+                execs,
+            )
+            with open(os.path.join(self.out_dir, "queue", name), "wb") as f:
+                f.write(b"FAKE%06d" % (idx,))
+            self.num_found += 1
+            self.last_find = int(now)
+
+        expected = self.crashes_before + self.get_expected_count(
+            self.crashes_per_min, now
+        )
+        while self.num_crashes < expected:
+            name = "id:%06d,sig:11,src:%06d,time:%d,execs:%d,op:havoc,rep:4" % (
+                self.num_crashes,
+                self.num_seeds,
+                rel_ms,
+                execs,
+            )
+            with open(os.path.join(self.out_dir, "crashes", name), "wb") as f:
+                f.write(b"CRASH%06d" % (self.num_crashes,))
+            self.num_crashes += 1
+            self.last_crash = int(now)
+
+    def get_stats(self, now):
+        corpus_count = self.num_seeds + self.num_found
+        return [
+            ["start_time", int(self.start_time)],
+            ["last_update", int(now)],
+            ["run_time", int(now - self.start_time)],
+            ["fuzzer_pid", os.getpid()],
+            ["cycles_done", int(now - self.start_time) // 600],
+            ["cycles_wo_finds", 0],
+            ["time_wo_finds", int(now) - (self.last_find or int(self.start_time))],
+            ["execs_done", self.get_execs(now)],
+            ["execs_per_sec", "%.2f" % (self.execs_per_sec,)],
+            ["execs_ps_last_min", "%.2f" % (self.execs_per_sec,)],
+            ["corpus_count", corpus_count],
+            ["corpus_favored", max(1, corpus_count // 4)],
+            ["corpus_found", self.num_found],
+            ["corpus_imported", 0],
+            ["corpus_variable", 0],
+            ["max_depth", 1 + self.num_found // 10],
+            ["cur_item", self.num_found % corpus_count],
+            ["pending_favs", 0],
+            ["pending_total", self.num_found // 2],
+            ["stability", "100.00%"],
+            ["bitmap_cvg", "%.2f%%" % (min(99.0, 0.5 + 0.01 * corpus_count),)],
+            ["saved_crashes", self.num_crashes],
+            ["saved_hangs", 0],
+            ["last_find", self.last_find],
+            ["last_crash", self.last_crash],
+            ["last_hang", 0],
+            ["execs_since_crash", self.get_execs(now)],
+            ["exec_timeout", 20],
+            ["slowest_exec_ms", 0],
+            ["peak_rss_mb", 0],
+            ["edges_found", 100 + corpus_count],
+            ["total_edges", 65536],
+            ["var_byte_count", 0],
+            ["havoc_expansion", 0],
+            ["testcache_size", 0],
+            ["testcache_count", corpus_count],
+            ["testcache_evict", 0],
+            ["afl_banner", self.target[0] if self.target else ""],
+            ["afl_version", FAKE_AFL_VERSION],
+            ["target_mode", "default"],
+            ["command_line", self.command_line],
+        ]
+
+    def write_stats(self, now):
+        path = os.path.join(self.out_dir, "fuzzer_stats")
+        with open(path + ".tmp", "w") as f:
+            for name, value in self.get_stats(now):
+                f.write("%-18s: %s\n" % (name, value))
+        os.replace(path + ".tmp", path)
+        self.last_stats = now
+
+    def write_plot(self, now):
+        corpus_count = self.num_seeds + self.num_found
+        with open(os.path.join(self.out_dir, "plot_data"), "a") as f:
+            f.write(
+                "%d, %d, %d, %d, %d, 0, %.2f%%, %d, 0, %d, %.2f, %d, %d\n"
+                % (
+                    int(now - self.start_time),
+                    int(now - self.start_time) // 600,
+                    self.num_found % corpus_count,
+                    corpus_count,
+                    self.num_found // 2,
+                    min(99.0, 0.5 + 0.01 * corpus_count),
+                    self.num_crashes,
+                    1 + self.num_found // 10,
+                    self.execs_per_sec,
+                    self.get_execs(now),
+                    100 + corpus_count,
+                )
+            )
+        self.last_plot = now
+
+    def get_frame(self, now):
+        """
+        Returns status screen resembling the one of afl-fuzz
+        """
+
+        run_time = int(now - self.start_time)
+        since_find = int(now) - self.last_find if self.last_find else None
+        corpus_count = self.num_seeds + self.num_found
+
+        def hms(seconds):
+            if seconds is None:
+                return "none seen yet"
+            return "%d days, %d hrs, %d min, %d sec" % (
+                seconds // 86400,
+                (seconds // 3600) % 24,
+                (seconds // 60) % 60,
+                seconds % 60,
+            )
+
+        lines = [
+            "      american fuzzy lop ++%s {%s} (%s) [explore]"
+            % (FAKE_AFL_VERSION, self.name, self.target[0] if self.target else "?"),
+            "\x1b)0\x0e" + BOX_TOP + "\x0f",
+            "  process timing                   | overall results    ",
+            "        run time : %-30s | cycles done : %d"
+            % (hms(run_time), run_time // 600),
+            "   last new find : %-30s | corpus count : %d"
+            % (hms(since_find), corpus_count),
+            "last saved crash : %-30s | saved crashes : %d"
+            % (
+                hms(int(now) - self.last_crash if self.last_crash else None),
+                self.num_crashes,
+            ),
+            "  cycle progress                   | map coverage",
+            "  now processing : %d (%d%%)"
+            % (self.num_found % corpus_count, 100 * self.num_found // corpus_count),
+            "  stage progress                   | findings in depth",
+            "  now trying : havoc               | favored items : %d"
+            % (max(1, corpus_count // 4),),
+            " total execs : %-20d | new edges on : %d"
+            % (self.get_execs(now), self.num_found),
+            "  exec speed : %.1f/sec" % (self.execs_per_sec,),
+            "  fuzzing strategy yields          | item geometry",
+            "   bit flips : disabled (default, enable with -D)",
+            "  byte flips : disabled (default, enable with -D)",
+            " arithmetics : disabled (default, enable with -D)",
+            "  known ints : disabled (default, enable with -D)",
+            "  dictionary : n/a",
+            "havoc/splice : %d/%d, 0/0" % (self.num_found, self.get_execs(now)),
+            "py/custom/rq : unused, unused, unused, unused",
+            "    trim/eff : n/a, disabled",
+            "\x1b)0\x0e" + BOX_BOTTOM + "\x0f",
+            "                                             [cpu000: 50%]",
+        ]
+        return ("\x1b[H" + "\x1b[0K\n".join(lines) + "\x1b[0K\n").encode()
+
+    def tick(self, now, outbuf):
+        self.add_entries(now)
+        if self.last_stats is None or now - self.last_stats >= self.stats_interval:
+            self.write_stats(now)
+        if self.last_plot is None or now - self.last_plot >= self.plot_interval:
+            self.write_plot(now)
+        outbuf.write(self.get_frame(now))
+        outbuf.flush()
+
+
+def crash(*_args):
+    signal.signal(signal.SIGSEGV, signal.SIG_DFL)
+    os.kill(os.getpid(), signal.SIGSEGV)
+    sleep(1.0)
+    os._exit(139)
+
+
+def hang(*_args):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    while True:
+        sleep(3600)
+
+
+def main():
+    try:
+        options, target = parse_fuzzer_args(sys.argv[1:])
+        fuzzer = FakeFuzzer(options, target)
+    except (ValueError, OSError) as e:
+        sys.exit("[-] PROGRAM ABORT : %s" % (e,))
+
+    outbuf = getattr(sys.stdout, "buffer", sys.stdout)
+    stop = []
+
+    def handler(_signo, _stack_frame):
+        stop.append(True)
+
+    signal.signal(signal.SIGINT, handler)
+    signal.signal(signal.SIGTERM, handler)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, crash)
+        signal.signal(signal.SIGUSR2, hang)
+
+    frame_time = 1.0 / fuzzer.fps if fuzzer.fps > 0 else 1.0
+    try:
+        while len(stop) < 1:
+            now = time()
+            elapsed = now - fuzzer.start_time
+            if fuzzer.crash_after is not None and elapsed >= fuzzer.crash_after:
+                crash()
+            if fuzzer.hang_after is not None and elapsed >= fuzzer.hang_after:
+                hang()
+
+            fuzzer.tick(now, outbuf)
+            sleep(frame_time)
+    except BrokenPipeError:
+        pass  # fuzzman went away
+
+    fuzzer.write_stats(time())
+    try:
+        outbuf.write(b"\n+++ Testing aborted by user +++\n")
+        outbuf.flush()
+    except BrokenPipeError:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
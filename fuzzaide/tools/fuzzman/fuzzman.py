@@ -11,17 +11,28 @@ import sys
 import glob
 import shutil
 import signal
+import socket
+import sqlite3
+import configparser
 from time import sleep, time
 from pprint import pprint
+from functools import partial
+from threading import Lock
 
 from multiprocessing import cpu_count
 
 from fuzzaide.common import which
+from fuzzaide.common.exception import FuzzaideException
 from fuzzaide.common.fuzz_stats import is_afl_fuzzer_stats_old, get_afl_stat_name
 from .args import get_launch_args
-from .running_process import RunningAFLProcess, TimeoutExpired
+from .running_process import RunningAFLProcess, TimeoutExpired, replace_cmd_option
+from .profiler import Profiler, profiled
+from .presets import get_worker_role, is_cmplog_cmd
 from .const import *
 
+METRICS_FILE_NAME = "fuzzman_stats"
+CMPLOG_DEFAULT_RATIO = 0.3  # share of workers of build that get -c
+
 
 class FuzzManager:
     """
@@ -46,6 +57,36 @@ class FuzzManager:
         self.start_time = int(time())
         self.cores_specified = False
         self.num_from_file = 0
+        self.exec_timeout = None  # value of -t if fuzzman chooses it (ms)
+        self.calibrated_timeout = None
+        self.timeout_retune_base = None  # [execs, timeouts] at last retune
+        self.sync_relay = None
+        self.builds = list()  # [name, path] of each build in use
+        self.sync_dirs = list()
+        self.worker_extra_env = None
+        self.preset_plan = None
+        self.pin_cpus = None
+        self.worker_builds = dict()  # worker name -> [name, path] of its build
+        self.build_cmplog = dict()  # (name, path) of build -> [cmplog path, ratio]
+        self.cmplog_workers = dict()  # worker idx -> path of cmplog binary passed in -c
+        self.next_worker_idx = 0
+        # self.procs is replaced, not modified, under this lock
+        self.procs_lock = Lock()
+        self.control_server = None
+        self.headless = getattr(args, "headless", False)
+        self.hot_swap = None
+        self.load_throttle = None
+        self.seed_injector = None
+        self.coverage_monitor = None
+        self.provenance_indexer = None
+        self.stall_monitor = None
+        self.disk_guard = None
+        self.event_log = None
+        self.worker_crashes = dict()  # worker name -> crashes seen in last status check
+        self.reported_exits = set()  # pids of exited workers already in event log
+        self.profiler = None
+        if getattr(args, "profile", False):
+            self.profiler = Profiler(args.profile_dump)
 
     @staticmethod
     def extract_instance_count(amount):
@@ -76,7 +117,10 @@ class FuzzManager:
         args = self.args
 
         params = []
+        cmplog_options = []
         for build_spec in args.builds:
+            build_spec, _, options = build_spec.partition(",")
+            cmplog_options.append(self.extract_build_cmplog_options(options))
             bspec = build_spec.split(":")  # 0:1:2 -> NAME:PATH:N[%]
             num_spec_parts = len(bspec)
             name = None
@@ -127,19 +171,93 @@ class FuzzManager:
                         % (dirpath, args.program[0], path)
                     )
                 params[i][1] = path
+        else:
+            # exact binaries specified (full or partial paths or in PATH)
+            for i, (_, binpath, _, _) in enumerate(params):
+                if which(binpath) is None:
+                    sys.exit(
+                        "Error in --builds argument: file %s not found so it cannot be tested"
+                        % (binpath,)
+                    )
 
-            return params
-
-        # exact binaries specified (full or partial paths or in PATH)
-        for i, (_, binpath, _, _) in enumerate(params):
-            if which(binpath) is None:
+        for (name, path, _, _), cmplog in zip(params, cmplog_options):
+            if cmplog is None:
+                continue
+            if os.path.isdir(cmplog[0]):
+                cmplog[0] = os.path.normpath(os.path.join(cmplog[0], args.program[0]))
+            if which(cmplog[0]) is None:
                 sys.exit(
-                    "Error in --builds argument: file %s not found so it cannot be tested"
-                    % (binpath,)
+                    "Error in --builds argument: cmplog binary %s not found"
+                    % (cmplog[0],)
                 )
+            self.build_cmplog[(name, path)] = cmplog
 
         return params
 
+    @staticmethod
+    def extract_build_cmplog_options(options):
+        """
+        Gets [cmplog path, ratio] from build options like "cmplog=./app_cmplog,cmplog-ratio=0.5"
+        or None if build has no cmplog companion
+        """
+
+        path = None
+        ratio = CMPLOG_DEFAULT_RATIO
+        for option in options.split(","):
+            if len(option) < 1:
+                continue
+            key, _, value = option.partition("=")
+            if key == "cmplog" and len(value) > 0:
+                path = os.path.expanduser(value)
+            elif key == "cmplog-ratio":
+                try:
+                    ratio = float(value)
+                except ValueError:
+                    ratio = -1.0
+                if not 0.0 < ratio <= 1.0:
+                    sys.exit(
+                        "Error in --builds argument: cmplog-ratio should be between 0 and 1 (e.g. 0.3)"
+                    )
+            else:
+                sys.exit(
+                    "Error in --builds argument: unknown build option '%s' "
+                    "(known options: cmplog=PATH, cmplog-ratio=R)" % (option,)
+                )
+
+        if path is None:
+            if options.find("cmplog-ratio") >= 0:
+                sys.exit(
+                    "Error in --builds argument: cmplog-ratio requires cmplog=PATH"
+                )
+            return None
+        return [path, ratio]
+
+    def assign_cmplog_workers(self, used_builds):
+        """
+        Spread workers that get -c evenly among secondary workers of each build with
+        cmplog companion. Each such build gets at least one cmplog worker,
+        main worker gets -c only if the build has no secondary workers
+        """
+
+        num_main = max(1, len(self.sync_dirs))  # first worker of each sync group is -M
+        worker_idxs = dict()  # build -> indices of its secondary workers
+        main_idxs = dict()  # build -> indices of its main workers
+        for i, (groupname, path) in enumerate(used_builds):
+            idxs = main_idxs if i < num_main else worker_idxs
+            idxs.setdefault((groupname, path), []).append(i)
+
+        for build, (cmplog_path, ratio) in self.build_cmplog.items():
+            idxs = worker_idxs.get(build) or main_idxs.get(build, [])
+            chosen = [
+                i
+                for j, i in enumerate(idxs)
+                if int((j + 1) * ratio + 0.5) > int(j * ratio + 0.5)
+            ]
+            if len(chosen) < 1 and len(idxs) > 0:
+                chosen = [idxs[-1]]
+            for i in chosen:
+                self.cmplog_workers[i] = cmplog_path
+
     def adjust_complex_mode_params(self, params):
         """
         For complex mode (--builds). Converts percent ratios to number of instances
@@ -384,6 +502,9 @@ class FuzzManager:
                     "Wasn't able to remove output directory '%s'" % args.output_dir
                 )
 
+        if not args.dump_cmd_file:
+            self.start_event_log()
+
         if args.cmd_file is not None:
             custom_cmds = self.load_custom_cmds(args.cmd_file)
             for i, (worker_name, cmd) in enumerate(custom_cmds):
@@ -400,8 +521,16 @@ class FuzzManager:
                         cmd=cmd,
                         env=worker_env,
                         verbose=args.verbose,
+                        profiler=self.profiler,
                     )
                 )
+                self.log_event("worker_start", self.procs[-1], cmd=cmd)
+            self.start_control_server()
+            self.start_load_throttle()
+            self.start_seed_injector([args.output_dir])
+            self.start_provenance_indexer()
+            self.start_stall_monitor()
+            self.start_disk_guard()
             self.start_time = int(time())
             return
 
@@ -431,61 +560,36 @@ class FuzzManager:
             print("Builds in use:")
             pprint(used_builds)
 
+        if args.auto_timeout:
+            self.calibrate_timeout(sorted(set(path for _, path in used_builds)))
+
         # TODO: maybe split this method for basic and complex modes?
         if args.dump_cmd_file:
             print("# Fuzzer commands for use with --cmd-file option of fuzzman")
 
-        for i, (groupname, path) in enumerate(used_builds):
-            dictionary = ""
-
-            if i == 0:
-                role = "-M"
-                worker_name = "m"
-                if args.dict:
-                    dictionary = " -x " + args.dict
-
-            else:
-                role = "-S"
-                worker_name = "s"
-
-            power_schedule = " -p explore" if i % 2 == 0 else " -p fast"
-
-            worker_name += str(i + 1)
+        # workers are spread over sync groups round-robin, first worker of each group is main
+        num_sync_groups = min(args.sync_groups or 1, len(used_builds))
+        if num_sync_groups > 1:
+            sync_dirs = [
+                os.path.join(args.output_dir, "group%d" % (g + 1))
+                for g in range(num_sync_groups)
+            ]
+        else:
+            sync_dirs = [args.output_dir]
 
-            if args.no_power_schedules:
-                power_schedule = ""
+        self.sync_dirs = sync_dirs
+        self.worker_extra_env = env
+        self.assign_cmplog_workers(used_builds)
+        self.setup_preset(used_builds)
+        for groupname, path in used_builds:
+            if [groupname, path] not in self.builds:
+                self.builds.append([groupname, path])
 
-            cmd = (
-                args.fuzzer_binary
-                + " -i "
-                + args.input_dir
-                + " -o "
-                + args.output_dir
-                + " -m "
-                + args.memory_limit
-                + dictionary
-                + " "
-                + role
-                + " "
-                + worker_name
-                + power_schedule
+        for i, (groupname, path) in enumerate(used_builds):
+            worker_name, cmd, worker_env, sync_dir = self.make_worker_cmd(
+                i, path, groupname
             )
 
-            if args.more_args:
-                cmd += " " + args.more_args
-            cmd += " -- " + path + " " + " ".join(args.program[1:])
-
-            if args.dump_cmd_file:
-                worker_env = dict()
-            else:
-                worker_env = os.environ.copy()
-                worker_env["AFL_FORCE_UI"] = "1"
-
-            if env is not None:
-                worker_env.update(env)
-
-            cmd = cmd.strip()
-
             if args.dump_cmd_file:
                 wenv = " ".join(k + "=" + v for k, v in worker_env.items())
                 if len(wenv) > 0:
@@ -501,14 +605,678 @@ class FuzzManager:
                         cmd=cmd,
                         env=worker_env,
                         verbose=args.verbose,
+                        profiler=self.profiler,
+                        sync_dir=sync_dir,
                     )
                 )
+                self.log_event("worker_start", self.procs[-1], cmd=cmd)
+                self.worker_builds[worker_name] = [groupname, path]
 
+        self.next_worker_idx = len(used_builds)
         if args.dump_cmd_file:
             sys.exit(0)
 
+        if num_sync_groups > 1:
+            print(
+                "Relaying test cases between %d sync groups every %d seconds"
+                % (num_sync_groups, args.sync_interval)
+            )
+            from .sync import SyncRelay
+
+            self.sync_relay = SyncRelay(sync_dirs, args.sync_interval, args.verbose)
+
+        self.start_control_server()
+        self.start_load_throttle()
+        self.start_seed_injector(sync_dirs)
+        self.start_coverage_monitor()
+        self.start_provenance_indexer()
+        self.start_stall_monitor()
+        self.start_disk_guard()
         self.start_time = int(time())
 
+    def start_event_log(self):
+        args = self.args
+        if getattr(args, "no_event_log", True) or args.output_dir is None:
+            return
+
+        try:
+            os.makedirs(args.output_dir, exist_ok=True)
+        except OSError as e:
+            print("Can't create output dir for event log: %s" % (e,), file=sys.stderr)
+            return
+
+        from .events import EventLog, EVENT_LOG_NAME
+
+        path = os.path.join(args.output_dir, EVENT_LOG_NAME)
+        self.event_log = EventLog(path, max_size=args.event_log_max_size)
+        self.log_event(
+            "job_start",
+            output_dir=args.output_dir,
+            instances=args.instances,
+            fuzzer=args.fuzzer_binary,
+        )
+
+    def log_event(self, event, proc=None, **fields):
+        """
+        Add event to event log (if it's enabled), `proc` adds name, group and pid of worker
+        """
+
+        if self.event_log is None:
+            return
+
+        if proc is not None:
+            worker = {
+                "worker": proc.name,
+                "group": proc.groupname,
+                "pid": proc.proc.pid if proc.proc is not None else None,
+            }
+            worker.update(fields)
+            fields = worker
+        self.event_log.log(event, **fields)
+
+    def log_worker_exit(self, proc, popen):
+        """
+        Add worker_exit event with exit code and last stats of worker, once per process
+        """
+
+        if self.event_log is None or popen.pid in self.reported_exits:
+            return
+
+        self.reported_exits.add(popen.pid)
+        fields = {"exit_code": popen.returncode}
+        if popen.returncode is not None and popen.returncode < 0:
+            try:
+                fields["signal"] = signal.Signals(-popen.returncode).name
+            except ValueError:
+                pass
+        from .events import get_stats_snapshot
+
+        stats = self.get_fuzzer_stats(self.args.output_dir, 0, proc, quiet=True)
+        fields["stats"] = get_stats_snapshot(stats)
+        self.log_event("worker_exit", proc, **fields)
+
+    def start_control_server(self):
+        from .control import ControlServer, get_control_socket_path
+
+        args = self.args
+        if args.no_control_socket or not hasattr(socket, "AF_UNIX"):
+            return
+
+        path = args.control_socket or get_control_socket_path(args.output_dir)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.control_server = ControlServer(path, self)
+        except (OSError, FuzzaideException) as e:
+            print("Warning: control socket not available: %s" % (e,), file=sys.stderr)
+            return
+
+        print("Serving control socket %s (see: fuzzman ctl -h)" % (path,))
+
+    def start_load_throttle(self):
+        args = self.args
+        if not getattr(args, "throttle", False):
+            return
+
+        from .throttle import LoadThrottle
+
+        self.load_throttle = LoadThrottle(
+            self,
+            args.throttle_share,
+            args.throttle_cpu_psi,
+            args.throttle_memory_psi,
+            args.throttle_load,
+        )
+        print(
+            "Watching host load using %s"
+            % ("PSI" if self.load_throttle.use_psi else "load average",)
+        )
+
+    def start_seed_injector(self, sync_dirs):
+        args = self.args
+        if getattr(args, "seed_drop", None) is None:
+            return
+
+        from .seeds import SeedInjector
+
+        input_dir = args.input_dir if os.path.isdir(args.input_dir) else None
+        try:
+            self.seed_injector = SeedInjector(
+                self, args.seed_drop, sync_dirs, args.seed_drop_interval, input_dir
+            )
+        except OSError as e:
+            sys.exit("Error: can't set up seed injection: %s" % (e,))
+
+        print("Watching %s for new seeds" % (args.seed_drop,))
+
+    def start_coverage_monitor(self):
+        args = self.args
+        if not getattr(args, "coverage", False) and not getattr(
+            args, "coverage_llvm", None
+        ):
+            return
+
+        from .coverage import (
+            CoverageMonitor,
+            ShowmapRunner,
+            LlvmCovRunner,
+            COVERAGE_DIR_NAME,
+        )
+
+        if args.coverage_llvm is not None:
+            for tool in ("llvm-profdata", "llvm-cov"):
+                if which(tool) is None:
+                    sys.exit("Error: %s is needed for --coverage-llvm" % (tool,))
+            runner = LlvmCovRunner([args.coverage_llvm] + args.program[1:])
+        else:
+            # prefer afl-showmap of the same installation as fuzzer
+            fuzzer_dir = os.path.dirname(which(args.fuzzer_binary))
+            showmap = which("afl-showmap", path=fuzzer_dir) or which("afl-showmap")
+            if showmap is None:
+                sys.exit("Error: afl-showmap is needed for --coverage")
+            runner = ShowmapRunner(showmap, list(args.program), self.exec_timeout)
+
+        coverage_dir = os.path.join(args.output_dir, COVERAGE_DIR_NAME)
+        self.coverage_monitor = CoverageMonitor(
+            self, runner, coverage_dir, args.coverage_interval, args.coverage_jobs
+        )
+        print(
+            "Measuring coverage of new queue entries every %d seconds, see %s"
+            % (args.coverage_interval, coverage_dir)
+        )
+
+    def start_provenance_indexer(self):
+        args = self.args
+        if not getattr(args, "provenance", False):
+            return
+
+        from .provenance import (
+            ProvenanceIndex,
+            ProvenanceIndexer,
+            get_provenance_db_path,
+        )
+
+        path = get_provenance_db_path(args.output_dir)
+        try:
+            index = ProvenanceIndex(path)
+        except sqlite3.Error as e:
+            sys.exit("Error: can't open provenance index %s: %s" % (path, e))
+
+        self.provenance_indexer = ProvenanceIndexer(self, index)
+        print("Indexing findings of all workers to %s" % (path,))
+
+    def start_stall_monitor(self):
+        if getattr(self.args, "no_stall_monitor", True) or not os.path.isdir("/proc"):
+            return
+
+        from .stalls import StallMonitor
+
+        self.stall_monitor = StallMonitor(self)
+
+    def start_disk_guard(self):
+        args = self.args
+        if not getattr(args, "disk_guard", False):
+            return
+
+        from .disk_guard import DiskGuard
+
+        self.disk_guard = DiskGuard(
+            self,
+            args.disk_min_free,
+            args.disk_compact_free,
+            args.disk_cold_age,
+        )
+        print(
+            "Watching free disk space: compacting cold artifacts below %d MB, "
+            "pausing workers below %d MB"
+            % (args.disk_compact_free // 1048576, args.disk_min_free // 1048576)
+        )
+
+    def get_paused_time(self, since=0):
+        """
+        Returns number of seconds the whole job would have been paused since `since`
+        to lose as much worker time as workers spent paused (by throttling, lack of
+        disk space or time slicing of fuzzman multi). Workers paused for several
+        reasons at once count their paused time once
+        """
+
+        procs = self.procs
+        if len(procs) < 1:
+            return 0
+        return int(sum(proc.get_paused_time(since) for proc in procs) / len(procs))
+
+    def setup_preset(self, used_builds):
+        """
+        Resolve --preset for roles of workers that are about to start
+        """
+
+        args = self.args
+        if getattr(args, "preset", None) is None:
+            return
+
+        from .presets import PresetPlan, get_preset
+
+        role_counts = dict()
+        for i, (groupname, path) in enumerate(used_builds):
+            role = get_worker_role(self.make_worker_cmd(i, path)[1], groupname, path)
+            role_counts[role] = role_counts.get(role, 0) + 1
+
+        try:
+            preset = get_preset(args.preset, args.preset_file)
+            self.preset_plan = PresetPlan(
+                args.preset, preset, role_counts, args.ram_budget
+            )
+        except (OSError, ValueError, configparser.Error) as e:
+            sys.exit("Error: can't use preset '%s': %s" % (args.preset, e))
+
+        if self.preset_plan.pin:
+            if which("taskset") is None:
+                sys.exit("Error: taskset is needed to pin workers to cores")
+            self.pin_cpus = sorted(os.sched_getaffinity(0))
+
+        comment = "# " if args.dump_cmd_file else ""
+        print(
+            "%sUsing preset '%s' (test case caches: %d MB total%s)"
+            % (
+                comment,
+                args.preset,
+                self.preset_plan.cache_total,
+                ", workers pinned to cores" if self.pin_cpus else "",
+            )
+        )
+        for line in self.preset_plan.describe(role_counts):
+            print("%s  %s" % (comment, line))
+
+    def make_worker_cmd(self, i, path, groupname=None):
+        """
+        Generate fuzzer command for i-th worker (counting from 0) fuzzing binary `path`.
+        Returns worker name, command, environment and sync dir of the worker
+        """
+
+        args = self.args
+        num_sync_groups = len(self.sync_dirs)
+
+        dictionary = ""
+        timeout = ""
+        if self.exec_timeout is not None:
+            timeout = " -t %d" % (self.exec_timeout,)
+
+        sync_dir = self.sync_dirs[i % num_sync_groups]
+
+        if i < num_sync_groups:
+            role = "-M"
+            worker_name = "m"
+            if args.dict:
+                dictionary = " -x " + args.dict
+
+        else:
+            role = "-S"
+            worker_name = "s"
+
+        power_schedule = " -p explore" if i % 2 == 0 else " -p fast"
+
+        worker_name += str(i + 1)
+
+        if args.no_power_schedules:
+            power_schedule = ""
+
+        cmd = (
+            args.fuzzer_binary
+            + " -i "
+            + args.input_dir
+            + " -o "
+            + sync_dir
+            + " -m "
+            + args.memory_limit
+            + timeout
+            + dictionary
+            + " "
+            + role
+            + " "
+            + worker_name
+            + power_schedule
+        )
+
+        if i in self.cmplog_workers:
+            cmd += " -c " + self.cmplog_workers[i]
+        if args.more_args:
+            cmd += " " + args.more_args
+        cmd += " -- " + path + " " + " ".join(args.program[1:])
+
+        if args.dump_cmd_file:
+            worker_env = dict()
+        else:
+            worker_env = os.environ.copy()
+            worker_env["AFL_FORCE_UI"] = "1"
+
+        cmd = cmd.strip()
+        if self.preset_plan is not None:
+            role = get_worker_role(cmd, groupname, path)
+            for name, value in self.preset_plan.get_env(role).items():
+                worker_env[name] = os.environ.get(name, value)  # user's choice wins
+
+            if self.pin_cpus:
+                worker_env["AFL_NO_AFFINITY"] = "1"
+                cpu = self.pin_cpus[i % len(self.pin_cpus)]
+                cmd = "taskset -c %d %s" % (cpu, cmd)
+
+        if self.worker_extra_env is not None:
+            worker_env.update(self.worker_extra_env)
+
+        return worker_name, cmd, worker_env, sync_dir
+
+    def calibrate_timeout(self, paths):
+        """
+        Run each build on seed corpus in parallel and choose -t value from
+        percentile of measured execution times
+        """
+
+        from .timeout_calibration import (
+            get_seed_paths,
+            measure_exec_times,
+            compute_timeout,
+            format_distribution,
+        )
+
+        args = self.args
+        programs = [[path] + args.program[1:] for path in paths]
+        seeds = get_seed_paths(args.input_dir)
+        if len(seeds) < 1:
+            sys.exit(
+                "Error: no seeds in '%s' to measure execution times on" % args.input_dir
+            )
+
+        comment = "# " if args.dump_cmd_file else ""
+        print(
+            "%sMeasuring execution times of %d build(s) on %d seed(s) using %d jobs"
+            % (comment, len(programs), len(seeds), args.instances)
+        )
+        times = measure_exec_times(programs, seeds, args.instances)
+        self.exec_timeout = compute_timeout(times, args.auto_timeout_percentile)
+        self.calibrated_timeout = self.exec_timeout
+
+        report = format_distribution(
+            times, args.auto_timeout_percentile, self.exec_timeout
+        )
+        for line in report.split("\n"):
+            print(comment + line)
+
+        if args.dump_cmd_file:
+            return
+
+        # keep the report near the results as the screen will be cleared soon
+        try:
+            os.makedirs(args.output_dir, exist_ok=True)
+            with open(os.path.join(args.output_dir, "fuzzman_timeout"), "wt") as f:
+                f.write(report + "\n")
+        except OSError:
+            print("Wasn't able to save timeout calibration report", file=sys.stderr)
+
+    def retune_timeout(self, sum_execs, sum_timeouts):
+        """
+        Adjust -t based on rate of timeouts since the last adjustment.
+        Workers are moved to the new timeout one at a time so the job never stops completely
+        """
+
+        from .timeout_calibration import retune_timeout
+
+        min_execs_for_decision = 100000
+
+        if self.timeout_retune_base is None or sum_execs < self.timeout_retune_base[0]:
+            self.timeout_retune_base = [sum_execs, sum_timeouts]
+
+        base_execs, base_timeouts = self.timeout_retune_base
+        if sum_execs - base_execs >= min_execs_for_decision:
+            new_timeout = retune_timeout(
+                self.exec_timeout,
+                self.calibrated_timeout,
+                sum_execs - base_execs,
+                sum_timeouts - base_timeouts,
+            )
+            if new_timeout != self.exec_timeout:
+                print(
+                    "Timeouts: %d in %d execs. Changing -t from %d to %d"
+                    % (
+                        sum_timeouts - base_timeouts,
+                        sum_execs - base_execs,
+                        self.exec_timeout,
+                        new_timeout,
+                    )
+                )
+                self.exec_timeout = new_timeout
+            self.timeout_retune_base = [sum_execs, sum_timeouts]
+
+        for proc in self.procs:
+            cmd = replace_cmd_option(proc.cmd, "-t", str(self.exec_timeout))
+            if cmd != proc.cmd:
+                print(
+                    "Restarting worker %s with -t %d" % (proc.name, self.exec_timeout)
+                )
+                self.restart_proc(proc, cmd, reason="timeout_retune")
+                break
+
+    def find_build(self, build):
+        """
+        Returns [name, path] of build in use by its name or path.
+        If `build` is None, the only build of this job is returned
+        """
+
+        if build is None:
+            if len(self.builds) == 1:
+                return self.builds[0]
+            raise FuzzaideException(
+                "this job fuzzes %d builds, specify one of them" % (len(self.builds),)
+            )
+
+        for name, path in self.builds:
+            if build in (name, path):
+                return [name, path]
+
+        raise FuzzaideException("no build '%s' in this job" % (build,))
+
+    def add_workers(self, build, count):
+        """
+        Start `count` more secondary workers of given build. Returns names of new workers
+        """
+
+        if self.args.cmd_file is not None:
+            raise FuzzaideException("can't add workers to job started with --cmd-file")
+
+        groupname, path = self.find_build(build)
+        added = []
+        with self.procs_lock:
+            procs = list(self.procs)
+            for _ in range(count):
+                i = self.next_worker_idx
+                self.next_worker_idx += 1
+                self.assign_cmplog_to_new_worker(i, [groupname, path], procs)
+                worker_name, cmd, worker_env, sync_dir = self.make_worker_cmd(
+                    i, path, groupname
+                )
+                print("Starting worker #%d {%s}: %s" % (i + 1, worker_name, cmd))
+                procs.append(
+                    RunningAFLProcess(
+                        name=worker_name,
+                        groupname=groupname,
+                        cmd=cmd,
+                        env=worker_env,
+                        verbose=self.args.verbose,
+                        profiler=self.profiler,
+                        sync_dir=sync_dir,
+                    )
+                )
+                self.log_event("worker_start", procs[-1], cmd=cmd, reason="added")
+                self.worker_builds[worker_name] = [groupname, path]
+                added.append(worker_name)
+            self.procs = procs
+
+        return added
+
+    def assign_cmplog_to_new_worker(self, i, build, procs):
+        """
+        Give -c to new i-th worker of `build` if its workers have less cmplog workers than they should
+        """
+
+        cmplog = self.build_cmplog.get(tuple(build))
+        if cmplog is None:
+            return
+
+        cmplog_path, ratio = cmplog
+        build_procs = [p for p in procs if self.worker_builds.get(p.name) == build]
+        num_cmplog = sum(1 for p in build_procs if is_cmplog_cmd(p.cmd))
+        if num_cmplog < int((len(build_procs) + 1) * ratio + 0.5):
+            self.cmplog_workers[i] = cmplog_path
+
+    def remove_workers(self, build, count):
+        """
+        Stop `count` most recently started secondary workers of given build.
+        Returns names of stopped workers
+        """
+
+        build = self.find_build(build) if self.builds else None
+        with self.procs_lock:
+            candidates = [
+                proc
+                for proc in self.procs
+                if proc.name.startswith("s")
+                and (build is None or self.worker_builds.get(proc.name) == build)
+            ]
+            if len(candidates) < count:
+                raise FuzzaideException(
+                    "only %d secondary workers can be stopped" % (len(candidates),)
+                )
+
+            removed = candidates[-count:]
+            self.procs = [proc for proc in self.procs if proc not in removed]
+
+        for proc in removed:
+            print("Stopping worker %s" % (proc.name,))
+            proc.stop()
+            proc.stop(force=True)
+            self.log_event(
+                "worker_stop", proc, reason="removed", exit_code=proc.proc.returncode
+            )
+
+        return [proc.name for proc in removed]
+
+    def restart_worker(self, worker_name):
+        for proc in self.procs:
+            if proc.name == worker_name:
+                print("Restarting worker %s" % (worker_name,))
+                self.restart_proc(proc, reason="manual")
+                return
+
+        raise FuzzaideException("no worker named '%s'" % (worker_name,))
+
+    def restart_proc(self, proc, cmd=None, reason=None):
+        """
+        Restart worker (optionally with new command) and log it in event log
+        """
+
+        popen = proc.proc
+        result = proc.restart(cmd)
+        fields = {"reason": reason}
+        if popen is not None and popen is not proc.proc:
+            fields["old_pid"] = popen.pid
+            fields["exit_code"] = popen.returncode
+        if cmd is not None:
+            fields["cmd"] = cmd
+        self.log_event("worker_restart", proc, **fields)
+        return result
+
+    def swap_binary(self, build=None, path=None, batch_size=None):
+        """
+        Start rolling restart of workers of given build onto tested program at `path`.
+        If `path` is None, workers are restarted on the same path (program was rebuilt in place).
+        Returns [names of workers to restart, batch size]
+        """
+
+        if self.hot_swap is not None and self.hot_swap.is_alive():
+            raise FuzzaideException(
+                "swap is in progress: %d of %d workers restarted"
+                % (self.hot_swap.num_swapped, len(self.hot_swap.workers))
+            )
+
+        if path is not None and which(path) is None:
+            raise FuzzaideException("program '%s' not found" % (path,))
+
+        if build is None and path is None:
+            old_build = None  # restart everything
+        else:
+            old_build = self.find_build(build)
+
+        workers = [
+            proc
+            for proc in self.procs
+            if old_build is None or self.worker_builds.get(proc.name) == old_build
+        ]
+        if len(workers) < 1:
+            raise FuzzaideException("no workers to restart")
+
+        if batch_size is None:
+            batch_size = self.args.swap_batch or max(1, len(self.procs) // 4)
+        # at least one worker keeps fuzzing while others restart
+        batch_size = max(1, min(batch_size, len(self.procs) - 1))
+
+        if old_build is not None and path is not None:
+            new_build = [old_build[0], path]
+            self.builds = [new_build if b == old_build else b for b in self.builds]
+            if tuple(old_build) in self.build_cmplog:
+                self.build_cmplog[tuple(new_build)] = self.build_cmplog.pop(
+                    tuple(old_build)
+                )
+            for proc in workers:
+                self.worker_builds[proc.name] = new_build
+
+        print(
+            "Swapping tested program of %d workers to %s, %d at a time"
+            % (len(workers), path or "rebuilt binaries", batch_size)
+        )
+        from .hot_swap import RollingSwap
+
+        self.hot_swap = RollingSwap(self, workers, path, batch_size)
+        return [[proc.name for proc in workers], batch_size]
+
+    def get_workers_info(self):
+        """
+        Returns list of dicts describing state and stats of each worker
+        """
+
+        job_stats = self.collect_job_stats(quiet=True)
+        stats_of = {
+            id(proc): [stats, worker] for proc, stats, worker in job_stats["workers"]
+        }
+
+        info = []
+        for proc in self.procs:
+            stats, worker = stats_of.get(id(proc), [{}, {}])
+            info.append(
+                {
+                    "name": proc.name,
+                    "build": proc.groupname,
+                    "pid": proc.proc.pid if proc.proc else None,
+                    "running": proc.proc is not None and proc.proc.poll() is None,
+                    "restarts": proc.total_restarts,
+                    "execs_per_sec": stats.get("execs_per_sec"),
+                    "corpus": worker.get("paths_total"),
+                    "found": worker.get("paths_found"),
+                    "crashes": worker.get("crashes"),
+                    "hangs": worker.get("hangs"),
+                    "stability": stats.get("stability"),
+                    "last_find": worker.get("last_path"),
+                    "cmd": proc.cmd,
+                }
+            )
+
+        return info
+
+    def get_job_totals(self):
+        totals = self.collect_job_stats(quiet=True)
+        del totals["workers"]
+        totals["workers_total"] = len(self.procs)
+        totals["duration"] = int(time()) - self.start_time
+        totals["headless"] = self.headless
+        return totals
+
     def stop(self, grace_sig=signal.SIGINT):
         """
         Stop all fuzzer workers
@@ -525,6 +1293,45 @@ class FuzzManager:
 
         self.job_status_check(onlystats=True)
 
+        if self.control_server is not None:
+            self.control_server.stop()
+            self.control_server.join()
+            self.control_server = None
+
+        if self.hot_swap is not None:
+            self.hot_swap.stop()
+            self.hot_swap.join()
+            self.hot_swap = None
+
+        if self.load_throttle is not None:
+            self.load_throttle.stop()
+            self.load_throttle.join()
+
+        if self.seed_injector is not None:
+            self.seed_injector.stop()
+            self.seed_injector.join()
+
+        if self.coverage_monitor is not None:
+            self.coverage_monitor.stop()
+            self.coverage_monitor.join()
+
+        if self.stall_monitor is not None:
+            self.stall_monitor.stop()
+            self.stall_monitor.join()
+
+        if self.disk_guard is not None:
+            self.disk_guard.stop()
+            self.disk_guard.join()
+
+        if self.provenance_indexer is not None:
+            self.provenance_indexer.stop()
+            self.provenance_indexer.join()
+
+        if self.sync_relay is not None:
+            self.sync_relay.stop()
+            self.sync_relay.join()
+            self.sync_relay = None
+
         for proc in self.procs:
             proc.stop(grace_sig=grace_sig)
 
@@ -535,8 +1342,27 @@ class FuzzManager:
 
         for proc in self.procs:
             proc.stop(force=True)
+
+        if self.event_log is not None:
+            exit_codes = dict(
+                (proc.name, proc.proc.returncode)
+                for proc in self.procs
+                if proc.proc is not None
+            )
+            self.log_event("job_stop", exit_codes=exit_codes)
+            self.event_log.stop()
+            self.event_log.join()
+            self.event_log = None
+
         self.procs = []
 
+        if self.profiler is not None:
+            print("\nTime spent by fuzzman itself:")
+            for line in self.profiler.format_report():
+                print(line)
+            self.profiler.stop()
+
+    @profiled("health_check")
     def health_check(self):
         """
         Check if fuzzer workers are still running, also print each worker status
@@ -546,29 +1372,56 @@ class FuzzManager:
             return False
 
         print("Checking status of workers")
-        num_ok = sum(1 for proc in self.procs if proc.health_check())
+        # workers failing to write to full disk would be restarted again and again
+        restart = self.disk_guard is None or not self.disk_guard.space_low
+        num_ok = 0
+        for proc in self.procs:
+            popen = proc.proc
+            if popen is not None and popen.poll() is not None:
+                self.log_worker_exit(proc, popen)
+
+            if proc.health_check(restart=restart):
+                num_ok += 1
+
+            if proc.proc is not popen:
+                self.log_event(
+                    "worker_restart",
+                    proc,
+                    reason="exited",
+                    restarts=proc.total_restarts,
+                )
 
         print("%d/%d workers report OK status" % (num_ok, len(self.procs)))
         return num_ok > 0
 
+    @profiled("display_next_status_screen")
     def display_next_status_screen(self, outfile=sys.stdout, static_dump=False):
         """
         Show interactive status screen of one fuzzer for approximately 5 seconds
         """
 
-        if len(self.procs) < 1:
+        procs = self.procs
+        if len(procs) < 1:
             print("No status screen to show")
             return
 
-        if len(self.procs) == 1:
-            self.last_shown_screen_idx = 0
+        # workers may be added or removed via control socket
+        self.last_shown_screen_idx %= len(procs)
 
-        outbuf = getattr(outfile, "buffer", outfile)
+        self.display_status_screen(
+            procs[self.last_shown_screen_idx], outfile, static_dump
+        )
 
-        # helper for drawing workaround on linux with fancy boxes mode
-        mqj = b"mqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqj"
+        self.last_shown_screen_idx += 1
+        self.last_shown_screen_idx %= len(procs)
+
+    def display_status_screen(self, instance, outfile=sys.stdout, static_dump=False):
+        """
+        Show status screen of given fuzzer instance
+        """
+
+        outbuf = getattr(outfile, "buffer", outfile)
 
-        instance = self.procs[self.last_shown_screen_idx]
         if self.is_process_still_running(instance.proc):
             outbuf.write(CURSOR_HIDE)
             if static_dump:
@@ -577,20 +1430,7 @@ class FuzzManager:
                 num_dumps = 100
 
             for _ in range(num_dumps):
-                data = instance.get_output(24)
-                need_drawing_workaround = not self.args.no_drawing_workaround and len(
-                    data
-                )
-
-                if need_drawing_workaround:
-                    data[0] = data[0].replace(mqj, b"")
-
-                for line in data:
-                    outbuf.write(line)
-
-                if need_drawing_workaround:
-                    outbuf.write(SET_G1 + bSTG + mqj + bSTOP + cRST + RESET_G1)
-
+                outbuf.write(self.get_status_screen(instance))
                 if not static_dump:
                     sleep(0.05)
             outbuf.write(CURSOR_SHOW)
@@ -603,17 +1443,29 @@ class FuzzManager:
                 else:
                     self.waited_for_child = True
 
-            data = instance.get_output(29)
-            for line in data:
-                outbuf.write(line)
+            outbuf.write(self.get_status_screen(instance))
             if not static_dump:
                 sleep(5.0)
 
         outbuf.write(bSTOP + cRST + RESET_G1 + CURSOR_SHOW)
 
-        if len(self.procs) > 0:
-            self.last_shown_screen_idx += 1
-            self.last_shown_screen_idx %= len(self.procs)
+    def get_status_screen(self, instance):
+        """
+        Returns last status screen of given fuzzer instance,
+        or last lines of its output if it doesn't run anymore
+        """
+
+        if not self.is_process_still_running(instance.proc):
+            return b"".join(instance.get_output(29))
+
+        # helper for drawing workaround on linux with fancy boxes mode
+        mqj = b"mqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqj"
+
+        data = instance.get_output(24)
+        if not self.args.no_drawing_workaround and len(data):
+            data[0] = data[0].replace(mqj, b"")
+            data.append(SET_G1 + bSTG + mqj + bSTOP + cRST + RESET_G1)
+        return b"".join(data)
 
     @staticmethod
     def is_process_still_running(proc):
@@ -624,35 +1476,38 @@ class FuzzManager:
         Print status screens of all fuzzer instances
         """
 
-        self.last_shown_screen_idx = 0
         outbuf = getattr(outfile, "buffer", outfile)
-        for _ in self.procs:
+        for instance in self.procs:
             outbuf.write(
                 b"\n" * 40
             )  # messy "workaround" for overlapping status screens (tmux, etc)
-            self.display_next_status_screen(outfile=outfile, static_dump=True)
+            self.display_status_screen(instance, outfile=outfile, static_dump=True)
 
         outbuf.write(b"\n\n")
 
-    def get_fuzzer_stats(self, output_dir, idx, instance):
+    @profiled("stats_parsing")
+    def get_fuzzer_stats(self, output_dir, idx, instance, quiet=False):
         """
         Form a dictionary from fuzzer_stats file of given fuzzer instance
         """
 
+        # quiet mode is for frequent checks, e.g. while fuzzers are still starting up
+        error = (lambda *a, **k: None) if quiet else partial(print, file=sys.stderr)
+
         if instance.name is None or len(instance.name) < 1:
-            print(
+            error(
                 "Wasn't able to get stats of instance #%d because somehow it has no name"
                 % (idx,),
-                file=sys.stderr,
             )
             return None
 
-        stats_file_path = os.path.join(output_dir, instance.name, "fuzzer_stats")
+        stats_file_path = os.path.join(
+            instance.sync_dir or output_dir, instance.name, "fuzzer_stats"
+        )
         if not os.path.isfile(stats_file_path):
-            print(
+            error(
                 "Wasn't able to get stats of instance %s because somehow it has no fuzzer_stats file"
                 % (instance.name,),
-                file=sys.stderr,
             )
             return None
 
@@ -660,18 +1515,16 @@ class FuzzManager:
             with open(stats_file_path, "rt") as f:
                 data = f.readlines()
         except OSError:
-            print(
+            error(
                 "Wasn't able to get stats of instance %s because of fail to open '%s'"
                 % (instance.name, stats_file_path),
-                file=sys.stderr,
             )
             return None
 
         if data is None:
-            print(
+            error(
                 "Wasn't able to get data of instance %s because its fuzzer_stats file '%s' is empty"
                 % (instance.name, stats_file_path),
-                file=sys.stderr,
             )
             return None
 
@@ -732,29 +1585,31 @@ class FuzzManager:
 
         return "%d sec" % (s,)
 
-    def job_status_check(self, onlystats=False):
+    def collect_job_stats(self, quiet=False):
         """
-        Enumerate fuzzer_stats files, print stats, return True if stopping required
+        Read fuzzer_stats of all workers and sum them up.
+        Returns dict with job totals and list of [instance, fuzzer_stats, worker totals]
         """
 
-        output_dir = self.args.output_dir
-        if output_dir is None or len(output_dir) < 1:
-            return False
-
-        newest_path_stamp = 0
-        newest_hang_stamp = 0
-        newest_crash_stamp = 0
-
-        sum_execs = 0
-        sum_paths = 0
-        sum_hangs = 0
-        sum_crashes = 0
-        sum_restarts = 0
+        job_stats = {
+            "execs": 0,
+            "execs_per_sec": 0.0,
+            "paths": 0,
+            "hangs": 0,
+            "crashes": 0,
+            "restarts": 0,
+            "timeouts": 0,
+            "newest_path_stamp": 0,
+            "newest_hang_stamp": 0,
+            "newest_crash_stamp": 0,
+            "workers": [],
+        }
 
+        output_dir = self.args.output_dir
         use_old_style = None
 
         for idx, instance in enumerate(self.procs, start=1):
-            stats = self.get_fuzzer_stats(output_dir, idx, instance)
+            stats = self.get_fuzzer_stats(output_dir, idx, instance, quiet=quiet)
 
             if not stats:
                 continue
@@ -764,24 +1619,198 @@ class FuzzManager:
                 if use_old_style is None:
                     continue
 
-            crashes = int(
-                stats.get(get_afl_stat_name("unique_crashes", use_old_style), 0)
+            worker = {
+                "crashes": int(
+                    stats.get(get_afl_stat_name("unique_crashes", use_old_style), 0)
+                ),
+                "hangs": int(
+                    stats.get(get_afl_stat_name("unique_hangs", use_old_style), 0)
+                ),
+                "paths_total": int(
+                    stats.get(get_afl_stat_name("paths_total", use_old_style), 0)
+                ),
+                "paths_found": int(
+                    stats.get(get_afl_stat_name("paths_found", use_old_style), 0)
+                ),
+                "last_path": self.update_stat_timestamp(
+                    stats, get_afl_stat_name("last_path", use_old_style), 0
+                ),
+                "run_time": self.get_worker_run_time(stats),
+            }
+            job_stats["workers"].append([instance, stats, worker])
+
+            job_stats["restarts"] += instance.total_restarts
+            job_stats["crashes"] += worker["crashes"]
+            job_stats["hangs"] += worker["hangs"]
+            job_stats["paths"] += worker["paths_total"]
+            job_stats["execs"] += int(stats.get("execs_done", 0))
+            job_stats["timeouts"] += int(stats.get("total_tmout", 0))
+            try:
+                job_stats["execs_per_sec"] += float(stats.get("execs_per_sec", 0))
+            except ValueError:
+                pass
+
+            job_stats["newest_path_stamp"] = max(
+                job_stats["newest_path_stamp"], worker["last_path"]
             )
-            hangs = int(stats.get(get_afl_stat_name("unique_hangs", use_old_style), 0))
-            paths_total = int(
-                stats.get(get_afl_stat_name("paths_total", use_old_style), 0)
+            job_stats["newest_hang_stamp"] = self.update_stat_timestamp(
+                stats,
+                get_afl_stat_name("last_hang", use_old_style),
+                job_stats["newest_hang_stamp"],
             )
-            paths_found = int(
-                stats.get(get_afl_stat_name("paths_found", use_old_style), 0)
+            job_stats["newest_crash_stamp"] = self.update_stat_timestamp(
+                stats,
+                get_afl_stat_name("last_crash", use_old_style),
+                job_stats["newest_crash_stamp"],
             )
 
-            sum_restarts += instance.total_restarts
-            sum_crashes += crashes
-            sum_hangs += hangs
-            sum_paths += paths_total
-            sum_execs += int(stats.get("execs_done", 0))
+        return job_stats
 
-            if not onlystats:
+    def write_metrics(self, job_stats, job_duration, paused_time, stalls):
+        """
+        Write job totals to <output dir>/fuzzman_stats in format of fuzzer_stats
+        """
+
+        metrics = [
+            ["start_time", self.start_time],
+            ["last_update", int(time())],
+            ["run_time", job_duration],
+            ["paused_time", paused_time],
+            ["workers", len(self.procs)],
+            ["workers_alive", len(job_stats["workers"])],
+            ["execs_done", job_stats["execs"]],
+            ["execs_per_sec", "%.2f" % (job_stats["execs_per_sec"],)],
+            ["paths_total", job_stats["paths"]],
+            ["unique_crashes", job_stats["crashes"]],
+            ["unique_hangs", job_stats["hangs"]],
+            ["last_path", job_stats["newest_path_stamp"]],
+            ["restarts", job_stats["restarts"]],
+            ["total_tmout", job_stats["timeouts"]],
+        ]
+        if stalls is not None:
+            for name in ("lost", "cpu", "io", "memory", "other"):
+                metrics.append(["stall_" + name, "%.2f%%" % (100.0 * stalls[name],)])
+            for name in ("cpu", "memory", "io"):
+                if stalls["psi_" + name] is not None:
+                    metrics.append(
+                        ["psi_" + name, "%.2f%%" % (100.0 * stalls["psi_" + name],)]
+                    )
+            if stalls["hint"] is not None:
+                metrics.append(["stall_hint", stalls["hint"]])
+        if self.disk_guard is not None and self.disk_guard.free is not None:
+            metrics.append(["disk_free", self.disk_guard.free])
+            metrics.append(["disk_compacted", self.disk_guard.num_compacted])
+            metrics.append(["disk_reclaimed", self.disk_guard.reclaimed])
+            metrics.append(
+                ["disk_compact_time", "%.1f" % (self.disk_guard.compaction_time,)]
+            )
+
+        if self.profiler is not None and self.profiler.last_usage is not None:
+            cpu_share, rss = self.profiler.last_usage
+            metrics.append(["fuzzman_cpu", "%.2f%%" % (100.0 * cpu_share,)])
+            if rss is not None:
+                metrics.append(["fuzzman_rss", rss])
+
+        path = os.path.join(self.args.output_dir, METRICS_FILE_NAME)
+        try:
+            with open(path + ".tmp", "w") as f:
+                for name, value in metrics:
+                    f.write("%-18s: %s\n" % (name, value))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            if self.args.verbose:
+                print("Can't write %s: %s" % (path, e), file=sys.stderr)
+
+    @staticmethod
+    def get_worker_run_time(stats):
+        try:
+            if "run_time" in stats:
+                return int(stats["run_time"])
+            return int(stats["last_update"]) - int(stats["start_time"])
+        except (KeyError, ValueError):
+            return 0
+
+    def get_cmplog_find_rates(self, job_stats):
+        """
+        Compare workers with -c to plain workers of the same builds.
+        Returns [number of workers, paths found, run hours] for cmplog and plain workers
+        or None if no worker uses cmplog
+        """
+
+        cmplog = [0, 0, 0.0]
+        plain = [0, 0, 0.0]
+        workers = []
+        for instance, _, worker in job_stats["workers"]:
+            build = self.worker_builds.get(instance.name)
+            workers.append([build, is_cmplog_cmd(instance.cmd), worker])
+
+        cmplog_builds = set(tuple(b or ()) for b, is_cmplog, _ in workers if is_cmplog)
+        if len(cmplog_builds) < 1:
+            return None
+
+        for build, is_cmplog, worker in workers:
+            if tuple(build or ()) not in cmplog_builds:
+                continue
+            acc = cmplog if is_cmplog else plain
+            acc[0] += 1
+            acc[1] += worker["paths_found"]
+            acc[2] += worker["run_time"] / 3600.0
+
+        return [cmplog, plain]
+
+    def log_new_crashes(self, job_stats):
+        for instance, stats, worker in job_stats["workers"]:
+            seen = self.worker_crashes.get(instance.name, 0)
+            self.worker_crashes[instance.name] = worker["crashes"]
+            if worker["crashes"] > seen:
+                from .events import get_stats_snapshot
+
+                self.log_event(
+                    "new_crashes",
+                    instance,
+                    count=worker["crashes"] - seen,
+                    total=worker["crashes"],
+                    stats=get_stats_snapshot(stats),
+                )
+
+    def log_stop_check(
+        self, job_stats, job_duration, paused_time, stop, reason, **fields
+    ):
+        self.log_event(
+            "stop_check",
+            stop=stop,
+            reason=reason,
+            duration=job_duration,
+            paused=paused_time,
+            workers=len(self.procs),
+            workers_alive=len(job_stats["workers"]),
+            execs=job_stats["execs"],
+            execs_per_sec=round(job_stats["execs_per_sec"], 2),
+            paths=job_stats["paths"],
+            crashes=job_stats["crashes"],
+            hangs=job_stats["hangs"],
+            restarts=job_stats["restarts"],
+            **fields
+        )
+
+    @profiled("job_status_check")
+    def job_status_check(self, onlystats=False):
+        """
+        Enumerate fuzzer_stats files, print stats, return True if stopping required
+        """
+
+        output_dir = self.args.output_dir
+        if output_dir is None or len(output_dir) < 1:
+            return False
+
+        job_stats = self.collect_job_stats()
+        self.log_new_crashes(job_stats)
+        stalls = None
+        if self.stall_monitor is not None:
+            stalls = self.stall_monitor.collect()
+
+        if not onlystats:
+            for instance, _, worker in job_stats["workers"]:
                 if instance.proc.poll():
                     status = "NOT "
                 else:
@@ -797,33 +1826,73 @@ class FuzzManager:
 
                 print(
                     "\tcrashes: %d, hangs: %d, paths total: %d"
-                    % (crashes, hangs, paths_total)
+                    % (worker["crashes"], worker["hangs"], worker["paths_total"])
                 )
                 print(
                     "\tpaths discovered: %d (%.2f%% of total paths)"
-                    % (paths_found, 100.0 * paths_found / (paths_total or 1))
+                    % (
+                        worker["paths_found"],
+                        100.0 * worker["paths_found"] / (worker["paths_total"] or 1),
+                    )
                 )
+                if stalls is not None and instance.name in stalls["workers"]:
+                    shares = stalls["workers"][instance.name]
+                    print(
+                        "\ton CPU: %.0f%%, waiting for CPU: %.0f%%, writes: %.1f KB/s"
+                        % (
+                            100.0 * shares["run"],
+                            100.0 * shares["wait"],
+                            shares["write_rate"] / 1024.0,
+                        )
+                    )
 
-            newest_path_stamp = self.update_stat_timestamp(
-                stats, get_afl_stat_name("last_path", use_old_style), newest_path_stamp
-            )
-            newest_hang_stamp = self.update_stat_timestamp(
-                stats, get_afl_stat_name("last_hang", use_old_style), newest_hang_stamp
-            )
-            newest_crash_stamp = self.update_stat_timestamp(
-                stats,
-                get_afl_stat_name("last_crash", use_old_style),
-                newest_crash_stamp,
-            )
+        newest_path_stamp = job_stats["newest_path_stamp"]
+        newest_hang_stamp = job_stats["newest_hang_stamp"]
+        newest_crash_stamp = job_stats["newest_crash_stamp"]
+
+        sum_execs = job_stats["execs"]
+        sum_paths = job_stats["paths"]
+        sum_hangs = job_stats["hangs"]
+        sum_crashes = job_stats["crashes"]
+        sum_restarts = job_stats["restarts"]
+        sum_timeouts = job_stats["timeouts"]
 
         print("\nStats of this fuzzing job:")
-        job_duration = int(time()) - self.start_time
+        # time lost to throttling doesn't count towards budgets
+        paused_time = self.get_paused_time()
+        job_duration = int(time()) - self.start_time - paused_time
         print("Duration: %s" % (self.format_seconds(job_duration),))
+        if paused_time > 0:
+            print(
+                "  Paused: %s (host under load or low disk space)"
+                % (self.format_seconds(paused_time),)
+            )
+        if stalls is not None:
+            from .stalls import format_stalls
+
+            print("  Stalls: %s" % (format_stalls(stalls),))
+            if stalls["hint"] is not None:
+                print("    Hint: %s" % (stalls["hint"],))
+        if self.profiler is not None:
+            print(" Fuzzman: %s" % (self.profiler.format_usage(),))
+        budget_spent = (
+            self.args.max_job_duration is not None
+            and job_duration >= self.args.max_job_duration
+        )
+        self.write_metrics(job_stats, job_duration, paused_time, stalls)
 
         if newest_path_stamp == 0:
             if not onlystats:
                 print("\nNo more stats to display (yet)")
-            return False
+            self.log_stop_check(
+                job_stats,
+                job_duration,
+                paused_time,
+                budget_spent,
+                "max_job_duration" if budget_spent else None,
+                final=onlystats,
+            )
+            return budget_spent
 
         e = float(sum_execs)
         c = ""
@@ -847,7 +1916,9 @@ class FuzzManager:
 
         now = int(time())
 
-        newest_path_delta = now - newest_path_stamp
+        newest_path_delta = (
+            now - newest_path_stamp - self.get_paused_time(newest_path_stamp)
+        )
         newest_path_fmt = self.format_seconds(newest_path_delta)
         print("   Paths: %d.\tLast new path: %s ago" % (sum_paths, newest_path_fmt))
 
@@ -868,8 +1939,80 @@ class FuzzManager:
         if sum_restarts > 0:
             print("Fuzzer restarts: %d" % (sum_restarts,))
 
+        if self.sync_relay is not None:
+            print(
+                "Sync relay: %d test cases relayed between groups, %d duplicates skipped"
+                % (self.sync_relay.num_relayed, self.sync_relay.num_duplicates)
+            )
+
+        cmplog_rates = self.get_cmplog_find_rates(job_stats)
+        if cmplog_rates is not None:
+            print(
+                "Cmplog: %s"
+                % (
+                    ", ".join(
+                        "%d %s workers found %d paths (%.1f per worker-hour)"
+                        % (n, kind, found, found / hours if hours > 0 else 0.0)
+                        for kind, (n, found, hours) in zip(
+                            ("cmplog", "plain"), cmplog_rates
+                        )
+                    ),
+                )
+            )
+
+        if self.hot_swap is not None and self.hot_swap.is_alive():
+            print(
+                "Binary swap: %d of %d workers restarted"
+                % (self.hot_swap.num_swapped, len(self.hot_swap.workers))
+            )
+
+        if self.coverage_monitor is not None:
+            summary = self.coverage_monitor.format_summary()
+            if summary is not None:
+                print("Coverage: %s" % (summary,))
+
+        if self.provenance_indexer is not None:
+            print(
+                "Provenance index: %d entries added"
+                % (self.provenance_indexer.num_indexed,)
+            )
+
+        if self.seed_injector is not None:
+            for source, stats in sorted(self.seed_injector.source_stats.items()):
+                print(
+                    "Seeds from %s: %d injected (%d duplicates, %d skipped), "
+                    "%d imported by fuzzers, %d new paths derived"
+                    % (
+                        source,
+                        stats["injected"],
+                        stats["duplicates"],
+                        stats["skipped"],
+                        stats["productive"],
+                        stats["descendants"],
+                    )
+                )
+
+        if self.disk_guard is not None:
+            summary = self.disk_guard.format_summary()
+            if summary is not None:
+                print("Disk: %s" % (summary,))
+
+        if self.load_throttle is not None and self.load_throttle.reason is not None:
+            print(
+                "Throttling: %d workers paused (%s)"
+                % (len(self.load_throttle.paused), self.load_throttle.reason)
+            )
+
+        if self.exec_timeout is not None:
+            print("Timeout: %d ms" % (self.exec_timeout,))
+            if self.args.auto_timeout_retune and not onlystats:
+                self.retune_timeout(sum_execs, sum_timeouts)
+
         # now decide if we need to stop
-        if (
+        stop, reason = False, None
+        if budget_spent:
+            stop, reason = True, "max_job_duration"
+        elif (
             self.args.no_paths_stop is not None
             and self.args.no_paths_stop <= newest_path_delta
         ):
@@ -877,13 +2020,53 @@ class FuzzManager:
                 self.args.minimal_job_duration is not None
                 and job_duration < self.args.minimal_job_duration
             ):
-                return False
-            return True
+                reason = "minimal_job_duration"  # would stop, but too early
+            else:
+                stop, reason = True, "no_paths_stop"
 
-        return False
+        self.log_stop_check(
+            job_stats,
+            job_duration,
+            paused_time,
+            stop,
+            reason,
+            final=onlystats,
+            no_new_paths_for=newest_path_delta,
+        )
+        return stop
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "ctl":
+        from .control import ctl_main
+
+        return ctl_main(sys.argv[2:])
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        from .bench import bench_main  # bench needs FuzzManager defined above
+
+        return bench_main(sys.argv[2:], FuzzManager)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "queue":
+        from .job_queue import queue_main
+
+        return queue_main(sys.argv[2:])
+
+    if len(sys.argv) > 1 and sys.argv[1] == "provenance":
+        from .provenance import provenance_main
+
+        return provenance_main(sys.argv[2:])
+
+    if len(sys.argv) > 1 and sys.argv[1] == "selfbench":
+        from .selfbench import selfbench_main
+
+        return selfbench_main(sys.argv[2:])
+
+    if len(sys.argv) > 1 and sys.argv[1] == "multi":
+        from .multi import multi_main
+
+        return multi_main(sys.argv[2:], FuzzManager)
+
     args = get_launch_args()
 
     retcode = 7
@@ -891,7 +2074,15 @@ def main():
 
     stdoutbuf = getattr(sys.stdout, "buffer", sys.stdout)
 
+    dashboard = None
+    if args.dashboard:
+        from .dashboard import Dashboard
+
+        dashboard = Dashboard(fuzzman)
+
     def handler(_signo, _stack_frame):
+        if dashboard is not None:
+            dashboard.close()
         stdoutbuf.write(bSTOP + cRST + RESET_G1 + CURSOR_SHOW)
         print()
         fuzzman.stop()
@@ -899,19 +2090,35 @@ def main():
 
     signal.signal(signal.SIGINT, handler)
 
+    def swap_handler(_signo, _stack_frame):
+        try:
+            fuzzman.swap_binary()
+        except FuzzaideException as e:
+            print("Error: can't swap tested program: %s" % (e,), file=sys.stderr)
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, swap_handler)
+
     fuzzman.start()
 
-    while True:
-        stdoutbuf.write(TERM_CLEAR)
+    if dashboard is not None:
+        retcode = dashboard.run()  # returns when job should stop
+
+    while dashboard is None:
+        if not fuzzman.headless:
+            stdoutbuf.write(TERM_CLEAR)
         if not fuzzman.health_check():  # this check also prints alive status of workers
             retcode = 1
             break
 
         sleep(5.0)
-        stdoutbuf.write(TERM_CLEAR)
-        fuzzman.display_next_status_screen()  # this displays fuzzer output in real time for ~5 seconds
+        if fuzzman.headless:
+            sleep(5.0)
+        else:
+            stdoutbuf.write(TERM_CLEAR)
+            fuzzman.display_next_status_screen()  # this displays fuzzer output in real time for ~5 seconds
 
-        stdoutbuf.write(TERM_CLEAR)
+            stdoutbuf.write(TERM_CLEAR)
 
         # this function displays stats and decides if we need to stop current fuzzing job
         if fuzzman.job_status_check():
@@ -0,0 +1,126 @@
+# file    :  tools/fuzzman/hot_swap.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Rolling restart of workers onto a new build of tested program
+"""
+
+import os
+import sys
+from time import time
+from threading import Thread, Event
+
+from .running_process import replace_cmd_target
+
+# don't wait forever for fuzzers that fail to calibrate
+CALIBRATION_TIMEOUT_SEC = 600
+
+
+class RollingSwap(Thread):
+    """
+    Restarts `workers` batch by batch (resuming their state with AFL_AUTORESUME).
+    Next batch is only restarted when fuzzers of the previous one finished calibration,
+    so the rest of the job keeps fuzzing all the time
+    """
+
+    def __init__(self, fuzzman, workers, path, batch_size):
+        super().__init__()
+        self.fuzzman = fuzzman
+        self.workers = workers
+        # None: restart on the same binary path (it was rebuilt in place)
+        self.path = path
+        self.batch_size = batch_size
+        self.num_swapped = 0
+        self._stop_evt = Event()
+
+        self.start()
+
+    def get_stats_state(self, proc):
+        """
+        Returns [mtime in ns, fuzzer_pid or None] of fuzzer_stats of worker
+        or None if there's no such file yet
+        """
+
+        stats_path = os.path.join(
+            proc.sync_dir or self.fuzzman.args.output_dir, proc.name, "fuzzer_stats"
+        )
+        try:
+            with open(stats_path, "rt") as f:
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                data = f.read()
+        except OSError:
+            return None
+
+        for line in data.splitlines():
+            key, _, value = line.partition(":")
+            if key.strip() == "fuzzer_pid":
+                try:
+                    return [mtime_ns, int(value)]
+                except ValueError:
+                    break
+        return [mtime_ns, None]
+
+    def is_calibrated(self, proc, restarted_mtime_ns):
+        """
+        afl-fuzz writes fuzzer_stats for the first time after calibration of its queue.
+        Old fuzzer writes it too when it's stopped, so the file only counts if it has
+        pid of the new fuzzer or was written after restart has returned
+        """
+
+        if proc.proc is None or proc.proc.poll() is not None:
+            return False
+
+        state = self.get_stats_state(proc)
+        if state is None:
+            return False
+
+        mtime_ns, pid = state
+        if pid is not None:
+            return pid == proc.proc.pid
+        return restarted_mtime_ns is None or mtime_ns > restarted_mtime_ns
+
+    def wait_for_calibration(self, batch):
+        """
+        `batch` is a list of [worker, mtime of its fuzzer_stats right after restart]
+        """
+
+        deadline = time() + CALIBRATION_TIMEOUT_SEC
+        pending = list(batch)
+        while len(pending) > 0 and not self._stop_evt.wait(1.0):
+            pending = [item for item in pending if not self.is_calibrated(*item)]
+            if len(pending) > 0 and time() > deadline:
+                print(
+                    "Binary swap: workers %s didn't finish calibration in %d seconds, moving on"
+                    % (
+                        ", ".join(proc.name for proc, _ in pending),
+                        CALIBRATION_TIMEOUT_SEC,
+                    ),
+                    file=sys.stderr,
+                )
+                break
+
+    def run(self):
+        for i in range(0, len(self.workers), self.batch_size):
+            batch = []
+            for proc in self.workers[i : i + self.batch_size]:
+                if proc not in self.fuzzman.procs:
+                    continue  # worker was removed meanwhile
+
+                cmd = None
+                if self.path is not None:
+                    cmd = replace_cmd_target(proc.cmd, self.path)
+                self.fuzzman.restart_proc(proc, cmd, reason="swap")
+                # stats written by old fuzzer on its exit are older than this
+                state = self.get_stats_state(proc)
+                batch.append([proc, None if state is None else state[0]])
+
+            self.wait_for_calibration(batch)
+            self.num_swapped += len(batch)
+            if self._stop_evt.is_set():
+                break
+
+    def stop(self):
+        self._stop_evt.set()
@@ -0,0 +1,272 @@
+# file    :  tools/fuzzman/job_queue.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+fuzzman queue: run queued fuzzman jobs back to back.
+Each job is a separate fuzzman process (headless, output saved to log file)
+started as soon as there are enough free cores for its instances.
+Jobs stop by their own policy (--no-paths-stop, --max-job-duration, ...)
+"""
+
+import os
+import sys
+import glob
+import shlex
+import signal
+from time import sleep, time
+from subprocess import Popen, STDOUT, DEVNULL, TimeoutExpired
+
+from .args import get_queue_args, get_queue_job_args, read_named_args_file
+
+QUEUE_POLL_INTERVAL_SEC = 1.0
+QUEUE_STATUS_INTERVAL_SEC = 300
+JOB_STOP_TIMEOUT_SEC = 30
+
+
+def get_options_end(argv, end=None):
+    if end is not None:
+        return end
+    return argv.index("--") if "--" in argv else len(argv)
+
+
+def remove_option(argv, option, end=None):
+    """
+    Returns copy of `argv` without `option` and its value.
+    Only fuzzman options are checked: arguments starting at index `end`
+    (tested program, default: after "--") are left untouched
+    """
+
+    end = get_options_end(argv, end)
+    for i in range(end - 1):
+        if argv[i] == option:
+            return argv[:i] + argv[i + 2 :]
+
+    return list(argv)
+
+
+def set_instances(argv, instances, end=None):
+    """
+    Returns copy of `argv` with number of instances (-n/--instances) set to `instances`,
+    so child fuzzman starts exactly as many instances as the queue counts.
+    Arguments starting at index `end` are left untouched, like in remove_option()
+    """
+
+    end = get_options_end(argv, end)
+    options, rest = list(argv[:end]), list(argv[end:])
+    result = []
+    i = 0
+    while i < len(options):
+        arg = options[i]
+        if arg in ("-n", "--instances"):
+            i += 2  # option and its value
+            continue
+        if arg.startswith("--instances=") or (arg.startswith("-n") and arg != "-n"):
+            i += 1  # value attached to option
+            continue
+        result.append(arg)
+        i += 1
+
+    return ["-n", str(instances)] + result + rest
+
+
+class QueuedJob:
+    def __init__(self, name, argv, total_cores):
+        args = get_queue_job_args(name, argv)
+
+        self.name = name
+        self.priority = args.priority
+        self.cores = min(args.instances or total_cores, total_cores)
+        # arguments of child fuzzman. Only options before tested program are changed:
+        # parser tells where it starts, with or without "--" in front of it
+        end = len(argv) - len(args.program)
+        child_argv = remove_option(argv, "--priority", end)
+        end -= len(argv) - len(child_argv)
+        self.argv = set_instances(child_argv, self.cores, end)
+        self.output_dir = os.path.abspath(args.output_dir)
+        self.proc = None
+        self.log = None
+        self.start_time = None
+        self.duration = None
+        self.returncode = None
+
+
+class JobQueue:
+    def __init__(self, args):
+        self.args = args
+        self.pending = []
+        self.running = []
+        self.finished = []
+        self.known_names = set()
+
+    def add(self, job):
+        if job.name in self.known_names:
+            print("Job '%s' is already queued, skipping" % (job.name,), file=sys.stderr)
+            return
+
+        self.known_names.add(job.name)
+        self.pending.append(job)
+        print(
+            "Queued job '%s' (priority %d, %d cores)"
+            % (job.name, job.priority, job.cores)
+        )
+
+    def load_jobs_file(self, path):
+        for name, argv in read_named_args_file(path):
+            self.add(QueuedJob(name, argv, self.args.cores))
+
+    def scan_jobs_dir(self, path):
+        """
+        Queue NAME.job files that weren't seen before. Broken job files are reported and skipped
+        """
+
+        for job_path in sorted(glob.glob(os.path.join(path, "*.job"))):
+            name = os.path.basename(job_path)[: -len(".job")]
+            if name in self.known_names:
+                continue
+
+            try:
+                with open(job_path, "r") as f:
+                    argv = shlex.split(f.read(), comments=True)
+                job = QueuedJob(name, argv, self.args.cores)
+            except (OSError, ValueError, SystemExit) as e:
+                print(
+                    "Skipping job file '%s': %s" % (job_path, e or "bad arguments"),
+                    file=sys.stderr,
+                )
+                self.known_names.add(name)
+                continue
+
+            self.add(job)
+
+    def get_free_cores(self):
+        return self.args.cores - sum(job.cores for job in self.running)
+
+    def start_ready_jobs(self):
+        """
+        Start pending jobs by priority while they fit into free cores.
+        Smaller jobs may go ahead of a bigger one waiting for its cores
+        """
+
+        self.pending.sort(key=lambda job: -job.priority)  # stable: keeps queue order
+        busy_dirs = [job.output_dir for job in self.running]
+        for job in list(self.pending):
+            if job.cores > self.get_free_cores() or job.output_dir in busy_dirs:
+                continue
+
+            self.pending.remove(job)
+            self.start_job(job)
+            busy_dirs.append(job.output_dir)
+
+    def start_job(self, job):
+        os.makedirs(self.args.log_dir, exist_ok=True)
+        log_path = os.path.join(self.args.log_dir, job.name + ".log")
+        job.log = open(log_path, "ab")
+
+        # options go before program arguments of the job
+        cmd = [sys.executable, "-m", "fuzzaide.tools.fuzzman.fuzzman", "--headless"]
+        cmd.extend(job.argv)
+        print(
+            "Starting job '%s' on %d cores (%d free), output saved to %s"
+            % (job.name, job.cores, self.get_free_cores() - job.cores, log_path)
+        )
+        # own session: Ctrl+C is forwarded by the queue, not delivered to all jobs at once
+        job.proc = Popen(
+            cmd, stdout=job.log, stderr=STDOUT, stdin=DEVNULL, start_new_session=True
+        )
+        job.start_time = time()
+        self.running.append(job)
+
+    def finish_job(self, job):
+        job.returncode = job.proc.returncode
+        job.duration = int(time() - job.start_time)
+        job.log.close()
+        self.running.remove(job)
+        self.finished.append(job)
+
+    def reap_finished_jobs(self):
+        for job in list(self.running):
+            if job.proc.poll() is None:
+                continue
+
+            self.finish_job(job)
+            print(
+                "Job '%s' finished with exit code %d after %d seconds, %d cores released"
+                % (job.name, job.returncode, job.duration, job.cores)
+            )
+
+    def stop(self):
+        for job in self.running:
+            print("Stopping job '%s'" % (job.name,))
+            job.proc.send_signal(signal.SIGINT)
+
+        for job in list(self.running):
+            try:
+                job.proc.wait(JOB_STOP_TIMEOUT_SEC)
+            except TimeoutExpired:
+                print("Killing job '%s'" % (job.name,), file=sys.stderr)
+                job.proc.kill()
+                job.proc.wait()
+            self.finish_job(job)
+
+    def print_status(self):
+        print(
+            "Queue: %d running (%d/%d cores), %d pending, %d finished"
+            % (
+                len(self.running),
+                self.args.cores - self.get_free_cores(),
+                self.args.cores,
+                len(self.pending),
+                len(self.finished),
+            )
+        )
+
+    def print_report(self):
+        fmt = "%-24s %8s %6s %10s %10s"
+        print(fmt % ("job", "priority", "cores", "duration", "exit code"))
+        for job in self.finished:
+            print(
+                fmt % (job.name, job.priority, job.cores, job.duration, job.returncode)
+            )
+        for job in self.pending:
+            print(fmt % (job.name, job.priority, job.cores, "-", "not run"))
+
+
+def queue_main(argv):
+    args = get_queue_args(argv)
+    queue = JobQueue(args)
+
+    jobs_dir = args.jobs if os.path.isdir(args.jobs) else None
+    if jobs_dir is None:
+        queue.load_jobs_file(args.jobs)
+
+    def handler(_signo, _stack_frame):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C may come more than once
+        print()
+        queue.stop()
+        queue.print_report()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, handler)
+
+    last_status = time()
+    while True:
+        if jobs_dir is not None:
+            queue.scan_jobs_dir(jobs_dir)
+
+        queue.reap_finished_jobs()
+        queue.start_ready_jobs()
+
+        if len(queue.running) < 1 and len(queue.pending) < 1 and not args.watch:
+            break
+
+        if time() - last_status >= QUEUE_STATUS_INTERVAL_SEC:
+            queue.print_status()
+            last_status = time()
+
+        sleep(QUEUE_POLL_INTERVAL_SEC)
+
+    queue.print_report()
+    return 0 if all(job.returncode == 0 for job in queue.finished) else 1
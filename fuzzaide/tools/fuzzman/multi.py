@@ -0,0 +1,276 @@
+# file    :  tools/fuzzman/multi.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+fuzzman multi: fuzz several targets on a fixed pool of cores.
+Each target is started with as many instances as it has cores and grows up to its -n
+when it gets more cores. Instances of a target are never stopped: those over its share
+are paused with SIGSTOP (keeping their in-memory state, so switching is free).
+Share of cores of each target depends on its weight and its recent find rate
+"""
+
+import os
+import sys
+import signal
+from time import sleep, time
+
+from .args import get_multi_args, get_multi_target_args, read_named_args_file
+
+HEALTH_CHECK_INTERVAL_SEC = 10
+
+
+class Target:
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.weight = args.weight
+        self.fuzzman = None  # target is started once it gets some cores
+        self.capacity = args.instances  # max number of instances
+        self.slots = 0  # number of instances allowed to run
+        self.find_rate = 0.0  # own finds per running instance-hour during last slice
+        self.last_found = None
+        self.run_time = dict()  # worker name -> seconds it was allowed to run
+        self.core_time = 0.0  # seconds of all instances allowed to run
+
+    def get_capacity(self):
+        if self.fuzzman is not None and self.args.cmd_file is not None:
+            return len(self.fuzzman.procs)  # commands of file are all started at once
+        return self.capacity
+
+    def get_served_time(self):
+        """
+        Core time per unit of weight, targets served least get their turn first
+        """
+
+        return self.core_time / self.weight
+
+    def get_smallest_build(self):
+        """
+        Returns path of build having least instances, new instances go there
+        """
+
+        counts = dict((path, 0) for _, path in self.fuzzman.builds)
+        for proc in self.fuzzman.procs:
+            build = self.fuzzman.worker_builds.get(proc.name)
+            if build is not None and build[1] in counts:
+                counts[build[1]] += 1
+        return min(counts, key=lambda path: counts[path])
+
+
+def load_targets(path, cores):
+    targets = []
+    for name, argv in read_named_args_file(path):
+        args = get_multi_target_args(name, argv)
+        if args.instances is None:
+            args.instances = cores
+        args.headless = True
+        targets.append(Target(name, args))
+
+    output_dirs = [os.path.abspath(t.args.output_dir) for t in targets]
+    if len(set(output_dirs)) != len(output_dirs):
+        sys.exit("Error: each target in '%s' needs its own output dir" % (path,))
+
+    return targets
+
+
+def allocate_slots(scores, capacities, cores, served=None):
+    """
+    Split `cores` between targets proportionally to `scores` (largest remainder method)
+    never giving a target more slots than its capacity (number of instances).
+    While there are enough cores, each target with instances gets at least one slot.
+    Otherwise these slots go to targets with least `served` time first (then to ones
+    with higher scores), so targets take turns instead of the same ones always winning
+    """
+
+    if served is None:
+        served = [0.0] * len(scores)
+
+    slots = [0] * len(scores)
+    active = [i for i, cap in enumerate(capacities) if cap > 0]
+
+    for i in sorted(active, key=lambda i: (served[i], -scores[i]))[:cores]:
+        slots[i] = 1
+
+    left = cores - sum(slots)
+    while left > 0:
+        candidates = [i for i in active if slots[i] < capacities[i]]
+        if len(candidates) < 1:
+            break
+
+        total = sum(scores[i] for i in candidates)
+        quotas = {i: left * scores[i] / total for i in candidates}
+        given = 0
+        for i in candidates:
+            n = min(int(quotas[i]), capacities[i] - slots[i])
+            slots[i] += n
+            given += n
+
+        if given == 0:
+            i = max(candidates, key=lambda i: quotas[i] - int(quotas[i]))
+            slots[i] += 1
+            given = 1
+
+        left -= given
+
+    return slots
+
+
+class FairShareScheduler:
+    def __init__(self, targets, cores, manager_cls):
+        self.targets = targets
+        self.cores = cores
+        self.manager_cls = manager_cls
+
+    def get_started_targets(self):
+        return [t for t in self.targets if t.fuzzman is not None]
+
+    def update_find_rates(self, slice_duration):
+        for t in self.get_started_targets():
+            job_stats = t.fuzzman.collect_job_stats(quiet=True)
+            found = sum(worker["paths_found"] for _, _, worker in job_stats["workers"])
+            if t.last_found is not None and t.slots > 0:
+                t.find_rate = max(0, found - t.last_found) * 3600.0
+                t.find_rate /= t.slots * slice_duration
+            t.last_found = found
+
+    def get_scores(self):
+        """
+        Target score is its weight, up to doubled for the target finding paths fastest.
+        Targets that find nothing keep their weight so they are never starved
+        """
+
+        max_rate = max(t.find_rate for t in self.targets)
+        if max_rate <= 0.0:
+            return [t.weight for t in self.targets]
+
+        return [t.weight * (1.0 + t.find_rate / max_rate) for t in self.targets]
+
+    def account_run_time(self, seconds):
+        for t in self.get_started_targets():
+            for proc in t.fuzzman.procs:
+                if not proc.paused:
+                    t.run_time[proc.name] = t.run_time.get(proc.name, 0.0) + seconds
+                    t.core_time += seconds
+
+    def grow_target(self, target, num_slots):
+        """
+        Start target or add instances to it so that it has `num_slots` instances at least
+        """
+
+        if num_slots < 1:
+            return
+
+        if target.fuzzman is None:
+            print(
+                "Starting target '%s' with %d of %d instances"
+                % (target.name, num_slots, target.capacity)
+            )
+            # every build of --builds needs an instance, extra ones are paused right away
+            target.args.instances = max(num_slots, len(target.args.builds or ()))
+            target.fuzzman = self.manager_cls(target.args)
+            target.fuzzman.start()
+            return
+
+        missing = num_slots - len(target.fuzzman.procs)
+        for _ in range(missing):
+            target.fuzzman.add_workers(target.get_smallest_build(), 1)
+
+    def reschedule(self):
+        capacities = [t.get_capacity() for t in self.targets]
+        served = [t.get_served_time() for t in self.targets]
+        slots = allocate_slots(self.get_scores(), capacities, self.cores, served)
+
+        to_resume = []
+        for t, num_slots in zip(self.targets, slots):
+            t.slots = num_slots
+            self.grow_target(t, num_slots)
+            if t.fuzzman is None:
+                continue
+            # instances that ran least go first, sort is stable so ties keep start order
+            procs = sorted(t.fuzzman.procs, key=lambda p: t.run_time.get(p.name, 0.0))
+            # paused time is excluded from job duration, so --no-paths-stop
+            # and other stop conditions don't count slices the target was paused
+            for proc in procs[num_slots:]:
+                proc.pause("slicing")
+            to_resume.extend(procs[:num_slots])
+
+        # pause first so the pool is never oversubscribed
+        for proc in to_resume:
+            proc.resume("slicing")  # unless throttling or disk guard holds it
+
+    def print_report(self):
+        fmt = "%-20s %8s %10s %10s %12s"
+        print(fmt % ("target", "weight", "instances", "running", "finds/hour"))
+        for t in self.targets:
+            print(
+                fmt
+                % (
+                    t.name,
+                    "%.2f" % t.weight,
+                    0 if t.fuzzman is None else len(t.fuzzman.procs),
+                    t.slots,
+                    "%.1f" % t.find_rate,
+                )
+            )
+
+    def remove_target(self, target):
+        self.targets = [t for t in self.targets if t is not target]
+
+
+def stop_targets(targets):
+    for t in targets:
+        if t.fuzzman is None:
+            continue
+        print("Stopping target '%s'" % (t.name,))
+        t.fuzzman.stop()
+
+
+def multi_main(argv, manager_cls):
+    args = get_multi_args(argv)
+    targets = load_targets(args.targets_file, args.cores)
+
+    # targets are started by the first reschedule with their shares of cores only
+    scheduler = FairShareScheduler(targets, args.cores, manager_cls)
+    scheduler.reschedule()
+
+    def handler(_signo, _stack_frame):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C may come more than once
+        print()
+        stop_targets(scheduler.targets)
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, handler)
+
+    slice_start = time()
+    while len(scheduler.targets) > 0:
+        sleep(HEALTH_CHECK_INTERVAL_SEC)
+        scheduler.account_run_time(HEALTH_CHECK_INTERVAL_SEC)
+
+        for t in scheduler.get_started_targets():
+            print("[%s]" % (t.name,))
+            if not t.fuzzman.health_check():
+                print("Target '%s' has no working instances" % (t.name,))
+                stop_targets([t])
+                scheduler.remove_target(t)
+
+        slice_duration = time() - slice_start
+        if slice_duration < args.slice or len(scheduler.targets) < 1:
+            continue
+
+        for t in scheduler.get_started_targets():
+            print("[%s]" % (t.name,))
+            if t.fuzzman.job_status_check():
+                print("Target '%s': STOP CONDITION MET" % (t.name,))
+                stop_targets([t])
+                scheduler.remove_target(t)
+
+        if len(scheduler.targets) > 0:
+            scheduler.update_find_rates(slice_duration)
+            scheduler.reschedule()
+            scheduler.print_report()
+        slice_start = time()
+
+    return 0
@@ -0,0 +1,231 @@
+# file    :  tools/fuzzman/presets.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Performance presets: AFL++ environment variables set per worker role
+(main, secondary, sanitizer, cmplog) with test case cache sizes fitted into RAM budget
+"""
+
+import os
+import re
+import shlex
+import configparser
+
+ROLES = ("main", "secondary", "sanitizer", "cmplog")
+SANITIZER_NAMES = ("asan", "ubsan", "msan", "tsan", "lsan", "cfisan", "sanitizer")
+TESTCACHE_VAR = "AFL_TESTCACHE_SIZE"
+TESTCACHE_DEFAULT_MB = 50  # what afl-fuzz uses when AFL_TESTCACHE_SIZE is not set
+TESTCACHE_MIN_MB = 2
+
+# "all" applies to every role, role sections override it
+BUILTIN_PRESETS = {
+    "fast": {
+        "pin": True,
+        "all": {"AFL_FAST_CAL": "1", "AFL_CMPLOG_ONLY_NEW": "1"},
+        "main": {TESTCACHE_VAR: "500", "AFL_IMPORT_FIRST": "1"},
+        "secondary": {TESTCACHE_VAR: "200"},
+        "sanitizer": {TESTCACHE_VAR: "50"},
+        "cmplog": {TESTCACHE_VAR: "200"},
+    },
+    "balanced": {
+        "pin": False,
+        "all": {"AFL_CMPLOG_ONLY_NEW": "1"},
+        "main": {TESTCACHE_VAR: "200", "AFL_IMPORT_FIRST": "1"},
+        "secondary": {TESTCACHE_VAR: "100"},
+        "sanitizer": {TESTCACHE_VAR: "20"},
+        "cmplog": {TESTCACHE_VAR: "100"},
+    },
+    "lowmem": {
+        "pin": False,
+        "all": {TESTCACHE_VAR: "5", "AFL_CMPLOG_ONLY_NEW": "1"},
+        "main": {TESTCACHE_VAR: "20"},
+    },
+}
+
+
+def parse_ram_size(text):
+    """
+    Returns number of megabytes in strings like "512", "512M" or "16G"
+    """
+
+    match = re.match(r"^\s*(\d+(?:\.\d+)?)\s*([mMgGtT]?)[bB]?\s*$", text)
+    if match is None:
+        raise ValueError("'%s' is not a size (examples: 512M, 16G)" % (text,))
+
+    value = float(match.group(1))
+    unit = match.group(2).upper()
+    value *= {"": 1, "M": 1, "G": 1024, "T": 1024 * 1024}[unit]
+    return int(value)
+
+
+def load_preset_file(path):
+    """
+    Load presets from INI file. Section [NAME] holds options of preset (pin, inherit)
+    and environment for all roles, sections [NAME:ROLE] hold environment of a role.
+    Returns dict of presets in format of BUILTIN_PRESETS
+    """
+
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str  # keep case of variable names
+    with open(path, "r") as f:
+        parser.read_file(f)
+
+    raw = dict()
+    for section in parser.sections():
+        name, _, role = section.partition(":")
+        role = role or "all"
+        if role not in ROLES + ("all",):
+            raise ValueError(
+                "unknown role '%s' in section [%s], roles are: %s"
+                % (role, section, ", ".join(ROLES))
+            )
+        raw.setdefault(name, dict())[role] = dict(parser.items(section))
+
+    presets = dict()
+
+    def resolve(name, chain=()):
+        if name in presets:
+            return presets[name]
+        if name in chain:
+            raise ValueError("preset '%s' inherits itself" % (name,))
+        if name not in raw:
+            if name in BUILTIN_PRESETS:
+                return BUILTIN_PRESETS[name]
+            raise ValueError("preset '%s' not found" % (name,))
+
+        sections = raw[name]
+        options = sections.get("all", dict())
+        base = dict()
+        if "inherit" in options:
+            base = resolve(options["inherit"], chain + (name,))
+
+        preset = {"pin": base.get("pin", False)}
+        for role in ("all",) + ROLES:
+            preset[role] = dict(base.get(role, dict()))
+            preset[role].update(sections.get(role, dict()))
+
+        for option in ("inherit", "pin"):
+            preset["all"].pop(option, None)
+        if "pin" in options:
+            preset["pin"] = options["pin"].strip().lower() in ("1", "yes", "true", "on")
+
+        presets[name] = preset
+        return preset
+
+    for name in raw:
+        resolve(name)
+
+    return presets
+
+
+def get_preset(name, preset_file=None):
+    """
+    Returns preset `name` from `preset_file` (if given) or built-in presets
+    """
+
+    presets = dict(BUILTIN_PRESETS)
+    if preset_file is not None:
+        presets.update(load_preset_file(preset_file))
+
+    if name not in presets:
+        raise ValueError(
+            "preset '%s' not found, available presets: %s"
+            % (name, ", ".join(sorted(presets)))
+        )
+    return presets[name]
+
+
+def get_fuzzer_args(cmd):
+    """
+    Returns arguments of fuzzer command line that go before tested program
+    """
+
+    args = shlex.split(cmd)
+    if "--" in args:
+        args = args[: args.index("--")]
+    return args
+
+
+def is_cmplog_cmd(cmd):
+    return "-c" in get_fuzzer_args(cmd)
+
+
+def get_worker_role(cmd, build_name=None, path=None):
+    """
+    Returns role of worker: main (-M), cmplog (-c), sanitizer (build name or binary
+    name mentions a sanitizer) or secondary
+    """
+
+    args = get_fuzzer_args(cmd)
+    if "-M" in args:
+        return "main"
+    if "-c" in args:
+        return "cmplog"
+
+    names = [build_name or "", os.path.basename(path or "")]
+    if any(san in name.lower() for name in names for san in SANITIZER_NAMES):
+        return "sanitizer"
+    return "secondary"
+
+
+class PresetPlan:
+    """
+    Environment of each role of preset for given number of workers per role.
+    Test case cache sizes are scaled down proportionally to fit `ram_budget` megabytes
+    """
+
+    def __init__(self, name, preset, role_counts, ram_budget=None):
+        self.name = name
+        self.pin = preset.get("pin", False)
+        self.envs = dict()
+        for role in ROLES:
+            env = dict(preset.get("all", dict()))
+            env.update(preset.get(role, dict()))
+            self.envs[role] = env
+
+        if ram_budget is not None:
+            self.fit_ram_budget(role_counts, ram_budget)
+        self.cache_total = self.get_cache_total(role_counts)
+
+    def get_cache_size(self, role):
+        try:
+            return int(self.envs[role].get(TESTCACHE_VAR, TESTCACHE_DEFAULT_MB))
+        except ValueError:
+            raise ValueError(
+                "bad %s value for role %s: '%s'"
+                % (TESTCACHE_VAR, role, self.envs[role][TESTCACHE_VAR])
+            )
+
+    def get_cache_total(self, role_counts):
+        return sum(self.get_cache_size(r) * n for r, n in role_counts.items())
+
+    def fit_ram_budget(self, role_counts, ram_budget):
+        total = self.get_cache_total(role_counts)
+        if total > ram_budget:
+            factor = float(ram_budget) / total
+            for role in ROLES:
+                size = int(self.get_cache_size(role) * factor)
+                self.envs[role][TESTCACHE_VAR] = str(max(TESTCACHE_MIN_MB, size))
+
+            if self.get_cache_total(role_counts) > ram_budget:
+                num_workers = sum(role_counts.values())
+                raise ValueError(
+                    "RAM budget of %d MB is not enough for test case caches of %d workers "
+                    "(need at least %d MB)"
+                    % (ram_budget, num_workers, num_workers * TESTCACHE_MIN_MB)
+                )
+
+    def get_env(self, role):
+        return dict(self.envs[role])
+
+    def describe(self, role_counts):
+        lines = []
+        for role in ROLES:
+            if role_counts.get(role, 0) < 1:
+                continue
+            env = " ".join("%s=%s" % kv for kv in sorted(self.envs[role].items()))
+            lines.append("%s x%d: %s" % (role, role_counts[role], env or "-"))
+        return lines
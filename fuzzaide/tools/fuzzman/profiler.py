@@ -0,0 +1,201 @@
+# file    :  tools/fuzzman/profiler.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Self-profiling of fuzzman: wall and CPU time spent in phases of monitor loop,
+output threads and stats parsing, CPU usage and RSS of fuzzman process
+"""
+
+import os
+import time
+from functools import wraps
+from threading import RLock
+
+try:
+    import resource
+except ImportError:  # not a POSIX system
+    resource = None
+
+
+def get_thread_cpu_time():
+    """
+    Returns CPU time of calling thread or None on python < 3.7 which can't measure it
+    """
+
+    if not hasattr(time, "thread_time"):
+        return None  # CPU time of whole process would be charged to every span
+    return time.thread_time()
+
+
+def get_thread_cpu_time_since(start):
+    if start is None:
+        return None
+    return get_thread_cpu_time() - start
+
+
+def get_process_cpu_time():
+    t = os.times()
+    return t.user + t.system
+
+
+def get_rss(statm_path="/proc/self/statm"):
+    """
+    Returns resident set size of fuzzman in bytes (peak RSS if /proc is not available)
+    """
+
+    try:
+        with open(statm_path, "rt") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = get_thread_cpu_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(
+            self.name,
+            time.perf_counter() - self.wall,
+            get_thread_cpu_time_since(self.cpu),
+        )
+        return False
+
+
+def profiled(name):
+    """
+    Decorator of methods recording their calls as spans of `self.profiler` (if it's set)
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = getattr(self, "profiler", None)
+            if profiler is None:
+                return method(self, *args, **kwargs)
+            with profiler.span(name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Profiler:
+    """
+    Accumulates timing spans per phase. With `cprofile_path` the main thread
+    is also profiled with cProfile and stats are dumped there on stop
+    """
+
+    def __init__(self, cprofile_path=None):
+        self.spans = dict()  # name -> [calls, wall, cpu or None, max wall]
+        self.lock = RLock()  # SIGINT handler may stop fuzzman inside a span
+        self.start_wall = time.time()
+        self.start_cpu = get_process_cpu_time()
+        self.last_sample = [self.start_wall, self.start_cpu]
+        self.last_usage = None  # [CPU share, RSS]
+
+        self.cprofile_path = cprofile_path
+        self.cprofile = None
+        if cprofile_path is not None:
+            import cProfile
+
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def span(self, name):
+        return Span(self, name)
+
+    def add(self, name, wall, cpu):
+        with self.lock:
+            span = self.spans.get(name)
+            if span is None:
+                self.spans[name] = [1, wall, cpu, wall]
+            else:
+                span[0] += 1
+                span[1] += wall
+                span[2] = None if span[2] is None or cpu is None else span[2] + cpu
+                span[3] = max(span[3], wall)
+
+    def get_usage(self):
+        """
+        Returns [share of one CPU used by fuzzman since previous call, RSS in bytes]
+        """
+
+        now = [time.time(), get_process_cpu_time()]
+        wall = now[0] - self.last_sample[0]
+        cpu_share = (now[1] - self.last_sample[1]) / wall if wall > 0 else 0.0
+        self.last_sample = now
+        self.last_usage = [cpu_share, get_rss()]
+        return self.last_usage
+
+    def format_usage(self):
+        cpu_share, rss = self.get_usage()
+        text = "%.1f%% CPU" % (100.0 * cpu_share,)
+        if rss is not None:
+            text += ", %.1f MB RSS" % (rss / 1048576.0,)
+        return text
+
+    def format_report(self):
+        """
+        Returns lines of table with time spent in each phase
+        """
+
+        wall = time.time() - self.start_wall
+        cpu = get_process_cpu_time() - self.start_cpu
+        lines = [
+            "fuzzman used %.2f sec of CPU in %.0f sec (%.2f%% of one CPU)"
+            % (cpu, wall, 100.0 * cpu / (wall or 1))
+        ]
+        lines.append(
+            "%-24s %8s %10s %10s %10s %10s"
+            % ("phase", "calls", "wall, s", "CPU, s", "avg, ms", "max, ms")
+        )
+        with self.lock:
+            # by CPU time, by wall time if CPU time of threads isn't known
+            spans = sorted(
+                self.spans.items(),
+                key=lambda kv: -(kv[1][1] if kv[1][2] is None else kv[1][2]),
+            )
+            for name, (calls, span_wall, span_cpu, max_wall) in spans:
+                lines.append(
+                    "%-24s %8d %10.3f %10s %10.3f %10.3f"
+                    % (
+                        name,
+                        calls,
+                        span_wall,
+                        "n/a" if span_cpu is None else "%.3f" % (span_cpu,),
+                        1000.0 * span_wall / calls,
+                        1000.0 * max_wall,
+                    )
+                )
+        return lines
+
+    def stop(self):
+        if self.cprofile is None:
+            return
+
+        self.cprofile.disable()
+        try:
+            self.cprofile.dump_stats(self.cprofile_path)
+            print(
+                "cProfile stats saved to %s (see: python -m pstats %s)"
+                % (self.cprofile_path, self.cprofile_path)
+            )
+        except OSError as e:
+            print("Can't save cProfile stats: %s" % (e,))
+        self.cprofile = None
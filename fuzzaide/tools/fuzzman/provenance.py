@@ -0,0 +1,367 @@
+# file    :  tools/fuzzman/provenance.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+SQLite index of queue, crash and hang entries of all fuzzers of a job.
+Fields encoded in entry names by afl-fuzz (id, src, op, time, ...) are stored parsed,
+along with size and sha1 of contents. Index is updated incrementally from directory watches
+"""
+
+import os
+import sys
+import hashlib
+import sqlite3
+from threading import Thread, Event, Lock
+
+from fuzzaide.common import FuzzaideArgumentParser
+from .sync import QueueWatcher, parse_queue_entry_name, RELAY_NAME, SEEDS_NAME
+
+PROVENANCE_DB_NAME = "fuzzman_provenance.sqlite3"
+PROVENANCE_INTERVAL_SEC = 30
+ENTRY_KINDS = ("queue", "crashes", "hangs")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    worker TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    src TEXT,
+    sync TEXT,
+    op TEXT,
+    orig TEXT,
+    sig INTEGER,
+    time INTEGER,
+    new_cov INTEGER NOT NULL,
+    size INTEGER,
+    sha1 TEXT,
+    PRIMARY KEY (worker, kind, id)
+);
+CREATE INDEX IF NOT EXISTS entries_op ON entries (op);
+CREATE INDEX IF NOT EXISTS entries_sha1 ON entries (sha1);
+"""
+
+
+def get_provenance_db_path(output_dir):
+    return os.path.join(output_dir, PROVENANCE_DB_NAME)
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProvenanceIndex:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.lock = Lock()
+        with self.lock:
+            self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def get_indexed_names(self, worker, kind):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT name FROM entries WHERE worker = ? AND kind = ?", (worker, kind)
+            ).fetchall()
+        return set(row["name"] for row in rows)
+
+    def add_entries(self, worker, kind, entry_dir, names):
+        rows = []
+        for name in names:
+            fields = parse_queue_entry_name(name)
+            entry_id = to_int(fields.get("id"))
+            if entry_id is None:
+                continue
+
+            try:
+                with open(os.path.join(entry_dir, name), "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+
+            rows.append(
+                (
+                    worker,
+                    kind,
+                    entry_id,
+                    name,
+                    fields.get("src"),
+                    fields.get("sync"),
+                    fields.get("op"),
+                    fields.get("orig"),
+                    to_int(fields.get("sig")),
+                    to_int(fields.get("time")),
+                    int("+cov" in name.split(",")),
+                    len(data),
+                    hashlib.sha1(data).hexdigest(),
+                )
+            )
+
+        with self.lock:
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return [dict(row) for row in self.db.execute(sql, params).fetchall()]
+
+    def get_operator_yield(self):
+        """
+        Returns number of own findings (not imported from other fuzzers) per mutation operator
+        """
+
+        return self.query(
+            "SELECT COALESCE(op, CASE WHEN orig IS NOT NULL THEN '(seed)' "
+            "ELSE '(unknown)' END) AS op, "
+            "SUM(kind = 'queue') AS paths, SUM(kind = 'queue' AND new_cov) AS new_cov, "
+            "SUM(kind = 'crashes') AS crashes, SUM(kind = 'hangs') AS hangs "
+            "FROM entries WHERE sync IS NULL GROUP BY 1 ORDER BY paths DESC"
+        )
+
+    def get_worker_yield(self):
+        """
+        Returns own findings per worker. Seeds and imported entries are counted separately
+        """
+
+        return self.query(
+            "SELECT worker, "
+            "SUM(kind = 'queue' AND sync IS NULL AND orig IS NULL) AS paths, "
+            "SUM(kind = 'queue' AND sync IS NULL AND orig IS NULL AND new_cov) AS new_cov, "
+            "SUM(kind = 'queue' AND sync IS NOT NULL) AS imported, "
+            "SUM(kind = 'crashes') AS crashes, SUM(kind = 'hangs') AS hangs, "
+            "COUNT(DISTINCT CASE WHEN kind = 'queue' THEN sha1 END) AS unique_paths "
+            "FROM entries GROUP BY worker ORDER BY paths DESC"
+        )
+
+    def get_entry(self, worker, kind, entry_id):
+        rows = self.query(
+            "SELECT * FROM entries WHERE worker = ? AND kind = ? AND id = ?",
+            (worker, kind, entry_id),
+        )
+        return rows[0] if rows else None
+
+    def get_lineage(self, worker, kind, entry_id):
+        """
+        Returns list of entries from given one back to the seed it derives from.
+        First parent is followed for spliced entries, imported entries are followed
+        into queue of the fuzzer they were imported from
+        """
+
+        lineage = []
+        seen = set()
+        entry = self.get_entry(worker, kind, entry_id)
+        while entry is not None:
+            key = (entry["worker"], entry["kind"], entry["id"])
+            if key in seen:
+                break
+            seen.add(key)
+            lineage.append(entry)
+
+            parent_id = to_int((entry["src"] or "").split("+")[0])
+            if parent_id is None:
+                break
+            parent_worker = entry["sync"] or entry["worker"]
+            entry = self.get_entry(parent_worker, "queue", parent_id)
+
+        return lineage
+
+
+def find_worker_dirs(output_dir):
+    """
+    Returns [name, dir] of fuzzer dirs found in output dir and its sync group subdirs
+    """
+
+    workers = []
+    try:
+        names = sorted(os.listdir(output_dir))
+    except OSError:
+        return workers
+
+    for name in names:
+        path = os.path.join(output_dir, name)
+        if name in (RELAY_NAME, SEEDS_NAME) or not os.path.isdir(path):
+            continue
+        if os.path.isdir(os.path.join(path, "queue")):
+            workers.append([name, path])
+        else:
+            workers.extend(find_worker_dirs(path))  # sync group
+
+    return workers
+
+
+def index_new_entries(index, watchers, worker_dirs):
+    """
+    Adds entries that appeared since the last call to index. `watchers` is a dict
+    (worker, kind) -> QueueWatcher kept between calls, watchers are created on first use
+    and skip entries that are already in index. Returns number of entries added
+    """
+
+    num_added = 0
+    for worker, worker_dir in worker_dirs:
+        for kind in ENTRY_KINDS:
+            watcher = watchers.get((worker, kind))
+            if watcher is None:
+                watcher = QueueWatcher(os.path.join(worker_dir, kind))
+                watcher.seen = index.get_indexed_names(worker, kind)
+                watchers[(worker, kind)] = watcher
+
+            names = watcher.get_new_entries(min_age=1.0)
+            if len(names) > 0:
+                num_added += index.add_entries(worker, kind, watcher.path, names)
+
+    return num_added
+
+
+class ProvenanceIndexer(Thread):
+    """
+    Indexes new entries of all workers of running job every `interval` seconds
+    """
+
+    def __init__(self, fuzzman, index, interval=PROVENANCE_INTERVAL_SEC):
+        super().__init__()
+        self.fuzzman = fuzzman
+        self.index = index
+        self.interval = interval
+        self.watchers = dict()
+        self.num_indexed = 0
+        self._stop_evt = Event()
+
+        self.start()
+
+    def get_worker_dirs(self):
+        output_dir = self.fuzzman.args.output_dir
+        return [
+            [proc.name, os.path.join(proc.sync_dir or output_dir, proc.name)]
+            for proc in self.fuzzman.procs
+        ]
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval):
+            self.num_indexed += index_new_entries(
+                self.index, self.watchers, self.get_worker_dirs()
+            )
+
+        # catch up on what was found before stop
+        self.num_indexed += index_new_entries(
+            self.index, self.watchers, self.get_worker_dirs()
+        )
+        self.index.close()
+
+    def stop(self):
+        self._stop_evt.set()
+
+
+def create_provenance_argument_parser():
+    parser = FuzzaideArgumentParser(
+        prog="fuzzman provenance",
+        description="%(prog)s - query index of queue, crash and hang entries of fuzzing job",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="output directory of job (default: ./out)",
+        default="./out",
+    )
+    parser.add_argument(
+        "-u",
+        "--update",
+        help="index entries added since the last update before query "
+        "(needed if job runs without --provenance)",
+        action="store_true",
+    )
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("operators", help="findings per mutation operator")
+    commands.add_parser("workers", help="findings per worker")
+    cmd = commands.add_parser("lineage", help="show chain of entries leading to entry")
+    cmd.add_argument("worker", help="worker name (e.g. s3)")
+    cmd.add_argument("id", type=int, help="entry id (e.g. 12 for id:000012,...)")
+    cmd.add_argument(
+        "-k",
+        "--kind",
+        choices=ENTRY_KINDS,
+        default="crashes",
+        help="entry kind (default: crashes)",
+    )
+
+    parser.set_examples(
+        [
+            ["Show which mutation operators found most paths", "provenance operators"],
+            ["Index job in out/ and show findings per worker", "provenance -u workers"],
+            ["Show how crash id:000003 of s5 was found", "provenance lineage s5 3"],
+        ]
+    )
+    return parser
+
+
+def print_table(rows, columns):
+    fmt = "  ".join("%-20s" if i == 0 else "%10s" for i in range(len(columns)))
+    print(fmt % tuple(columns))
+    for row in rows:
+        print(fmt % tuple(row[col] for col in columns))
+
+
+def provenance_main(argv):
+    parser = create_provenance_argument_parser()
+    if len(argv) < 1:
+        parser.print_help()
+        return 0
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 0
+
+    path = get_provenance_db_path(args.output_dir)
+    if not args.update and not os.path.isfile(path):
+        sys.exit("Error: no index in %s, use -u/--update to create it" % (path,))
+
+    index = ProvenanceIndex(path)
+    if args.update:
+        num_added = index_new_entries(index, dict(), find_worker_dirs(args.output_dir))
+        print("Indexed %d new entries" % (num_added,))
+
+    if args.command == "operators":
+        print_table(
+            index.get_operator_yield(), ["op", "paths", "new_cov", "crashes", "hangs"]
+        )
+    elif args.command == "workers":
+        print_table(
+            index.get_worker_yield(),
+            [
+                "worker",
+                "paths",
+                "new_cov",
+                "imported",
+                "unique_paths",
+                "crashes",
+                "hangs",
+            ],
+        )
+    elif args.command == "lineage":
+        lineage = index.get_lineage(args.worker, args.kind, args.id)
+        if len(lineage) < 1:
+            sys.exit(
+                "Error: no %s entry %d of worker %s" % (args.kind, args.id, args.worker)
+            )
+        for entry in lineage:
+            print("%-10s %-8s %s" % (entry["worker"], entry["kind"], entry["name"]))
+
+    index.close()
+    return 0
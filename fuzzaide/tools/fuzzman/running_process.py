@@ -4,12 +4,90 @@
 # license :  MIT
 # check repository for more information
 
+import os
 import sys
 import shlex
 import signal
+from time import time, perf_counter
 from collections import deque
 from subprocess import Popen, PIPE, TimeoutExpired, SubprocessError
-from threading import Thread, Lock, Event
+from threading import Thread, Lock, RLock, Event
+
+from .profiler import get_thread_cpu_time, get_thread_cpu_time_since
+
+
+def replace_cmd_option(cmd, option, value):
+    """
+    Returns fuzzer command with value of `option` replaced by `value`.
+    Only fuzzer options are checked (arguments after "--" are left untouched).
+    Command is returned as is if option is not found or already has this value
+    """
+
+    args = shlex.split(cmd)
+    end = args.index("--") if "--" in args else len(args)
+    for i in range(end - 1):
+        if args[i] == option:
+            if args[i + 1] == value:
+                return cmd
+            args[i + 1] = value
+            return " ".join(shlex.quote(arg) for arg in args)
+
+    return cmd
+
+
+def replace_cmd_target(cmd, path):
+    """
+    Returns fuzzer command with tested program (first argument after "--") replaced by `path`
+    """
+
+    args = shlex.split(cmd)
+    if "--" not in args or args.index("--") + 1 >= len(args):
+        raise ValueError("no tested program in command: %s" % (cmd,))
+
+    args[args.index("--") + 1] = path
+    return " ".join(shlex.quote(arg) for arg in args)
+
+
+def get_children_map():
+    """
+    Returns dict ppid -> list of child pids of all processes, empty without /proc
+    """
+
+    children = dict()
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/%s/stat" % (entry,), "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue  # process is already gone
+        # comm may contain spaces and parentheses, ppid goes after the last ')'
+        ppid = int(stat[stat.rfind(b")") + 2 :].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    return children
+
+
+def get_process_tree(pid, children=None):
+    """
+    Returns pid and pids of all its descendants (parents go first).
+    Only works where /proc is available, otherwise returns just [pid].
+    `children` from get_children_map() may be passed to look up several trees at once
+    """
+
+    if children is None:
+        children = get_children_map()
+
+    tree = [pid]
+    for p in tree:
+        tree.extend(children.get(p, []))
+    return tree
 
 
 class RunningAFLProcess:
@@ -18,20 +96,32 @@ class RunningAFLProcess:
     This class autorestarts child process up to three restart failures in a row
     """
 
-    def __init__(self, name="", groupname="", cmd=None, env=None, verbose=False):
+    def __init__(
+        self,
+        name="",
+        groupname="",
+        cmd=None,
+        env=None,
+        verbose=False,
+        sync_dir=None,
+        profiler=None,
+    ):
         if cmd is None:
             raise SyntaxError("Can't create RunningAFLProcess without 'cmd' parameter")
 
         self.name = name
         self.groupname = groupname
+        self.sync_dir = sync_dir  # output dir (-o) of this fuzzer
         self.cmd = cmd
         self.env = env
         self.verbose = verbose
+        self.profiler = profiler  # fuzzman.profiler.Profiler or None
         self.proc = None
         self.comm_thread = None
 
         self.buffer = deque(maxlen=100)
         self.lock = Lock()
+        self.start_lock = RLock()  # health checks and manual restarts may race
 
         self.__stop = Event()
         self.waited_for_child = False
@@ -39,22 +129,42 @@ class RunningAFLProcess:
         self.__restarts = 0
         self.total_restarts = 0
 
+        self.paused_since = None  # time of SIGSTOP or None if not paused
+        self.pause_reasons = set()  # e.g. "throttle", worker runs when none is left
+        # [start, end or None] of SIGSTOPs, overlapping reasons are counted once
+        self.pause_intervals = []
+
         self.start()
 
-    def __communication_thread_func(self):
+    def __communication_thread_func(self, proc):
+        profiler = self.profiler
         while True:
-            data = self.proc.stdout.readline()
-            if data is None:
-                break
+            if profiler is not None:
+                cpu_start = get_thread_cpu_time()
+            data = proc.stdout.readline()
+            if not data:
+                break  # process exited, new thread is started on restart
 
             if self.__stop.is_set():
                 break  # leave communication thread
 
+            if profiler is not None:
+                wall_start = perf_counter()  # don't count waiting for output
             self.lock.acquire()
             self.buffer.append(data)
             self.lock.release()
+            if profiler is not None:
+                profiler.add(
+                    "output_drain",
+                    perf_counter() - wall_start,
+                    get_thread_cpu_time_since(cpu_start),
+                )
 
     def start(self, resume=False, env={}):
+        with self.start_lock:
+            return self.__start(resume, env)
+
+    def __start(self, resume, env):
         cmd = self.cmd
 
         if cmd is None:
@@ -88,8 +198,18 @@ class RunningAFLProcess:
                 )
                 return False
 
+            # each process gets its own reader so output of a new process is never left unread
+            self.comm_thread = None
+
+            if self.paused_since is not None:  # new process is not stopped
+                self.pause_reasons.clear()
+                self.end_pause()
+
         if self.comm_thread is None:
-            self.comm_thread = Thread(target=self.__communication_thread_func)
+            self.__stop.clear()
+            self.comm_thread = Thread(
+                target=self.__communication_thread_func, args=(self.proc,)
+            )
             self.comm_thread.start()
             if not self.comm_thread.is_alive():
                 print(
@@ -100,6 +220,91 @@ class RunningAFLProcess:
                 return False
         return True
 
+    def restart(self, cmd=None):
+        """
+        Restart fuzzer (optionally with new command) resuming its previous state.
+        Unlike restarts made by health_check this one is not counted as a failure
+        """
+
+        with self.start_lock:
+            if cmd is not None:
+                self.cmd = cmd
+
+            self.resume()  # stopped process won't handle SIGINT
+            if self.proc is not None and self.proc.poll() is None:
+                self.proc.send_signal(signal.SIGINT)
+                try:
+                    self.proc.wait(3.0)
+                except TimeoutExpired:
+                    self.proc.send_signal(signal.SIGKILL)
+                    self.proc.wait()
+
+            return self.start(resume=True)
+
+    def send_signal_to_tree(self, sig):
+        tree = get_process_tree(self.proc.pid)
+        if sig == signal.SIGCONT:
+            tree.reverse()  # let children run before their parent continues
+
+        for pid in tree:
+            try:
+                os.kill(pid, sig)
+            except OSError:
+                pass  # process exited meanwhile
+
+    def pause(self, reason="manual"):
+        """
+        Stop fuzzer and its children with SIGSTOP keeping their in-memory state.
+        Fuzzer stays paused until all reasons it was paused for are gone
+        """
+
+        with self.start_lock:
+            if self.proc is None or self.proc.poll() is not None:
+                return
+            self.pause_reasons.add(reason)
+            if self.paused_since is not None:
+                return
+            self.send_signal_to_tree(signal.SIGSTOP)
+            self.paused_since = time()
+            self.pause_intervals.append([self.paused_since, None])
+
+    def resume(self, reason=None):
+        """
+        Drop `reason` to be paused and continue fuzzer if no other reasons are left.
+        Without `reason` fuzzer is continued anyway (e.g. to be stopped or restarted)
+        """
+
+        with self.start_lock:
+            if reason is None:
+                self.pause_reasons.clear()
+            else:
+                self.pause_reasons.discard(reason)
+            if self.paused_since is None or len(self.pause_reasons) > 0:
+                return
+            if self.proc is not None and self.proc.poll() is None:
+                self.send_signal_to_tree(signal.SIGCONT)
+            self.end_pause()
+
+    def end_pause(self):
+        self.pause_intervals[-1][1] = time()
+        self.paused_since = None
+
+    @property
+    def paused(self):
+        return self.paused_since is not None
+
+    def get_paused_time(self, since=0):
+        """
+        Returns number of seconds this fuzzer spent paused since `since`
+        """
+
+        now = time()
+        paused_time = 0.0
+        with self.start_lock:
+            for start, end in self.pause_intervals:
+                paused_time += max(0.0, (end or now) - max(start, since))
+        return paused_time
+
     def get_output(self, num_lines=100):
         if num_lines > 100:
             num_lines = 100
@@ -109,6 +314,7 @@ class RunningAFLProcess:
         return lines
 
     def stop(self, force=False, grace_sig=signal.SIGINT):
+        self.resume()  # stopped process won't handle grace_sig
         if self.comm_thread is not None and self.comm_thread.is_alive():
             self.__stop.set()
             self.comm_thread.join(3.0)
@@ -133,16 +339,22 @@ class RunningAFLProcess:
                 except TimeoutExpired:
                     pass
 
-    def health_check(self):
+    def health_check(self, restart=True):
         quality = 2
         print("[i] Instance '%s' status:" % self.cmd)
         if self.proc and self.proc.poll() is None:
-            print("\tRunning. Process Id: %d" % self.proc.pid)
+            print(
+                "\t%s. Process Id: %d"
+                % ("Paused" if self.paused else "Running", self.proc.pid)
+            )
             self.__restarts -= (
                 5  # failed attempts to restart are cooling down over time
             )
             if self.__restarts < 0:
                 self.__restarts = 0
+        elif not restart:
+            print("[!]\tNot running, not restarting for now", file=sys.stderr)
+            quality -= 1
         else:
             self.__restarts += 10
             if self.__restarts > 29:  # three failed restarts in a row -> give up
@@ -0,0 +1,207 @@
+# file    :  tools/fuzzman/seeds.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Injection of new seeds into running job: files put into drop directory are
+deduplicated and published via synthetic sync directory, fuzzers import them on next sync.
+Seeds are tracked in queues of fuzzers to see which sources give productive seeds
+"""
+
+import os
+import sys
+import hashlib
+from time import time
+from threading import Thread, Event
+
+from .sync import QueueWatcher, SyntheticSyncDir, SEEDS_NAME, parse_queue_entry_name
+
+SEED_MAX_SIZE = 1024 * 1024  # afl-fuzz refuses larger test cases
+SEED_MIN_AGE_SEC = 2.0  # younger files may still be written
+SOURCES_FILE_NAME = "sources.tsv"
+
+
+def hash_files_in_dir(path):
+    hashes = set()
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                with open(os.path.join(root, name), "rb") as f:
+                    hashes.add(hashlib.sha1(f.read()).digest())
+            except OSError:
+                continue
+    return hashes
+
+
+class SeedInjector(Thread):
+    """
+    Watches `drop_dir` for new files, source of seed is the name of first level
+    subdirectory of `drop_dir` it was put into (or "drop" for files put directly into it)
+    """
+
+    def __init__(self, fuzzman, drop_dir, sync_dirs, interval, input_dir=None):
+        super().__init__()
+        self.fuzzman = fuzzman
+        self.drop_dir = drop_dir
+        self.interval = interval
+
+        self.outputs = [SyntheticSyncDir(d, SEEDS_NAME) for d in sync_dirs]
+        next_id = max(output.next_id for output in self.outputs)
+        for output in self.outputs:
+            output.next_id = next_id  # same seed gets same id in all sync groups
+        self.sources_path = os.path.join(
+            os.path.dirname(self.outputs[0].queue_dir), SOURCES_FILE_NAME
+        )
+
+        self.source_stats = dict()
+        self.seed_sources = dict()  # seed id -> source
+        self.load_sources()
+
+        # seeds already in the job are not injected again
+        self.hashes = hash_files_in_dir(self.outputs[0].queue_dir)
+        if input_dir is not None:
+            self.hashes.update(hash_files_in_dir(input_dir))
+
+        self.drop_seen = dict()  # path -> [size, mtime] when it was processed
+        self.watchers = dict()  # queue dir -> QueueWatcher
+        self.origins = dict()  # (fuzzer name, entry id) -> seed id it descends from
+        self.productive = set()  # ids of seeds imported by fuzzers
+        self._stop_evt = Event()
+
+        self.start()
+
+    def get_stats_of(self, source):
+        stats = self.source_stats.get(source)
+        if stats is None:
+            stats = self.source_stats[source] = {
+                "injected": 0,
+                "duplicates": 0,
+                "skipped": 0,
+                "productive": 0,
+                "descendants": 0,
+            }
+        return stats
+
+    def load_sources(self):
+        try:
+            with open(self.sources_path, "r") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        for line in lines:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 2:
+                continue
+            self.seed_sources[fields[0]] = fields[1]
+            self.get_stats_of(fields[1])["injected"] += 1
+
+    def get_source(self, path):
+        rel_path = os.path.relpath(path, self.drop_dir)
+        parts = rel_path.split(os.sep)
+        return parts[0] if len(parts) > 1 else "drop"
+
+    def inject(self, path, data):
+        source = self.get_source(path)
+        stats = self.get_stats_of(source)
+
+        digest = hashlib.sha1(data).digest()
+        if digest in self.hashes:
+            stats["duplicates"] += 1
+            return None
+
+        name = None
+        for output in self.outputs:
+            name = output.add(data)
+        seed_id = name[3:]
+        self.hashes.add(digest)
+
+        self.seed_sources[seed_id] = source
+        with open(self.sources_path, "a") as f:
+            f.write("%s\t%s\t%s\t%s\n" % (seed_id, source, digest.hex(), path))
+        stats["injected"] += 1
+        return seed_id
+
+    def scan_drop_dir(self):
+        now = time()
+        for root, dirs, names in os.walk(self.drop_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in sorted(names):
+                if name.startswith("."):
+                    continue
+
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+
+                state = [st.st_size, st.st_mtime_ns]
+                if (
+                    self.drop_seen.get(path) == state
+                    or now - st.st_mtime < SEED_MIN_AGE_SEC
+                ):
+                    continue
+                self.drop_seen[path] = state
+
+                if st.st_size > SEED_MAX_SIZE or st.st_size == 0:
+                    self.get_stats_of(self.get_source(path))["skipped"] += 1
+                    continue
+
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    self.inject(path, data)
+                except OSError as e:
+                    print("Can't inject seed '%s': %s" % (path, e), file=sys.stderr)
+
+    def track_queue_entry(self, fuzzer_name, entry_name):
+        fields = parse_queue_entry_name(entry_name)
+        if "id" not in fields:
+            return
+
+        key = (fuzzer_name, fields["id"])
+        if fields.get("sync") == SEEDS_NAME:
+            seed_id = fields.get("src")
+            if seed_id in self.seed_sources:
+                self.origins[key] = seed_id
+                if seed_id not in self.productive:
+                    self.productive.add(seed_id)
+                    source = self.seed_sources[seed_id]
+                    self.get_stats_of(source)["productive"] += 1
+            return
+
+        if "sync" in fields:  # copy of other fuzzer's finding, not a new one
+            parent = (fields["sync"], fields.get("src"))
+            if parent in self.origins:
+                self.origins[key] = self.origins[parent]
+            return
+
+        for parent_id in fields.get("src", "").split("+"):
+            seed_id = self.origins.get((fuzzer_name, parent_id))
+            if seed_id is not None:
+                self.origins[key] = seed_id
+                source = self.seed_sources[seed_id]
+                self.get_stats_of(source)["descendants"] += 1
+                return
+
+    def track_fuzzers(self):
+        output_dir = self.fuzzman.args.output_dir
+        for proc in self.fuzzman.procs:
+            queue_dir = os.path.join(proc.sync_dir or output_dir, proc.name, "queue")
+            watcher = self.watchers.get(queue_dir)
+            if watcher is None:
+                watcher = self.watchers[queue_dir] = QueueWatcher(queue_dir)
+
+            for entry_name in watcher.get_new_entries():
+                self.track_queue_entry(proc.name, entry_name)
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval):
+            self.scan_drop_dir()
+            self.track_fuzzers()
+
+    def stop(self):
+        self._stop_evt.set()
@@ -0,0 +1,353 @@
+# file    :  tools/fuzzman/selfbench.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+fuzzman selfbench: run fuzzman with growing number of fake afl-fuzz workers
+and measure its own CPU usage, memory, thread count and how late it notices
+that stop condition is met. Results can be saved and compared to a baseline
+"""
+
+import os
+import sys
+import json
+import shlex
+import shutil
+import signal
+import tempfile
+import subprocess
+from time import sleep, time
+
+import fuzzaide
+from .args import get_selfbench_args
+from .events import EVENT_LOG_NAME, read_events
+
+SELFBENCH_SAMPLE_SEC = 1.0
+# stop fuzzman this long after it should have stopped by itself
+SELFBENCH_GRACE_SEC = 120
+LATENCY_SLACK_SEC = 5.0  # stop latency may grow this much before it's a regression
+CPU_SLACK = 0.01  # and CPU usage this much (share of one CPU)
+
+
+def write_fake_fuzzer(dir_path):
+    """
+    Create executable running fake_afl with this copy of fuzzaide. Returns its path
+    """
+
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(fuzzaide.__file__)))
+    path = os.path.join(dir_path, "fake-afl-fuzz")
+    with open(path, "w") as f:
+        f.write(
+            "#!%s\n"
+            "import sys\n"
+            "sys.path.insert(0, %r)\n"
+            "from fuzzaide.tools.fuzzman.fake_afl import main\n"
+            "sys.exit(main())\n" % (sys.executable, package_root)
+        )
+    os.chmod(path, 0o755)
+    return path
+
+
+def read_process_usage(pid):
+    """
+    Returns [user + system CPU ticks, RSS in bytes, number of threads] of process
+    (not including its children) or None if process is gone
+    """
+
+    try:
+        with open("/proc/%d/stat" % (pid,), "rb") as f:
+            stat = f.read()
+        with open("/proc/%d/status" % (pid,), "rt") as f:
+            status = f.read()
+    except OSError:
+        return None
+
+    fields = stat[stat.rfind(b")") + 2 :].split()
+    usage = [int(fields[11]) + int(fields[12]), 0, 0]
+    for line in status.splitlines():
+        name, _, value = line.partition(":")
+        if name == "VmRSS":
+            usage[1] = int(value.split()[0]) * 1024
+        elif name == "Threads":
+            usage[2] = int(value)
+    return usage
+
+
+def get_newest_find(output_dir):
+    """
+    Returns newest last_find (last_path) stamp of all workers in output dir
+    """
+
+    newest = 0
+    for name in os.listdir(output_dir):
+        try:
+            with open(os.path.join(output_dir, name, "fuzzer_stats"), "rt") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key.strip() in ("last_find", "last_path"):
+                        newest = max(newest, int(value))
+        except (OSError, ValueError):
+            continue
+    return newest
+
+
+def get_stop_time(output_dir):
+    """
+    Returns time of stop condition check that decided to stop the job, from event log
+    """
+
+    for event in read_events(os.path.join(output_dir, EVENT_LOG_NAME)):
+        if event.get("event") == "stop_check" and event.get("stop"):
+            return event["time"]
+    return None
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Compare results to baseline (both are dicts: worker count -> measurements).
+    Returns list of descriptions of regressions
+    """
+
+    regressions = []
+    for count, result in sorted(results.items(), key=lambda kv: int(kv[0])):
+        base = baseline.get(str(count))
+        if base is None:
+            continue
+
+        checks = [
+            ["CPU usage", "cpu", base["cpu"] * (1 + tolerance) + CPU_SLACK],
+            ["RSS", "rss", base["rss"] * (1 + tolerance)],
+            ["thread count", "threads", base["threads"] * (1 + tolerance)],
+        ]
+        if base.get("stop_latency") is not None:
+            checks.append(
+                [
+                    "stop latency",
+                    "stop_latency",
+                    base["stop_latency"] * (1 + tolerance) + LATENCY_SLACK_SEC,
+                ]
+            )
+
+        for title, key, limit in checks:
+            value = result.get(key)
+            if value is None:
+                if key == "stop_latency":
+                    regressions.append("%s workers: job didn't stop" % (count,))
+                continue
+            if value > limit:
+                regressions.append(
+                    "%s workers: %s is %s, baseline %s"
+                    % (
+                        count,
+                        title,
+                        format_value(key, value),
+                        format_value(key, base[key]),
+                    )
+                )
+    return regressions
+
+
+def format_value(key, value):
+    if value is None:
+        return "-"
+    if key == "cpu":
+        return "%.1f%%" % (100.0 * value,)
+    if key == "rss":
+        return "%.1f MB" % (value / 1048576.0,)
+    if key == "stop_latency":
+        return "%.1f sec" % (value,)
+    return "%d" % (value,)
+
+
+class SelfBenchmark:
+    """
+    Runs fuzzman as child process with fake workers for each worker count
+    and samples its resource usage from /proc
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.results = dict()  # worker count -> measurements
+        self.hz = os.sysconf("SC_CLK_TCK")
+
+    def get_fuzzman_cmd(self, count, fake_fuzzer, seeds_dir, output_dir):
+        cmd = [
+            sys.executable,
+            "-m",
+            "fuzzaide.tools.fuzzman.fuzzman",
+            "--headless",
+            "--fuzzer-binary",
+            fake_fuzzer,
+            "-n",
+            str(count),
+            "-i",
+            seeds_dir,
+            "-o",
+            output_dir,
+            "--no-paths-stop",
+            str(self.args.no_paths_stop),
+        ]
+        cmd += shlex.split(self.args.fuzzman_args or "")
+        cmd += ["--", sys.executable, "@@"]  # target is never run by fake fuzzer
+        return cmd
+
+    def get_env(self, work_dir):
+        env = os.environ.copy()
+        env["FAKE_AFL_FPS"] = str(self.args.fps)
+        env["FAKE_AFL_STATS_INTERVAL"] = str(self.args.stats_interval)
+        env["FAKE_AFL_FINDS_PER_MIN"] = "60"
+        env["FAKE_AFL_FIND_UNTIL"] = str(self.args.find_window)
+        package_root = os.path.dirname(
+            os.path.dirname(os.path.abspath(fuzzaide.__file__))
+        )
+        env["PYTHONPATH"] = os.pathsep.join(
+            [package_root] + [p for p in [env.get("PYTHONPATH")] if p]
+        )
+        return env
+
+    def measure(self, count, work_dir):
+        seeds_dir = os.path.join(work_dir, "in")
+        output_dir = os.path.join(work_dir, "out")
+        os.makedirs(seeds_dir)
+        with open(os.path.join(seeds_dir, "seed"), "w") as f:
+            f.write("12345")
+        fake_fuzzer = write_fake_fuzzer(work_dir)
+
+        cmd = self.get_fuzzman_cmd(count, fake_fuzzer, seeds_dir, output_dir)
+        deadline = (
+            time()
+            + self.args.find_window
+            + self.args.no_paths_stop
+            + SELFBENCH_GRACE_SEC
+        )
+        print(
+            "\n[selfbench] Running fuzzman with %d fake workers (find window %d sec, "
+            "--no-paths-stop %d)"
+            % (count, self.args.find_window, self.args.no_paths_stop)
+        )
+
+        samples = []
+        with open(os.path.join(work_dir, "fuzzman.log"), "wb") as log:
+            start = time()
+            proc = subprocess.Popen(
+                cmd, stdout=log, stderr=subprocess.STDOUT, env=self.get_env(work_dir)
+            )
+            try:
+                while proc.poll() is None:
+                    usage = read_process_usage(proc.pid)
+                    if usage is not None:
+                        samples.append([time()] + usage)
+                    if time() > deadline:
+                        print(
+                            "[selfbench] fuzzman didn't stop by itself, interrupting",
+                            file=sys.stderr,
+                        )
+                        proc.send_signal(signal.SIGINT)
+                        proc.wait()
+                        break
+                    sleep(SELFBENCH_SAMPLE_SEC)
+            except KeyboardInterrupt:
+                proc.send_signal(signal.SIGINT)
+                proc.wait()
+                raise
+            end = time()
+
+        if len(samples) < 2:
+            print("[selfbench] No samples of fuzzman process", file=sys.stderr)
+            return None
+
+        first, last = samples[0], samples[-1]
+        result = {
+            "cpu": (last[1] - first[1]) / float(self.hz) / (last[0] - first[0]),
+            "rss": max(s[2] for s in samples),
+            "threads": max(s[3] for s in samples),
+            "duration": end - start,
+            "exit_code": proc.returncode,
+            "stop_latency": None,
+        }
+
+        stop_time = get_stop_time(output_dir)
+        newest_find = get_newest_find(output_dir)
+        if stop_time is not None and newest_find > 0:
+            result["stop_latency"] = max(
+                0.0, stop_time - newest_find - self.args.no_paths_stop
+            )
+        return result
+
+    def run(self):
+        for count in self.args.workers:
+            work_dir = tempfile.mkdtemp(
+                prefix="selfbench_n%d_" % (count,), dir=self.args.work_dir
+            )
+            try:
+                result = self.measure(count, work_dir)
+            finally:
+                if self.args.keep:
+                    print("[selfbench] Files of this run are kept in %s" % (work_dir,))
+                else:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+
+            if result is not None:
+                self.results[str(count)] = result
+
+    def print_report(self):
+        if len(self.results) < 1:
+            print("\n[selfbench] No results")
+            return
+
+        print("\n[selfbench] Results:")
+        print(
+            "%8s %10s %14s %10s %8s %14s"
+            % ("workers", "CPU", "CPU/worker", "RSS", "threads", "stop latency")
+        )
+        for count, r in sorted(self.results.items(), key=lambda kv: int(kv[0])):
+            print(
+                "%8s %10s %14s %10s %8d %14s"
+                % (
+                    count,
+                    format_value("cpu", r["cpu"]),
+                    "%.2f ms/s" % (1000.0 * r["cpu"] / int(count),),
+                    format_value("rss", r["rss"]),
+                    r["threads"],
+                    format_value("stop_latency", r["stop_latency"]),
+                )
+            )
+
+
+def selfbench_main(argv):
+    args = get_selfbench_args(argv)
+
+    if not os.path.isdir("/proc"):
+        sys.exit("Error: fuzzman selfbench needs /proc to measure fuzzman process")
+
+    bench = SelfBenchmark(args)
+    try:
+        bench.run()
+    except KeyboardInterrupt:
+        print("\n[selfbench] Interrupted, reporting partial results")
+
+    bench.print_report()
+
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump(bench.results, f, indent=2, sort_keys=True)
+        print("[selfbench] Results saved to %s" % (args.save,))
+
+    if args.baseline is not None:
+        try:
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            sys.exit("Error: can't read baseline '%s': %s" % (args.baseline, e))
+
+        regressions = find_regressions(bench.results, baseline, args.tolerance)
+        if len(regressions) > 0:
+            print("\n[selfbench] Regressions compared to %s:" % (args.baseline,))
+            for text in regressions:
+                print("  " + text)
+            return 1
+        print("\n[selfbench] No regressions compared to %s" % (args.baseline,))
+
+    return 0
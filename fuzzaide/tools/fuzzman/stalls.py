@@ -0,0 +1,332 @@
+# file    :  tools/fuzzman/stalls.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Find out where worker time goes: CPU time and run queue wait of each worker's process tree
+are sampled from /proc together with system pressure stall information (PSI).
+Time workers didn't spend running is attributed to CPU contention, I/O or memory reclaim
+"""
+
+import os
+import math
+from time import time
+from threading import Thread, Event, Lock
+
+from .running_process import get_children_map, get_process_tree
+from .throttle import read_psi_total
+
+STALL_SAMPLE_INTERVAL_SEC = 10.0
+STALL_HINT_MIN_LOST = 0.15  # don't give hints while workers lose less than this
+STALL_HINT_MIN_SHARE = 2.0 / 3  # cause should explain this part of lost time
+PSI_RESOURCES = ("cpu", "memory", "io")
+TMPFS_TYPES = ("tmpfs", "ramfs")
+
+try:
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = 100
+
+
+def read_cpu_ticks(pid):
+    """
+    Returns user + system time of process and its reaped children in clock ticks
+    """
+
+    try:
+        with open("/proc/%d/stat" % (pid,), "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+
+    fields = stat[stat.rfind(b")") + 2 :].split()
+    try:
+        return sum(int(value) for value in fields[11:15])
+    except (IndexError, ValueError):
+        return None
+
+
+def read_schedstat(pid):
+    """
+    Returns [time on cpu, time waiting in run queue] of process in nanoseconds
+    """
+
+    try:
+        with open("/proc/%d/schedstat" % (pid,), "r") as f:
+            fields = f.read().split()
+        return [int(fields[0]), int(fields[1])]
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def read_proc_io(pid):
+    """
+    Returns dict of I/O counters of process (rchar, wchar, write_bytes, ...)
+    """
+
+    counters = dict()
+    try:
+        with open("/proc/%d/io" % (pid,), "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                counters[name.strip()] = int(value)
+    except (OSError, ValueError):
+        pass
+
+    return counters
+
+
+def is_on_tmpfs(path, mounts_path="/proc/mounts"):
+    """
+    Returns True if `path` is on filesystem kept in memory, None if it's unknown
+    """
+
+    path = os.path.realpath(path)
+    fs_type = None
+    mount_len = -1
+    try:
+        with open(mounts_path, "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace("\\040", " ")
+                prefix = mount_point.rstrip("/") + "/"
+                if (path == mount_point or path.startswith(prefix)) and len(
+                    mount_point
+                ) > mount_len:
+                    fs_type = fields[2]
+                    mount_len = len(mount_point)
+    except OSError:
+        return None
+
+    if fs_type is None:
+        return None
+    return fs_type in TMPFS_TYPES
+
+
+def attribute_stalls(workers, psi):
+    """
+    `workers` is a list of [running share, run queue wait share] of wall time of each worker,
+    `psi` is dict of shares of wall time some tasks stalled on each resource (missing if unknown).
+    Returns dict of shares of worker time: lost (not running) and its causes:
+    cpu (waiting for CPU), io, memory and other (sleeping for other reasons)
+    """
+
+    summary = {"lost": 0.0, "cpu": 0.0, "io": 0.0, "memory": 0.0, "other": 0.0}
+    if len(workers) < 1:
+        return summary
+
+    io_psi = psi.get("io") or 0.0
+    mem_psi = psi.get("memory") or 0.0
+    for run, wait in workers:
+        lost = 1.0 - run
+        wait = min(wait, lost)
+        blocked = lost - wait
+
+        # worker can't be stalled on a resource longer than some task was
+        io = memory = 0.0
+        if io_psi + mem_psi > 0.0:
+            io = min(blocked * io_psi / (io_psi + mem_psi), io_psi)
+            memory = min(blocked * mem_psi / (io_psi + mem_psi), mem_psi)
+
+        summary["lost"] += lost
+        summary["cpu"] += wait
+        summary["io"] += io
+        summary["memory"] += memory
+        summary["other"] += blocked - io - memory
+
+    for name in summary:
+        summary[name] /= len(workers)
+    return summary
+
+
+def get_stall_hint(summary, num_workers, output_on_tmpfs):
+    """
+    Returns suggestion to fix the main cause of lost time if it's clear-cut or None
+    """
+
+    lost = summary["lost"]
+    if lost < STALL_HINT_MIN_LOST or num_workers < 1:
+        return None
+
+    cause = max(("cpu", "io", "memory"), key=lambda name: summary[name])
+    if summary[cause] < lost * STALL_HINT_MIN_SHARE:
+        return None
+
+    if cause == "cpu":
+        # workers got this many cores in total, more instances only split them further
+        reduce_by = num_workers - max(1, int(num_workers * (1.0 - lost)))
+        if reduce_by > 0:
+            return "reduce -n by %d" % (reduce_by,)
+    elif cause == "io":
+        if output_on_tmpfs is False:
+            return "move output dir to tmpfs (e.g. /dev/shm)"
+    elif cause == "memory":
+        reduce_by = min(
+            num_workers - 1, int(math.ceil(num_workers * summary["memory"]))
+        )
+        if reduce_by > 0:
+            return "reduce -n by %d or free memory" % (reduce_by,)
+
+    return None
+
+
+def format_stalls(summary):
+    text = (
+        "%.0f%% of worker time lost (waiting for CPU %.0f%%, I/O %.0f%%, "
+        "memory %.0f%%, other %.0f%%)"
+        % tuple(
+            100.0 * summary[name] for name in ("lost", "cpu", "io", "memory", "other")
+        )
+    )
+    psi = ", ".join(
+        "%s %.1f%%" % (name, 100.0 * summary["psi_" + name])
+        for name in PSI_RESOURCES
+        if summary.get("psi_" + name) is not None
+    )
+    if len(psi) > 0:
+        text += ", PSI: " + psi
+    return text
+
+
+class StallMonitor(Thread):
+    """
+    Samples workers and PSI every `interval` seconds. `collect` returns averages
+    over samples taken since its previous call
+    """
+
+    def __init__(self, fuzzman, interval=STALL_SAMPLE_INTERVAL_SEC):
+        super().__init__()
+        self.fuzzman = fuzzman
+        self.interval = interval
+        self.output_on_tmpfs = is_on_tmpfs(fuzzman.args.output_dir)
+
+        self.deltas = []  # [duration, psi stall times, per-worker deltas] since collect
+        self.last_summary = None
+        self.lock = Lock()
+        self._stop_evt = Event()
+
+        self.prev_sample = self.take_sample()
+        self.start()
+
+    def take_sample(self):
+        children = get_children_map()
+        sample = {
+            "time": time(),
+            "psi": {name: read_psi_total(name) for name in PSI_RESOURCES},
+            "workers": dict(),
+        }
+        for proc in self.fuzzman.procs:
+            if proc.proc is None or proc.paused or proc.proc.poll() is not None:
+                continue
+
+            pid = proc.proc.pid
+            cpu_ticks = 0
+            wait_ns = 0
+            for p in get_process_tree(pid, children):
+                cpu_ticks += read_cpu_ticks(p) or 0
+                sched = read_schedstat(p)
+                if sched is not None:
+                    wait_ns += sched[1]
+
+            sample["workers"][proc.name] = {
+                "pid": pid,
+                "cpu": cpu_ticks,
+                "wait": wait_ns,
+                "io": read_proc_io(pid),
+            }
+
+        return sample
+
+    @staticmethod
+    def get_deltas(prev, cur):
+        duration = cur["time"] - prev["time"]
+        if duration <= 0.0:
+            return None
+
+        psi = dict()
+        for name in PSI_RESOURCES:
+            if prev["psi"][name] is not None and cur["psi"][name] is not None:
+                psi[name] = max(0, cur["psi"][name] - prev["psi"][name]) / 1e6
+
+        workers = dict()
+        for name, w in cur["workers"].items():
+            p = prev["workers"].get(name)
+            if p is None or p["pid"] != w["pid"]:
+                continue  # worker was (re)started during this interval
+
+            workers[name] = {
+                "cpu": max(0, w["cpu"] - p["cpu"]) / float(CLOCK_TICKS),
+                # run queue wait of target processes that already exited is lost
+                "wait": max(0, w["wait"] - p["wait"]) / 1e9,
+                "write_bytes": max(
+                    0, w["io"].get("wchar", 0) - p["io"].get("wchar", 0)
+                ),
+            }
+
+        return [duration, psi, workers]
+
+    def sample_once(self):
+        sample = self.take_sample()
+        deltas = self.get_deltas(self.prev_sample, sample)
+        self.prev_sample = sample
+        if deltas is not None:
+            with self.lock:
+                self.deltas.append(deltas)
+
+    def collect(self):
+        """
+        Returns dict with summary of lost time (see attribute_stalls), PSI shares,
+        hint and per-worker shares. Returns previous result if there were no samples
+        since the last call (None if there were no samples at all)
+        """
+
+        with self.lock:
+            deltas, self.deltas = self.deltas, []
+        if len(deltas) < 1:
+            return self.last_summary
+
+        total_duration = sum(d[0] for d in deltas)
+        psi = dict()
+        for name in PSI_RESOURCES:
+            if all(name in d[1] for d in deltas):
+                psi[name] = sum(d[1][name] for d in deltas) / total_duration
+
+        per_worker = dict()  # name -> [duration, cpu, wait, written]
+        for duration, _, workers in deltas:
+            for name, w in workers.items():
+                acc = per_worker.setdefault(name, [0.0, 0.0, 0.0, 0])
+                acc[0] += duration
+                acc[1] += w["cpu"]
+                acc[2] += w["wait"]
+                acc[3] += w["write_bytes"]
+
+        worker_shares = dict()
+        for name, (duration, cpu, wait, written) in per_worker.items():
+            worker_shares[name] = {
+                "run": min(1.0, cpu / duration),
+                "wait": min(1.0, wait / duration),
+                "write_rate": written / duration,
+            }
+
+        summary = attribute_stalls(
+            [[w["run"], w["wait"]] for w in worker_shares.values()], psi
+        )
+        for name in PSI_RESOURCES:
+            summary["psi_" + name] = psi.get(name)
+        summary["hint"] = get_stall_hint(
+            summary, len(worker_shares), self.output_on_tmpfs
+        )
+        summary["workers"] = worker_shares
+        self.last_summary = summary
+        return summary
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval):
+            self.sample_once()
+
+    def stop(self):
+        self._stop_evt.set()
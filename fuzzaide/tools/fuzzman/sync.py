@@ -0,0 +1,204 @@
+# file    :  tools/fuzzman/sync.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Helpers to exchange test cases between fuzzers via AFL-like sync directories
+"""
+
+import os
+import sys
+import hashlib
+from time import time
+from threading import Thread, Event
+
+RELAY_NAME = "fuzzman_relay"
+SEEDS_NAME = "fuzzman_seeds"
+
+
+def parse_queue_entry_name(name):
+    """
+    Returns dict of fields of AFL queue entry name,
+    e.g. "id:000012,sync:s2,src:000003" -> {"id": "000012", "sync": "s2", "src": "000003"}
+    """
+
+    fields = dict()
+    for part in name.split(","):
+        key, sep, value = part.partition(":")
+        if sep:
+            fields.setdefault(key, value)
+    return fields
+
+
+class QueueWatcher:
+    """
+    Reports new test cases ("id:..." files) appearing in a directory.
+    Directory is only listed again when its mtime changes
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime_ns = None
+        self.seen = set()
+
+    def get_new_entries(self, min_age=0.0):
+        """
+        Returns sorted names of new entries. Entries modified less than `min_age` seconds ago
+        may still be written by fuzzer, so they are reported on one of the next calls
+        """
+
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return []
+
+        if mtime_ns == self.mtime_ns:
+            return []
+
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+
+        now = time()
+        new_entries = []
+        postponed = False
+        for name in names:
+            if name in self.seen or not name.startswith("id:"):
+                continue
+
+            if min_age > 0.0:
+                try:
+                    if now - os.stat(os.path.join(self.path, name)).st_mtime < min_age:
+                        postponed = True
+                        continue
+                except OSError:
+                    continue
+
+            self.seen.add(name)
+            new_entries.append(name)
+
+        # files added in the same mtime tick as the listing would be missed otherwise
+        if not postponed and now - mtime_ns / 1e9 > 1.0:
+            self.mtime_ns = mtime_ns
+
+        return sorted(new_entries)
+
+
+class SyntheticSyncDir:
+    """
+    Directory that looks like another fuzzer's output (<sync dir>/<name>/queue)
+    so fuzzers import test cases put here during their regular sync
+    """
+
+    def __init__(self, sync_dir, name):
+        self.name = name
+        self.queue_dir = os.path.join(sync_dir, name, "queue")
+        self.tmp_dir = os.path.join(sync_dir, name, ".tmp")
+        os.makedirs(self.queue_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self.next_id = 0
+        for entry in os.listdir(self.queue_dir):
+            try:
+                self.next_id = max(self.next_id, int(entry[3:9]) + 1)
+            except ValueError:
+                continue
+
+    def add(self, data, info=""):
+        """
+        Atomically put test case into queue so fuzzers never see partial files.
+        Returns name of the created entry
+        """
+
+        name = "id:%06d" % (self.next_id,)
+        if info:
+            name += "," + info
+
+        tmp_path = os.path.join(self.tmp_dir, name)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.queue_dir, name))
+
+        self.next_id += 1
+        return name
+
+
+class SyncRelay(Thread):
+    """
+    Moves new test cases between sync groups (separate fuzzer output dirs)
+    Test cases are deduplicated by contents, so fuzzers never get back what they have shared
+    """
+
+    def __init__(self, group_dirs, interval, verbose=False):
+        super().__init__()
+        self.group_dirs = group_dirs
+        self.interval = interval
+        self.verbose = verbose
+        self.relay_dirs = [SyntheticSyncDir(d, RELAY_NAME) for d in group_dirs]
+        self.watchers = dict()  # queue dir path -> QueueWatcher
+        self.hashes = set()
+        self.num_relayed = 0
+        self.num_duplicates = 0
+        self._stop_evt = Event()
+
+        self.start()
+
+    def get_group_queue_dirs(self, group_dir):
+        try:
+            names = os.listdir(group_dir)
+        except OSError:
+            return []
+
+        return [
+            os.path.join(group_dir, name, "queue")
+            for name in sorted(names)
+            if name not in (RELAY_NAME, SEEDS_NAME) and not name.startswith(".")
+        ]
+
+    def relay_once(self):
+        for idx, group_dir in enumerate(self.group_dirs):
+            for queue_dir in self.get_group_queue_dirs(group_dir):
+                watcher = self.watchers.get(queue_dir)
+                if watcher is None:
+                    watcher = self.watchers[queue_dir] = QueueWatcher(queue_dir)
+
+                for name in watcher.get_new_entries(min_age=1.0):
+                    try:
+                        with open(os.path.join(queue_dir, name), "rb") as f:
+                            data = f.read()
+                    except OSError:
+                        continue
+
+                    digest = hashlib.sha1(data).digest()
+                    if digest in self.hashes:
+                        self.num_duplicates += 1
+                        continue
+                    self.hashes.add(digest)
+
+                    for relay_idx, relay_dir in enumerate(self.relay_dirs):
+                        if relay_idx == idx:
+                            continue
+                        try:
+                            relay_dir.add(data)
+                        except OSError as e:
+                            print(
+                                "Sync relay wasn't able to save test case: %s" % e,
+                                file=sys.stderr,
+                            )
+                    self.num_relayed += 1
+
+        if self.verbose:
+            print(
+                "Sync relay: %d test cases relayed, %d duplicates skipped"
+                % (self.num_relayed, self.num_duplicates)
+            )
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval):
+            self.relay_once()
+
+    def stop(self):
+        self._stop_evt.set()
@@ -0,0 +1,167 @@
+# file    :  tools/fuzzman/throttle.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Pause part of secondary workers while the host is under load and resume them when it's idle
+"""
+
+import os
+import math
+import shlex
+from time import time
+from threading import Thread, Event
+from multiprocessing import cpu_count
+
+THROTTLE_CHECK_INTERVAL_SEC = 5.0
+THROTTLE_MIN_HOLD_SEC = 30.0  # PSI averages lag, don't flap between states
+THROTTLE_LOW_FACTOR = 0.5  # resume when pressure drops below half of the threshold
+
+
+def read_psi(resource, psi_dir="/proc/pressure"):
+    """
+    Returns "some avg10" value (percent of time tasks waited for `resource`) or None
+    if pressure stall information is not available
+    """
+
+    try:
+        with open(os.path.join(psi_dir, resource), "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 1 and fields[0] == "some":
+                    return float(fields[1].split("=")[1])
+    except (OSError, IndexError, ValueError):
+        pass
+
+    return None
+
+
+def read_psi_total(resource, psi_dir="/proc/pressure"):
+    """
+    Returns "some total" value (microseconds tasks waited for `resource` since boot) or None
+    """
+
+    try:
+        with open(os.path.join(psi_dir, resource), "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 4 and fields[0] == "some":
+                    return int(fields[4].split("=")[1])
+    except (OSError, IndexError, ValueError):
+        pass
+
+    return None
+
+
+def get_foreign_load(num_own_running):
+    """
+    Returns 1-minute load average not caused by our running workers, per core
+    """
+
+    try:
+        load = os.getloadavg()[0]
+    except OSError:
+        return None
+
+    return max(0.0, load - num_own_running) / cpu_count()
+
+
+def get_secondaries(procs):
+    """
+    Returns workers that weren't started as main (-M), most recently started last
+    """
+
+    return [proc for proc in procs if "-M" not in shlex.split(proc.cmd)]
+
+
+class LoadThrottle(Thread):
+    """
+    Periodically checks CPU and memory pressure (PSI) or, if PSI is not available,
+    load average. Under pressure pauses `share` of secondary workers with SIGSTOP.
+    Workers record time they were paused themselves, see FuzzManager.get_paused_time()
+    """
+
+    def __init__(self, fuzzman, share, cpu_psi, memory_psi, load):
+        super().__init__()
+        self.fuzzman = fuzzman
+        self.share = share
+        self.thresholds = {"cpu": cpu_psi, "memory": memory_psi, "load": load}
+        self.use_psi = read_psi("cpu") is not None
+
+        self.paused = []
+        self.reason = None
+        self.last_change = 0.0
+        self._stop_evt = Event()
+
+        self.start()
+
+    def sample(self):
+        """
+        Returns dict of current pressure values (percent for PSI, load per core otherwise)
+        """
+
+        if self.use_psi:
+            return {"cpu": read_psi("cpu"), "memory": read_psi("memory")}
+
+        num_running = sum(1 for proc in self.fuzzman.procs if not proc.paused)
+        return {"load": get_foreign_load(num_running)}
+
+    def get_overload(self, values, factor=1.0):
+        """
+        Returns description of first value above its threshold * factor or None
+        """
+
+        for name, value in values.items():
+            if value is not None and value >= self.thresholds[name] * factor:
+                return "%s pressure %.2f" % (name, value)
+        return None
+
+    def check(self, now):
+        values = self.sample()
+        if now - self.last_change < THROTTLE_MIN_HOLD_SEC:
+            return
+
+        if len(self.paused) < 1:
+            reason = self.get_overload(values)
+            if reason is not None:
+                self.pause_workers(now, reason)
+        elif self.get_overload(values, THROTTLE_LOW_FACTOR) is None:
+            self.resume_workers(now)
+        else:
+            for proc in self.paused:
+                proc.pause("throttle")  # in case worker was restarted meanwhile
+
+    def pause_workers(self, now, reason):
+        secondaries = get_secondaries(self.fuzzman.procs)
+        count = int(math.ceil(self.share * len(secondaries)))
+        if count < 1:
+            return
+
+        self.paused = secondaries[-count:]
+        for proc in self.paused:
+            proc.pause("throttle")
+
+        print("Host is under load (%s), paused %d workers" % (reason, count))
+        self.reason = reason
+        self.last_change = now
+
+    def resume_workers(self, now):
+        for proc in self.paused:
+            proc.resume("throttle")  # unless it's paused for other reasons too
+
+        print("Host load is back to normal, resumed %d workers" % (len(self.paused),))
+        self.paused = []
+        self.reason = None
+        self.last_change = now
+
+    def run(self):
+        while not self._stop_evt.wait(THROTTLE_CHECK_INTERVAL_SEC):
+            self.check(time())
+
+        if len(self.paused) > 0:
+            self.resume_workers(time())
+
+    def stop(self):
+        self._stop_evt.set()
@@ -0,0 +1,179 @@
+# file    :  tools/fuzzman/timeout_calibration.py
+# repo    :  https://github.com/fuzzah/fuzzaide
+# author  :  https://github.com/fuzzah
+# license :  MIT
+# check repository for more information
+
+"""
+Measure execution times of tested program on seed corpus and choose -t value for fuzzers
+"""
+
+import os
+import math
+import random
+import subprocess
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+# runs longer than this are considered hangs and counted as this value
+RUN_TIME_CAP_SEC = 10.0
+
+# don't spend ages measuring huge corpora
+MAX_SEEDS_TO_MEASURE = 2000
+
+# timeout is chosen percentile multiplied by margin, but not less than minimum
+TIMEOUT_MARGIN = 2.0
+MIN_TIMEOUT_MS = 20
+MAX_TIMEOUT_MS = int(RUN_TIME_CAP_SEC * 1000)
+
+# runtime retuning: raise timeout if rate of timeouts is high, lower it back if rate is low
+TIMEOUT_RATE_HIGH = 0.01
+TIMEOUT_RATE_LOW = 0.0001
+RETUNE_FACTOR = 1.5
+
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+
+def get_seed_paths(input_dir):
+    """
+    Returns list of seed files in input dir (hidden files are skipped like afl-fuzz does)
+    """
+
+    paths = []
+    for name in sorted(os.listdir(input_dir)):
+        if name.startswith("."):
+            continue
+        path = os.path.join(input_dir, name)
+        if os.path.isfile(path):
+            paths.append(path)
+
+    if len(paths) > MAX_SEEDS_TO_MEASURE:
+        paths = random.sample(paths, MAX_SEEDS_TO_MEASURE)
+
+    return paths
+
+
+def time_one_run(program, seed_path, env=None):
+    """
+    Run `program` (list of arguments, @@ is replaced with `seed_path`) once.
+    If program has no @@, seed is passed via stdin. Returns run time in milliseconds
+    """
+
+    use_stdin = "@@" not in program
+    args = [seed_path if arg == "@@" else arg for arg in program]
+
+    with open(seed_path, "rb") as f:
+        start = perf_counter()
+        try:
+            subprocess.run(
+                args,
+                stdin=f if use_stdin else subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=RUN_TIME_CAP_SEC,
+                env=env,
+            )
+        except subprocess.TimeoutExpired:
+            return RUN_TIME_CAP_SEC * 1000.0
+        return (perf_counter() - start) * 1000.0
+
+
+def measure_exec_times(programs, seed_paths, jobs):
+    """
+    Time each program on each seed using `jobs` parallel runs.
+    Returns sorted list of run times in milliseconds
+    """
+
+    tasks = [(program, seed) for program in programs for seed in seed_paths]
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        times = list(executor.map(lambda task: time_one_run(*task), tasks))
+
+    return sorted(times)
+
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile of already sorted list
+    """
+
+    if len(sorted_values) < 1:
+        return None
+
+    rank = int(math.ceil(p / 100.0 * len(sorted_values)))
+    rank = min(max(rank, 1), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def compute_timeout(sorted_times, p):
+    """
+    Returns timeout in milliseconds for -t option of afl-fuzz
+    """
+
+    value = percentile(sorted_times, p)
+    if value is None:
+        return None
+
+    timeout = int(math.ceil(value * TIMEOUT_MARGIN / 5.0)) * 5
+    return min(max(timeout, MIN_TIMEOUT_MS), MAX_TIMEOUT_MS)
+
+
+def retune_timeout(timeout, calibrated_timeout, execs, timeouts):
+    """
+    Returns new timeout based on rate of timeouts seen since the last check.
+    Timeout is raised when fuzzers hit it too often and lowered back (but not below
+    the calibrated value) when they almost never do
+    """
+
+    if execs <= 0:
+        return timeout
+
+    rate = float(timeouts) / execs
+    if rate > TIMEOUT_RATE_HIGH:
+        return min(int(timeout * RETUNE_FACTOR), MAX_TIMEOUT_MS)
+
+    if rate < TIMEOUT_RATE_LOW and timeout > calibrated_timeout:
+        return max(int(timeout / RETUNE_FACTOR), calibrated_timeout)
+
+    return timeout
+
+
+def format_distribution(sorted_times, p, timeout):
+    """
+    Returns human-readable report explaining the chosen timeout
+    """
+
+    lines = [
+        "Measured %d runs (ms): min %.1f, median %.1f, p90 %.1f, p99 %.1f, max %.1f"
+        % (
+            len(sorted_times),
+            sorted_times[0],
+            percentile(sorted_times, 50),
+            percentile(sorted_times, 90),
+            percentile(sorted_times, 99),
+            sorted_times[-1],
+        )
+    ]
+
+    lower = 0
+    for upper in HISTOGRAM_BUCKETS_MS + [None]:
+        if upper is None:
+            count = sum(1 for t in sorted_times if t >= lower)
+            label = ">= %d ms" % (lower,)
+        else:
+            count = sum(1 for t in sorted_times if lower <= t < upper)
+            label = "%d-%d ms" % (lower, upper)
+        if count > 0:
+            lines.append("  %14s: %d" % (label, count))
+        lower = upper
+
+    capped = sum(1 for t in sorted_times if t >= RUN_TIME_CAP_SEC * 1000.0)
+    if capped > 0:
+        lines.append(
+            "  %d runs hit the cap of %.0f seconds" % (capped, RUN_TIME_CAP_SEC)
+        )
+
+    lines.append(
+        "Using -t %d (p%g = %.1f ms x %.1f, min %d ms)"
+        % (timeout, p, percentile(sorted_times, p), TIMEOUT_MARGIN, MIN_TIMEOUT_MS)
+    )
+    return "\n".join(lines)
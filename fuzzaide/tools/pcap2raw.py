@@ -13,12 +13,6 @@ import argparse
 from hashlib import sha1
 
 
-try:
-    from scapy.all import rdpcap
-except:
-    sys.exit("Please install scapy: python3 -m pip install -U scapy --user")
-
-
 class ArgumentParserWithExamples(argparse.ArgumentParser):
     def __init__(self, *args, **kwargs):
         argparse.ArgumentParser.__init__(self, *args, **kwargs)
@@ -138,6 +132,11 @@ def main():
 
     args = parser.parse_args()
 
+    try:  # scapy takes long to import, so only load it when there's work to do
+        from scapy.all import rdpcap
+    except ImportError:
+        sys.exit("Please install scapy: python3 -m pip install -U scapy --user")
+
     if "." in args.prefix + args.suffix + args.ext:
         sys.exit("please don't use dots (.) in file name prefix, suffix or extension")
 